@@ -1,70 +1,325 @@
-from faster_whisper import WhisperModel
 from utils.LogTool import LogTool
 from utils.ConfigTool import ConfigTool
+from utils.MetricTool import MetricTool
+from core.InferScheduler import InferScheduler
+from dao.TranscriptCacheDao import TranscriptCacheDao
+from collections import OrderedDict
 import os
+import time
+import bisect
+import threading
+import numpy as np
 
 class AsrService:
-    _model = None
+    """
+    Whisper 识别服务 + 模型管理
+    - 模型按 modelKey = (modelSize, computeType, device) 按需加载，同一模型由所有调用方共享
+    - 每个模型最多 modelPool.instancesPerModel 个实例，并发请求各取一个空闲实例，全忙时排队
+    - 已加载实例的估算内存超过 modelPool.memoryBudgetMb 时，淘汰最久未使用模型的空闲实例
+    - 调用方通过 modelKey 参数按请求选择模型，None 表示 models.yaml 中的默认模型
+    - 离线文件 (priority=batch) 的识别结果按音频内容缓存 (TranscriptCacheDao)，实时会话不缓存
+    - 未命中缓存的推理先经 InferScheduler 按优先级 (live / batch) 排队
+    - 解码参数与默认模型读取 ConfigTool.snapshot()；配置热更新后解码参数从下一段生效，
+      默认模型变化时先在后台加载新模型，加载完成后才切换 (onConfigChange)
+    """
+    # modelKey -> {"idle": 空闲实例列表, "count": 已加载及加载中的实例数, "inUse": 使用中的实例数}
+    # 实例: {"model": WhisperModel, "pipeline": BatchedInferencePipeline 或 None}
+    _modelMap = OrderedDict()
+    _poolCond = threading.Condition()
+    _cpuThreads = None
+    # 热更新换默认模型期间仍在使用的默认模型，None 表示与配置快照一致
+    _activeModelKey = None
+    # 最近一次配置变化要切换到的默认模型
+    _targetModelKey = None
+    _cacheHit = 0
+    _cacheMiss = 0
+
+    # Whisper 编码器固定窗口 (秒)，批量识别中每段不能超过该长度
+    maxBatchSegmentSec = 30.0
+    sampleRate = 16000
+    # int8 下各规格模型的大致内存占用 (MB)，用于内存预算估算
+    modelMemoryMb = {"tiny": 75, "base": 150, "small": 500, "medium": 1500, "large-v1": 3100, "large-v2": 3100, "large-v3": 3100}
+    computeTypeFactor = {"float16": 2, "float32": 4, "int8_float16": 1.2, "int8_float32": 1.2}
+
+    @staticmethod
+    def getModelKey(modelSize=None, computeType=None, device=None, snapshot=None):
+        """
+        生成 modelKey，未指定的部分使用默认模型 (modelConfig)
+        snapshot: 本次请求已取得的配置快照，None 表示读取当前快照
+        """
+        defaultKey = AsrService._activeModelKey
+        if defaultKey is None:
+            snapshot = snapshot or ConfigTool.snapshot()
+            defaultKey = (snapshot.modelSize, snapshot.computeType, snapshot.device)
+        return (
+            modelSize or defaultKey[0],
+            computeType or defaultKey[1],
+            device or defaultKey[2]
+        )
+
+    @staticmethod
+    def isAllowedModel(modelSize):
+        """
+        客户端按请求选择模型时，只允许 modelPool.allowedSizes 中的规格 (避免任意下载)
+        """
+        allowedList = ConfigTool.get("modelPool.allowedSizes", [])
+        return modelSize == AsrService.getModelKey()[0] or modelSize in allowedList
+
+    @staticmethod
+    def initModel(cpuThreads=None, modelKey=None):
+        """
+        预加载模型 (默认模型或 modelKey 指定的模型)，返回是否成功
+        cpuThreads: 本进程所有模型实例的推理线程数，None 表示读取配置 (0 为 CTranslate2 默认值)
+        """
+        if cpuThreads is not None:
+            AsrService._cpuThreads = cpuThreads
+        if modelKey is None:
+            modelKey = AsrService.getModelKey()
+
+        instance = AsrService.acquireModel(modelKey)
+        if instance is None:
+            return False
+        AsrService.releaseModel(modelKey, instance)
+        return True
+
+    @staticmethod
+    def acquireModel(modelKey, snapshot=None):
+        """
+        取一个空闲的模型实例 (必要时加载)，用完必须调用 releaseModel；加载失败返回 None
+        """
+        maxInstances = (snapshot or ConfigTool.snapshot()).instancesPerModel
+        with AsrService._poolCond:
+            while True:
+                # 等待期间条目可能被淘汰，每次重新获取
+                entry = AsrService._modelMap.get(modelKey)
+                if entry is None:
+                    entry = {"idle": [], "count": 0, "inUse": 0}
+                    AsrService._modelMap[modelKey] = entry
+                AsrService._modelMap.move_to_end(modelKey)
+
+                if entry["idle"]:
+                    entry["inUse"] += 1
+                    return entry["idle"].pop()
+                # 首个实例总是加载 (内存不足时先淘汰其他模型)，后续实例只在预算允许时增加
+                isFirst = entry["count"] == 0
+                if isFirst or (entry["count"] < maxInstances and AsrService.evictFor(modelKey, allowOver=False)):
+                    if isFirst:
+                        AsrService.evictFor(modelKey, allowOver=True)
+                    entry["count"] += 1
+                    entry["inUse"] += 1
+                    break
+                AsrService._poolCond.wait()
+
+        # 加载耗时较长，在锁外进行
+        instance = AsrService.loadInstance(modelKey)
+        if instance is None:
+            with AsrService._poolCond:
+                entry["count"] -= 1
+                entry["inUse"] -= 1
+                if entry["count"] == 0 and AsrService._modelMap.get(modelKey) is entry:
+                    del AsrService._modelMap[modelKey]
+                AsrService._poolCond.notify_all()
+        return instance
+
+    @staticmethod
+    def releaseModel(modelKey, instance):
+        with AsrService._poolCond:
+            entry = AsrService._modelMap.get(modelKey)
+            if entry is not None:
+                entry["idle"].append(instance)
+                entry["inUse"] -= 1
+            AsrService._poolCond.notify_all()
+
+    @staticmethod
+    def getInstanceMb(modelKey):
+        modelSize, computeType, device = modelKey
+        baseMb = AsrService.modelMemoryMb.get(modelSize, AsrService.modelMemoryMb["medium"])
+        return baseMb * AsrService.computeTypeFactor.get(computeType, 1)
 
     @staticmethod
-    def initModel():
+    def evictFor(modelKey, allowOver):
         """
-        根据配置加载 Whisper 模型
+        为 modelKey 再加载一个实例腾出内存预算 (调用方已持有 _poolCond)
+        按最近使用顺序从旧到新淘汰其他模型的空闲实例；返回预算是否足够
+        allowOver: 无法腾出足够内存时是否仍允许加载 (模型的首个实例)
         """
-        if AsrService._model is not None:
+        budgetMb = ConfigTool.get("modelPool.memoryBudgetMb", 0)
+        if budgetMb <= 0:
             return True
-            
+
+        usedMb = sum(entry["count"] * AsrService.getInstanceMb(key) for key, entry in AsrService._modelMap.items())
+        needMb = AsrService.getInstanceMb(modelKey)
+        if usedMb + needMb <= budgetMb:
+            return True
+        if not allowOver:
+            # 淘汰全部可淘汰实例仍不够时不做无用的淘汰
+            freeMb = sum(len(entry["idle"]) * AsrService.getInstanceMb(key) for key, entry in AsrService._modelMap.items() if key != modelKey)
+            if usedMb + needMb - freeMb > budgetMb:
+                return False
+
+        for key in list(AsrService._modelMap.keys()):
+            if usedMb + needMb <= budgetMb:
+                break
+            entry = AsrService._modelMap[key]
+            if key == modelKey:
+                continue
+            while entry["idle"] and usedMb + needMb > budgetMb:
+                entry["idle"].pop()
+                entry["count"] -= 1
+                usedMb -= AsrService.getInstanceMb(key)
+                LogTool.info(f"Evicted model instance {key} (memory budget {budgetMb}MB)")
+            if entry["count"] == 0:
+                del AsrService._modelMap[key]
+
+        if usedMb + needMb > budgetMb and allowOver:
+            LogTool.info(f"Model memory budget exceeded: {usedMb + needMb:.0f}MB > {budgetMb}MB, loading {modelKey} anyway")
+        return usedMb + needMb <= budgetMb
+
+    @staticmethod
+    def loadInstance(modelKey):
+        """
+        加载一个模型实例
+        """
         try:
-            modelSize = ConfigTool.get("modelConfig.modelSize", "base")
-            device = ConfigTool.get("modelConfig.device", "cpu")
-            computeType = ConfigTool.get("modelConfig.computeType", "int8")
+            # 延迟导入: faster_whisper / ctranslate2 导入耗时较长，仅在真正加载模型时才导入
+            from faster_whisper import WhisperModel
+
+            modelSize, computeType, device = modelKey
             
             # 使用 ConfigTool 获取路径，默认为 app/models
             modelPath = ConfigTool.get("modelConfig.modelPath", "app/models")
+            cpuThreads = AsrService._cpuThreads
+            if cpuThreads is None:
+                cpuThreads = ConfigTool.get("modelConfig.cpuThreads", 0)
+            # 单个实例内可并发执行 transcribe 的线程数
+            numWorkers = ConfigTool.get("modelConfig.numWorkers", 1)
             
             # 确保目录存在
             if not os.path.exists(modelPath):
                 os.makedirs(modelPath)
 
-            LogTool.info(f"Loading Whisper model: {modelSize} from {modelPath} on {device} ({computeType})...")
+            LogTool.info(f"Loading Whisper model: {modelSize} from {modelPath} on {device} ({computeType}, threads={cpuThreads})...")
             
-            AsrService._model = WhisperModel(
+            model = WhisperModel(
                 modelSize, 
                 device=device, 
                 compute_type=computeType,
+                cpu_threads=cpuThreads,
+                num_workers=numWorkers,
                 download_root=modelPath
             )
             
             LogTool.info("Model loaded successfully.")
-            return True
+            if ConfigTool.get("modelConfig.warmup", True):
+                AsrService.warmup(model)
+            return {"model": model, "pipeline": None}
         except Exception as e:
-            LogTool.error("Failed to load Whisper model", e)
-            return False
+            LogTool.error(f"Failed to load Whisper model {modelKey}", e)
+            return None
+
+    @staticmethod
+    def warmup(model):
+        """
+        加载后先识别一段 1 秒的静音，触发内存分配与算子初始化，避免第一段真实音频承担这部分耗时
+        """
+        try:
+            snapshot = ConfigTool.snapshot()
+            startTime = time.perf_counter()
+            segments, info = model.transcribe(
+                np.zeros(AsrService.sampleRate, dtype=np.float32),
+                beam_size=snapshot.beamSize,
+                language=snapshot.language,
+                vad_filter=False
+            )
+            for segment in segments:
+                pass
+            LogTool.info(f"Model warmup finished in {time.perf_counter() - startTime:.2f}s")
+        except Exception as e:
+            # 预热失败不影响正常识别
+            LogTool.error("Model warmup failed", e)
+
+    @staticmethod
+    def onConfigChange(oldSnapshot, newSnapshot):
+        """
+        配置热更新回调 (ConfigTool.addListener): 解码参数自动从下一段生效；
+        默认模型变化时在后台加载新模型，加载期间仍使用原模型
+        """
+        oldKey = (oldSnapshot.modelSize, oldSnapshot.computeType, oldSnapshot.device)
+        newKey = (newSnapshot.modelSize, newSnapshot.computeType, newSnapshot.device)
+        if oldKey == newKey:
+            if oldSnapshot != newSnapshot:
+                LogTool.info(f"ASR parameters updated, applied from the next segment: {newSnapshot}")
+            return
+        # 在新快照发布前调用 (ConfigTool.reload)，先固定原模型，新快照可见后的请求也不会同步加载新模型
+        if AsrService._activeModelKey is None:
+            AsrService._activeModelKey = oldKey
+        AsrService._targetModelKey = newKey
+        threading.Thread(target=AsrService.switchModel, args=(newKey,), name="modelReload", daemon=True).start()
+
+    @staticmethod
+    def switchModel(modelKey):
+        LogTool.info(f"Default model changed, loading {modelKey} in background (still using {AsrService._activeModelKey})")
+        if not AsrService.initModel(modelKey=modelKey):
+            LogTool.error(f"Failed to load new default model {modelKey}, keeping {AsrService._activeModelKey}")
+            return
+        if AsrService._targetModelKey != modelKey:
+            # 加载期间配置再次变化，由后一次切换负责
+            LogTool.info(f"Default model changed again while loading {modelKey}, keeping {AsrService._activeModelKey}")
+            return
+        # 新快照在所有监听者返回后才发布: 先固定到新模型，等发布后再回到跟随配置，否则其间会退回原模型
+        AsrService._activeModelKey = modelKey
+        while AsrService._targetModelKey == modelKey:
+            snapshot = ConfigTool.snapshot()
+            if (snapshot.modelSize, snapshot.computeType, snapshot.device) == modelKey:
+                AsrService._activeModelKey = None
+                break
+            time.sleep(0.01)
+        LogTool.info(f"Switched default model to {modelKey}")
 
     @staticmethod
-    def transcribe(audioData):
+    def transcribe(audioData, vadFilter=None, modelKey=None, priority="live", decodeOptions=None):
         """
         对音频 numpy 数组进行识别
+        vadFilter: 是否启用模型内置 VAD，None 表示读取配置 (上游已按帧级 VAD 切分时传 False)
+        modelKey: 使用的模型 (getModelKey)，None 表示默认模型
+        priority: 推理调度优先级 live / batch (InferScheduler)
+        decodeOptions: 覆盖本次识别的解码参数 (getDecodeParams)，None 表示读取配置
         返回: list of dict [{'text': str, 'start': float, 'end': float}, ...]
         """
-        if AsrService._model is None:
-            if not AsrService.initModel():
-                return []
+        # 每次请求只取一次配置快照，热更新不会让同一请求前后使用不同参数
+        snapshot = ConfigTool.snapshot()
+        if vadFilter is None:
+            vadFilter = snapshot.vadFilter
+        if modelKey is None:
+            modelKey = AsrService.getModelKey(snapshot=snapshot)
+        decodeParams = AsrService.getDecodeParams(decodeOptions, snapshot)
+        cacheKey = AsrService.getCacheKey(audioData, "single", priority, vadFilter, modelKey, decodeParams, snapshot)
+        cachedSegments = AsrService.readCache(cacheKey)
+        if cachedSegments is not None:
+            return cachedSegments
 
+        InferScheduler.acquire(priority)
         try:
-            beamSize = ConfigTool.get("asrParams.beamSize", 5)
-            language = ConfigTool.get("asrParams.language", "zh")
-            
-            # 读取配置中的提示语
-            initialPrompt = ConfigTool.get("asrParams.initialPrompt", "")
-            
-            segments, info = AsrService._model.transcribe(
+            return AsrService.runTranscribe(audioData, vadFilter, modelKey, cacheKey, decodeParams, snapshot)
+        finally:
+            InferScheduler.release()
+
+    @staticmethod
+    def runTranscribe(audioData, vadFilter, modelKey, cacheKey, decodeParams, snapshot):
+        instance = AsrService.acquireModel(modelKey, snapshot)
+        if instance is None:
+            return []
+
+        try:
+            startTime = MetricTool.startTimer()
+            segments, info = instance["model"].transcribe(
                 audioData, 
-                beam_size=beamSize, 
-                language=language,
-                vad_filter=ConfigTool.get("asrParams.vadFilter", True),
-                vad_parameters=dict(min_silence_duration_ms=ConfigTool.get("asrParams.vadMinSilenceDurationMs", 500)),
-                initial_prompt=initialPrompt
+                beam_size=decodeParams["beamSize"], 
+                language=decodeParams["language"],
+                vad_filter=vadFilter,
+                vad_parameters=dict(min_silence_duration_ms=decodeParams["vadMinSilenceDurationMs"]),
+                initial_prompt=decodeParams["initialPrompt"],
+                condition_on_previous_text=decodeParams["conditionOnPreviousText"]
             )
 
             # faster-whisper 的 segments 是一个生成器，必须遍历才能触发推理
@@ -75,8 +330,192 @@ class AsrService:
                     "start": segment.start,
                     "end": segment.end
                 })
+            MetricTool.addCounter("inferSeconds", MetricTool.stopTimer("infer", startTime))
             
+            AsrService.writeCache(cacheKey, resultSegments)
             return resultSegments
         except Exception as e:
             LogTool.error("Transcription error", e)
-            return []
\ No newline at end of file
+            MetricTool.addCounter("errors")
+            return []
+        finally:
+            AsrService.releaseModel(modelKey, instance)
+
+    @staticmethod
+    def transcribeBatch(audioList, modelKey=None, priority="live", decodeOptions=None):
+        """
+        批量识别多段短音频 (faster-whisper BatchedInferencePipeline)
+        多段音频拼接后按 clip_timestamps 切回，编码器/解码器一次处理 batchSize 段
+        返回: 与 audioList 一一对应的 list，每项为 [{'text', 'start', 'end'}, ...]，时间相对于各自片段
+        priority: 推理调度优先级 live / batch (InferScheduler)
+        decodeOptions: 覆盖本次识别的解码参数 (getDecodeParams)
+        """
+        resultList = [[] for _ in audioList]
+        if not audioList:
+            return resultList
+        snapshot = ConfigTool.snapshot()
+        if modelKey is None:
+            modelKey = AsrService.getModelKey(snapshot=snapshot)
+        decodeParams = AsrService.getDecodeParams(decodeOptions, snapshot)
+
+        # 超过 30s 的片段无法放入一个窗口，回退到单段识别；已缓存的片段直接返回
+        batchIndexList = []
+        cacheKeyMap = {}
+        for index, audioData in enumerate(audioList):
+            duration = len(audioData) / AsrService.sampleRate
+            if duration > AsrService.maxBatchSegmentSec:
+                resultList[index] = AsrService.transcribe(audioData, modelKey=modelKey, priority=priority, decodeOptions=decodeOptions)
+            elif duration > 0:
+                cacheKeyMap[index] = AsrService.getCacheKey(audioData, "batch", priority, False, modelKey, decodeParams, snapshot)
+                cachedSegments = AsrService.readCache(cacheKeyMap[index])
+                if cachedSegments is not None:
+                    resultList[index] = cachedSegments
+                else:
+                    batchIndexList.append(index)
+
+        if not batchIndexList:
+            return resultList
+
+        InferScheduler.acquire(priority)
+        try:
+            return AsrService.runTranscribeBatch(audioList, modelKey, resultList, batchIndexList, cacheKeyMap, decodeParams, snapshot)
+        finally:
+            InferScheduler.release()
+
+    @staticmethod
+    def runTranscribeBatch(audioList, modelKey, resultList, batchIndexList, cacheKeyMap, decodeParams, snapshot):
+        instance = AsrService.acquireModel(modelKey, snapshot)
+        if instance is None:
+            return resultList
+
+        try:
+            if instance["pipeline"] is None:
+                from faster_whisper import BatchedInferencePipeline
+                instance["pipeline"] = BatchedInferencePipeline(model=instance["model"])
+
+            # 拼接音频，记录每段在拼接后音频中的起止时间
+            offsetList = []
+            clipList = []
+            position = 0
+            for index in batchIndexList:
+                length = len(audioList[index])
+                start = position / AsrService.sampleRate
+                end = (position + length) / AsrService.sampleRate
+                offsetList.append(start)
+                clipList.append({"start": start, "end": end})
+                position += length
+            fullData = np.concatenate([audioList[index] for index in batchIndexList]).astype(np.float32)
+
+            # 片段已由上游按静音切分，clip_timestamps 代替模型内部 VAD；各片段独立解码，不使用前文条件
+            startTime = MetricTool.startTimer()
+            segments, info = instance["pipeline"].transcribe(
+                fullData,
+                beam_size=decodeParams["beamSize"],
+                language=decodeParams["language"],
+                initial_prompt=decodeParams["initialPrompt"],
+                vad_filter=False,
+                clip_timestamps=clipList,
+                batch_size=decodeParams["batchSize"]
+            )
+
+            for segment in segments:
+                # 按起始时间定位所属片段，换算为片段内相对时间
+                slot = max(0, bisect.bisect_right(offsetList, segment.start + 1e-3) - 1)
+                offset = offsetList[slot]
+                resultList[batchIndexList[slot]].append({
+                    "text": segment.text,
+                    "start": segment.start - offset,
+                    "end": min(segment.end, clipList[slot]["end"]) - offset
+                })
+            MetricTool.addCounter("inferSeconds", MetricTool.stopTimer("inferBatch", startTime))
+
+            for index in batchIndexList:
+                AsrService.writeCache(cacheKeyMap[index], resultList[index])
+            return resultList
+        except Exception as e:
+            LogTool.error("Batch transcription error", e)
+            MetricTool.addCounter("errors")
+            return resultList
+        finally:
+            AsrService.releaseModel(modelKey, instance)
+
+    @staticmethod
+    def getDecodeParams(decodeOptions=None, snapshot=None):
+        """
+        本次识别的解码参数: asrParams 配置，decodeOptions 中的项覆盖配置 (QualityLadder 降档时使用)
+        snapshot: 本次请求已取得的配置快照，None 表示读取当前快照
+        """
+        snapshot = snapshot or ConfigTool.snapshot()
+        decodeParams = {
+            "beamSize": snapshot.beamSize,
+            "language": snapshot.language,
+            "initialPrompt": snapshot.initialPrompt,
+            "conditionOnPreviousText": True,
+            "vadMinSilenceDurationMs": snapshot.vadMinSilenceDurationMs,
+            "batchSize": snapshot.batchSize
+        }
+        if decodeOptions:
+            decodeParams.update(decodeOptions)
+        return decodeParams
+
+    @staticmethod
+    def getCacheKey(audioData, mode, priority, vadFilter=False, modelKey=None, decodeParams=None, snapshot=None):
+        """
+        缓存 key: 音频内容 + 所有影响识别输出的参数，缓存关闭或不需要缓存时返回 None
+        mode: single (transcribe) / batch (transcribeBatch)，两种解码方式结果不同，分开缓存
+        priority: 只缓存离线文件 (batch) 的识别；实时会话的音频不会重复出现，缓存只会挤掉有用条目并在推理路径上增加哈希与写盘
+        vadFilter: 本次识别实际是否启用模型内置 VAD (批量识别固定关闭)
+        decodeParams: 本次识别实际使用的解码参数 (getDecodeParams)，None 表示按配置
+        """
+        snapshot = snapshot or ConfigTool.snapshot()
+        if priority != "batch" or not snapshot.cacheEnabled:
+            return None
+
+        modelSize, computeType, device = modelKey or AsrService.getModelKey(snapshot=snapshot)
+        if decodeParams is None:
+            decodeParams = AsrService.getDecodeParams(snapshot=snapshot)
+        settingDict = {
+            "mode": mode,
+            "modelSize": modelSize,
+            "computeType": computeType,
+            "beamSize": decodeParams["beamSize"],
+            "language": decodeParams["language"],
+            "initialPrompt": decodeParams["initialPrompt"],
+            "conditionOnPreviousText": decodeParams["conditionOnPreviousText"],
+            "vadFilter": vadFilter,
+            "vadMinSilenceDurationMs": decodeParams["vadMinSilenceDurationMs"]
+        }
+        return TranscriptCacheDao.makeKey(audioData, settingDict)
+
+    @staticmethod
+    def readCache(cacheKey):
+        if cacheKey is None:
+            return None
+        try:
+            segments = TranscriptCacheDao.get(cacheKey)
+        except Exception as e:
+            # 缓存损坏不影响识别，按未命中处理
+            LogTool.error("Transcript cache read failed", e)
+            segments = None
+
+        if segments is None:
+            AsrService._cacheMiss += 1
+        else:
+            AsrService._cacheHit += 1
+        return segments
+
+    @staticmethod
+    def writeCache(cacheKey, segments):
+        if cacheKey is None:
+            return
+        try:
+            TranscriptCacheDao.save(cacheKey, segments)
+        except Exception as e:
+            LogTool.error("Transcript cache write failed", e)
+
+    @staticmethod
+    def getCacheStats():
+        """
+        返回缓存命中统计 (本进程): {'hit': int, 'miss': int}
+        """
+        return {"hit": AsrService._cacheHit, "miss": AsrService._cacheMiss}
@@ -1,90 +1,96 @@
 import os
-import glob
+import sys
 import csv
+import json
+import hashlib
+import multiprocessing
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from utils.LogTool import LogTool
 from utils.FileTool import FileTool
+from utils.WriterTool import WriterTool
+from utils.ConfigTool import ConfigTool
+from utils.MetricTool import MetricTool
+from utils.AudioTool import AudioTool
+from core.AsrService import AsrService
 from core.StreamProcessor import StreamProcessor
+from core.PackProcessor import PackProcessor
+from core.ChannelProcessor import ChannelProcessor
+from dao.TranscriptStoreDao import TranscriptStoreDao
 
 class BatchProcessor:
+    fieldNames = ["filename", "full_text", "status"]
+
     @staticmethod
-    def run(inputDir, outputBaseDir="app/out"):
+    def run(inputDir, outputBaseDir="app/out", resumeDir=None):
         """
         批量处理指定目录下的所有音频文件
-        :param inputDir: 输入包含 .wav 的目录
+        :param inputDir: 输入包含音频文件 (wav/flac/ogg 等) 的目录
         :param outputBaseDir: 输出根目录
+        :param resumeDir: 续跑已有的批处理目录 (batch_xxx)，已完成的文件直接跳过
         """
         # 1. 扫描文件
-        searchPath = os.path.join(inputDir, "*.wav")
-        audioFiles = glob.glob(searchPath)
-        
+        audioFiles = AudioTool.listAudioFiles(inputDir)
+
         if not audioFiles:
-            LogTool.info(f"No .wav files found in {inputDir}.")
+            LogTool.info(f"No audio files found in {inputDir}.")
             return None
 
         LogTool.info(f"BatchProcessor started. Found {len(audioFiles)} files in {inputDir}")
 
-        # 2. 创建本次批处理的唯一输出目录 (batch_时间戳)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        batchOutDir = os.path.join(outputBaseDir, f"batch_{timestamp}")
+        # 2. 创建本次批处理的唯一输出目录 (batch_时间戳)，续跑时沿用原目录
+        if resumeDir:
+            batchOutDir = resumeDir
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            batchOutDir = os.path.join(outputBaseDir, f"batch_{timestamp}")
         detailsOutDir = os.path.join(batchOutDir, "details")
-        
+        manifestFile = os.path.join(batchOutDir, "manifest.jsonl")
+        csvFile = os.path.join(batchOutDir, "summary.csv")
+
         # 确保目录存在
         FileTool.ensureDir(os.path.join(detailsOutDir, "placeholder"))
 
         LogTool.info(f"Batch output directory: {batchOutDir}")
 
-        # 3. 准备 CSV 汇总数据
-        summaryData = []
-
-        # 4. 循环处理每个文件
-        for filePath in audioFiles:
-            fileName = os.path.basename(filePath)
-            LogTool.info(f"Batch processing file: {fileName}")
-            
-            # 详情 JSONL 路径 (放入子文件夹 details)
-            detailJsonl = os.path.join(detailsOutDir, f"{fileName}.jsonl")
-            
-            # 用于汇总 CSV 的全文缓存
-            fullTextParts = []
-
-            def batchCallback(data):
-                # A. 写入 JSONL 详情
-                FileTool.appendJsonLine(detailJsonl, data)
-                
-                # B. 收集 Final 文本用于 CSV 汇总
-                if data['type'] == 'final':
-                    fullTextParts.append(data['text'])
-
-            try:
-                # 调用核心流式处理器 (模拟流式读取)
-                StreamProcessor.run(filePath, batchCallback)
-                
-                # 记录汇总结果
-                fullText = "".join(fullTextParts).strip()
-                summaryData.append({
-                    "filename": fileName,
-                    "full_text": fullText,
-                    "status": "success"
-                })
-            except Exception as e:
-                LogTool.error(f"Failed to process {fileName}", e)
-                summaryData.append({
-                    "filename": fileName, 
-                    "full_text": f"Error: {str(e)}",
-                    "status": "error"
-                })
-
-        # 5. 生成 CSV 汇总报告 (带 BOM 确保 Excel 中文不乱码)
-        csvFile = os.path.join(batchOutDir, "summary.csv")
+        # 3. 续跑: 跳过清单中已成功且文件未变化的文件
+        todoFiles = audioFiles
+        if resumeDir:
+            doneMap = BatchProcessor.loadManifest(manifestFile)
+            todoFiles = [filePath for filePath in audioFiles if not BatchProcessor.isDone(filePath, doneMap)]
+            LogTool.info(f"Resume batch: {len(audioFiles) - len(todoFiles)} files done, {len(todoFiles)} files left")
+
+        # 4. 处理文件 (单进程 或 多进程 Worker 池)，每完成一个文件立即追加到清单与 CSV
+        workerCount = BatchProcessor.getWorkerCount(max(1, len(todoFiles)))
+        try:
+            csvExists = os.path.exists(csvFile)
+            with open(csvFile, 'a', newline='', encoding='utf-8-sig') as f:
+                writer = csv.DictWriter(f, fieldnames=BatchProcessor.fieldNames)
+                if not csvExists:
+                    writer.writeheader()
+
+                def onFileDone(filePath, summaryRow):
+                    BatchProcessor.recordResult(manifestFile, filePath, summaryRow)
+                    writer.writerow(summaryRow)
+                    f.flush()
+
+                if workerCount > 1:
+                    BatchProcessor.runPool(todoFiles, detailsOutDir, workerCount, onFileDone)
+                else:
+                    for filePath in todoFiles:
+                        onFileDone(filePath, BatchProcessor.processFile(filePath, detailsOutDir))
+        except Exception as e:
+            LogTool.error("Batch processing aborted", e)
+            return None
+
+        # 5. 由清单重建 CSV 汇总报告 (带 BOM 确保 Excel 中文不乱码，同一文件只保留最后一次结果)
         try:
-            with open(csvFile, 'w', newline='', encoding='utf-8-sig') as f:
-                fieldnames = ["filename", "full_text", "status"]
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(summaryData)
-            
+            BatchProcessor.rebuildSummary(manifestFile, csvFile)
+
             LogTool.info(f"Batch processing complete. Report: {csvFile}")
+            if workerCount <= 1 and ConfigTool.get("cache.enabled", False):
+                cacheStats = AsrService.getCacheStats()
+                LogTool.info(f"Transcript cache total: hit={cacheStats['hit']}, miss={cacheStats['miss']}")
             print(f"\n[Batch Complete]")
             print(f"Directory: {batchOutDir}")
             print(f"Summary CSV: summary.csv")
@@ -92,3 +98,260 @@ class BatchProcessor:
         except Exception as e:
             LogTool.error("Failed to write summary CSV", e)
             return None
+
+    @staticmethod
+    def processFile(filePath, detailsOutDir, fileKey=None):
+        """
+        处理单个文件: 写入 details/<文件名>.jsonl，返回 CSV 汇总行
+        :param fileKey: 汇总行 filename 与识别结果库中使用的文件标识，默认为文件名 (监视模式传入相对路径，子目录下的同名文件互不覆盖)
+        """
+        fileName = os.path.basename(filePath)
+        fileKey = fileKey or fileName
+        LogTool.info(f"Batch processing file: {fileName}")
+
+        # 详情 JSONL 路径 (放入子文件夹 details)，续跑时先清除上次未完成的残留
+        detailJsonl = os.path.join(detailsOutDir, f"{fileName}.jsonl")
+        if os.path.exists(detailJsonl):
+            os.remove(detailJsonl)
+
+        # 用于汇总 CSV 的全文缓存，开启识别结果库时同时保留 Final 结果
+        fullTextParts = []
+        storeEnabled = ConfigTool.get("store.enabled", False)
+        storeList = []
+        cacheStats = AsrService.getCacheStats()
+
+        def batchCallback(data):
+            # A. 写入 JSONL 详情 (缓冲写入，不阻塞识别线程)
+            WriterTool.appendJsonLine(detailJsonl, data)
+
+            # B. 收集 Final 文本用于 CSV 汇总
+            if data['type'] == 'final':
+                fullTextParts.append(data['text'])
+                if storeEnabled:
+                    storeList.append(data)
+
+        try:
+            segmentBatchSize = ConfigTool.get("batch.segmentBatchSize", 1)
+            if ConfigTool.get("batch.perChannel", False) and AudioTool.getChannelCount(filePath) > 1:
+                # 多声道 (如通话录音) 各声道分别识别，结果带 channel 字段按时间归并
+                ChannelProcessor.run(filePath, batchCallback, batchSize=segmentBatchSize, priority="batch")
+            elif ConfigTool.get("batch.mode", "stream") == "pack":
+                # 先规划语音区间，再装入接近 30 秒的窗口识别，模型调用次数更少
+                PackProcessor.run(filePath, batchCallback, batchSize=segmentBatchSize, priority="batch")
+            else:
+                # 调用核心流式处理器 (模拟流式读取)，离线场景下切分出的音频段攒批识别
+                StreamProcessor.run(filePath, batchCallback, batchSize=segmentBatchSize, priority="batch")
+            # 详情写完并关闭后才算该文件完成 (清单依赖这一点)
+            if not WriterTool.closeFile(detailJsonl):
+                raise IOError(f"Failed to write details: {detailJsonl}")
+            # 一个文件的结果在一个事务中写入识别结果库，入库失败不影响文件本身的识别结果
+            if storeEnabled:
+                try:
+                    TranscriptStoreDao.ingest(fileKey, storeList)
+                except Exception as e:
+                    LogTool.error(f"Failed to store results: {fileKey}", e)
+
+            # 记录汇总结果
+            fullText = "".join(fullTextParts).strip()
+            newStats = AsrService.getCacheStats()
+            if newStats["hit"] + newStats["miss"] > cacheStats["hit"] + cacheStats["miss"]:
+                LogTool.info(f"Transcript cache for {fileName}: hit={newStats['hit'] - cacheStats['hit']}, miss={newStats['miss'] - cacheStats['miss']}")
+            return {
+                "filename": fileKey,
+                "full_text": fullText,
+                "status": "success"
+            }
+        except Exception as e:
+            LogTool.error(f"Failed to process {fileName}", e)
+            WriterTool.closeFile(detailJsonl)
+            return {
+                "filename": fileKey,
+                "full_text": f"Error: {str(e)}",
+                "status": "error"
+            }
+
+    @staticmethod
+    def getWorkerCount(fileCount):
+        """
+        读取 batch.workerCount 配置，0 表示按 CPU 核数自动计算
+        """
+        workerCount = ConfigTool.get("batch.workerCount", 1)
+        if workerCount <= 0:
+            cpuCount = os.cpu_count() or 1
+            threadsPerWorker = ConfigTool.get("batch.threadsPerWorker", 0)
+            workerCount = cpuCount // threadsPerWorker if threadsPerWorker > 0 else cpuCount
+        return max(1, min(workerCount, fileCount))
+
+    @staticmethod
+    def usesWorkerPool():
+        """
+        配置的 Worker 数是否大于 1 (文件数足够时由 spawn 进程池识别，各 Worker 加载自己的模型，主进程不需要模型)
+        """
+        return BatchProcessor.getWorkerCount(sys.maxsize) > 1
+
+    @staticmethod
+    def getThreadsPerWorker(workerCount):
+        """
+        读取 batch.threadsPerWorker 配置，0 表示把 CPU 核数平均分给各 Worker，避免超额订阅
+        """
+        threadsPerWorker = ConfigTool.get("batch.threadsPerWorker", 0)
+        if threadsPerWorker <= 0:
+            cpuCount = os.cpu_count() or 1
+            threadsPerWorker = max(1, cpuCount // workerCount)
+        return threadsPerWorker
+
+    @staticmethod
+    def runPool(audioFiles, detailsOutDir, workerCount, onFileDone):
+        """
+        多进程模式: 每个 Worker 进程加载独立的 WhisperModel
+        文件按大小从大到小调度，减少尾部等待；每完成一个文件调用 onFileDone(filePath, 汇总行)
+        """
+        threadsPerWorker = BatchProcessor.getThreadsPerWorker(workerCount)
+        LogTool.info(f"Batch worker pool: {workerCount} workers x {threadsPerWorker} threads")
+
+        orderedFiles = sorted(audioFiles, key=os.path.getsize, reverse=True)
+
+        # 使用 spawn 启动 Worker，避免 fork 继承主进程已加载模型的推理线程
+        with ProcessPoolExecutor(
+            max_workers=workerCount,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=BatchProcessor.initWorker,
+            initargs=(ConfigTool._config, threadsPerWorker, LogTool.getWorkerQueue())
+        ) as pool:
+            futureMap = {
+                pool.submit(BatchProcessor.processFile, filePath, detailsOutDir): filePath
+                for filePath in orderedFiles
+            }
+            for future in as_completed(futureMap):
+                filePath = futureMap[future]
+                try:
+                    summaryRow = future.result()
+                except Exception as e:
+                    # Worker 进程异常退出等情况
+                    LogTool.error(f"Worker failed on {filePath}", e)
+                    summaryRow = {
+                        "filename": os.path.basename(filePath),
+                        "full_text": f"Error: {str(e)}",
+                        "status": "error"
+                    }
+                onFileDone(filePath, summaryRow)
+
+    @staticmethod
+    def initWorker(configData, cpuThreads, logQueue):
+        """
+        Worker 进程初始化: 日志交给主进程写出 (LogTool.getWorkerQueue)，同步主进程配置并加载本进程的模型
+        """
+        LogTool.enableWorker(logQueue, configData.get("log", {}).get("rateLimit", {}))
+        ConfigTool._config.update(configData)
+        ConfigTool.refresh()
+        MetricTool.setup()
+        if not AsrService.initModel(cpuThreads=cpuThreads):
+            raise RuntimeError("Worker model init failed")
+
+    @staticmethod
+    def getFileSign(filePath):
+        """
+        文件指纹: 大小 + 修改时间，batch.resumeCheck 为 hash 时再加内容哈希
+        """
+        stat = os.stat(filePath)
+        fileSign = {"size": stat.st_size, "mtime": stat.st_mtime}
+        if ConfigTool.get("batch.resumeCheck", "stat") == "hash":
+            hasher = hashlib.blake2b(digest_size=20)
+            with open(filePath, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    hasher.update(block)
+            fileSign["hash"] = hasher.hexdigest()
+        return fileSign
+
+    @staticmethod
+    def recordResult(manifestFile, filePath, summaryRow):
+        """
+        追加一条文件完成记录到清单 manifest.jsonl
+        """
+        record = dict(summaryRow)
+        record.update(BatchProcessor.getFileSign(filePath))
+        record["finishTime"] = datetime.now().isoformat()
+        if not FileTool.appendJsonLine(manifestFile, record):
+            raise IOError(f"Failed to write manifest: {manifestFile}")
+
+    @staticmethod
+    def loadManifest(manifestFile):
+        """
+        读取清单，返回 {文件名: 文件指纹} (只含最后一次处理成功的文件)
+        """
+        doneMap = {}
+        if not os.path.exists(manifestFile):
+            return doneMap
+        BatchProcessor.trimPartialLine(manifestFile)
+        with open(manifestFile, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 进程被杀时可能留下半行
+                    continue
+                if record.get("status") == "success":
+                    doneMap[record["filename"]] = {key: record[key] for key in ("size", "mtime", "hash") if key in record}
+                else:
+                    doneMap.pop(record["filename"], None)
+        return doneMap
+
+    @staticmethod
+    def trimPartialLine(manifestFile):
+        """
+        进程被杀时清单末尾可能留下半行，截掉它，避免后续追加的记录与其粘连
+        """
+        with open(manifestFile, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            fileSize = f.tell()
+            if fileSize == 0:
+                return
+            f.seek(fileSize - 1)
+            if f.read(1) == b'\n':
+                return
+            # 从尾部向前找最后一个换行符
+            position = fileSize
+            while position > 0:
+                step = min(4096, position)
+                position -= step
+                f.seek(position)
+                block = f.read(step)
+                newlineIndex = block.rfind(b'\n')
+                if newlineIndex >= 0:
+                    f.truncate(position + newlineIndex + 1)
+                    return
+            f.truncate(0)
+
+    @staticmethod
+    def isDone(filePath, doneMap):
+        fileSign = doneMap.get(os.path.basename(filePath))
+        if fileSign is None:
+            return False
+        currentSign = BatchProcessor.getFileSign(filePath)
+        return all(currentSign.get(key) == value for key, value in fileSign.items())
+
+    @staticmethod
+    def rebuildSummary(manifestFile, csvFile):
+        """
+        由清单流式重建 summary.csv: 同一文件多次记录时只保留最后一次，内存只保存行号
+        """
+        lastLineMap = {}
+        with open(manifestFile, 'r', encoding='utf-8') as f:
+            for lineNo, line in enumerate(f):
+                try:
+                    lastLineMap[json.loads(line)["filename"]] = lineNo
+                except ValueError:
+                    continue
+
+        tempFile = csvFile + ".tmp"
+        with open(manifestFile, 'r', encoding='utf-8') as src, open(tempFile, 'w', newline='', encoding='utf-8-sig') as dst:
+            writer = csv.DictWriter(dst, fieldnames=BatchProcessor.fieldNames, extrasaction='ignore')
+            writer.writeheader()
+            for lineNo, line in enumerate(src):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if lastLineMap.get(record["filename"]) == lineNo:
+                    writer.writerow(record)
+        os.replace(tempFile, csvFile)
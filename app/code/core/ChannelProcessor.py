@@ -0,0 +1,106 @@
+import math
+import heapq
+import queue
+import threading
+from utils.LogTool import LogTool
+from utils.AudioTool import AudioTool
+from utils.ConfigTool import ConfigTool
+from core.StreamSession import StreamSession
+from core.StreamProcessor import StreamProcessor
+
+class ChannelProcessor:
+    """
+    多声道文件的分声道识别 (例如双声道通话录音: 坐席 / 客户各占一个声道)
+    1. 一遍读取，不下混，各声道的音频块分别放入有界队列
+    2. 每个声道一个线程、一个 StreamSession，独立做 VAD 切分与识别 (并发度受模型池与 InferScheduler 槽位限制)
+    3. 各声道结果带 channel 字段 (从 0 开始)，按水位线归并: 所有声道都不会再产生更早的结果时才按起始时间输出
+    结果按 audioTimeStart 顺序在识别线程中回调 (同一时刻只有一个回调在执行)
+    """
+
+    @staticmethod
+    def run(filePath, onResultCallback, chunkSize=8000, silenceThreshold=0.005, silenceCountTrigger=3, batchSize=1, modelKey=None, priority="batch"):
+        LogTool.info(f"ChannelProcessor started for: {filePath}")
+        channelCount = AudioTool.getChannelCount(filePath)
+        if channelCount <= 0:
+            return
+        sampleRate = AudioTool.targetRate
+        queueSize = max(1, ConfigTool.get("stream.pipelineQueueSize", 16))
+        queueList = [queue.Queue(maxsize=queueSize) for _ in range(channelCount)]
+        stopEvent = threading.Event()
+        errorList = []
+        merger = {
+            "lock": threading.Lock(),
+            "heap": [],
+            "seq": 0,
+            "watermarkList": [0.0] * channelCount,
+            "onResultCallback": onResultCallback
+        }
+
+        def worker(channel):
+            try:
+                session = StreamSession(
+                    lambda outData: ChannelProcessor.addResult(merger, channel, outData),
+                    chunkSize=chunkSize,
+                    silenceThreshold=silenceThreshold,
+                    silenceCountTrigger=silenceCountTrigger,
+                    batchSize=batchSize,
+                    sampleRate=sampleRate,
+                    modelKey=modelKey,
+                    priority=priority
+                )
+                while True:
+                    isOk, chunk = StreamProcessor.getItem(queueList[channel], stopEvent)
+                    if not isOk:
+                        return
+                    if chunk is None:
+                        break
+                    session.feed(chunk)
+                    ChannelProcessor.advance(merger, channel, session.getWatermark())
+                session.finish()
+                ChannelProcessor.advance(merger, channel, math.inf)
+            except Exception as e:
+                LogTool.error(f"Channel {channel} failed", e)
+                errorList.append(e)
+                stopEvent.set()
+
+        threadList = [threading.Thread(target=worker, args=(channel,), name=f"channel{channel}", daemon=True) for channel in range(channelCount)]
+        for thread in threadList:
+            thread.start()
+
+        try:
+            for chunk in AudioTool.readFileGenerator(filePath, chunkSize=chunkSize, targetRate=sampleRate, mixDown=False):
+                for channel in range(channelCount):
+                    # 读取端复用输出缓冲区，各声道拷贝为连续数组后入队
+                    if not StreamProcessor.putItem(queueList[channel], chunk[:, channel].copy(), stopEvent):
+                        break
+                if stopEvent.is_set():
+                    break
+            for channel in range(channelCount):
+                StreamProcessor.putItem(queueList[channel], None, stopEvent)
+        finally:
+            for thread in threadList:
+                thread.join()
+        if errorList:
+            raise errorList[0]
+
+        LogTool.info(f"ChannelProcessor finished ({channelCount} channels).")
+
+    @staticmethod
+    def addResult(merger, channel, outData):
+        outData["channel"] = channel
+        with merger["lock"]:
+            heapq.heappush(merger["heap"], (outData["audioTimeStart"], channel, merger["seq"], outData))
+            merger["seq"] += 1
+
+    @staticmethod
+    def advance(merger, channel, watermark):
+        """
+        更新声道水位线，并按时间顺序输出所有声道都已越过的结果
+        """
+        with merger["lock"]:
+            merger["watermarkList"][channel] = watermark
+            limit = min(merger["watermarkList"])
+            heap = merger["heap"]
+            while heap and heap[0][0] <= limit:
+                outData = heapq.heappop(heap)[3]
+                merger["onResultCallback"](outData)
@@ -0,0 +1,180 @@
+import os
+import json
+import socket
+import threading
+from utils.LogTool import LogTool
+from utils.ConfigTool import ConfigTool
+from utils.FileTool import FileTool
+
+class DaemonServer:
+    """
+    常驻识别服务 (main.py --daemon): 模型只加载一次，通过本地 Unix Socket 接收任务
+    main.py -i 检测到服务在运行时只作为轻量客户端提交任务，省去每次导入与加载模型的冷启动
+
+    协议 (JSON Lines，每行一个 JSON 对象):
+    - 客户端: {"type": "transcribe", "file": 绝对路径, "model": 模型规格 (可选)} 或 {"type": "ping"}
+    - 服务端: 每条识别结果 {"type": "result", "data": 结果 dict}，结束 {"type": "done"}，
+      失败 {"type": "error", "message": str}，ping 返回 {"type": "pong"}
+    """
+    _jobSemaphore = None
+
+    @staticmethod
+    def getSocketPath():
+        return ConfigTool.get("daemon.socketPath", "app/run/asrbrain.sock")
+
+    @staticmethod
+    def isSupported():
+        # Windows 的 Python 不支持 AF_UNIX
+        return hasattr(socket, "AF_UNIX")
+
+    @staticmethod
+    def run():
+        """
+        启动服务 (阻塞)，调用前模型应已加载
+        """
+        if not DaemonServer.isSupported():
+            LogTool.error("Daemon mode requires Unix domain sockets, which this platform does not support")
+            return
+
+        socketPath = DaemonServer.getSocketPath()
+        if os.path.exists(socketPath):
+            if DaemonServer.isRunning():
+                LogTool.error(f"Daemon already running on {socketPath}")
+                return
+            # 上次异常退出残留的 socket 文件
+            os.remove(socketPath)
+        FileTool.ensureDir(socketPath)
+
+        DaemonServer._jobSemaphore = threading.BoundedSemaphore(ConfigTool.get("daemon.maxJobs", 2))
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(socketPath)
+            # 只允许当前用户连接
+            os.chmod(socketPath, 0o600)
+            server.listen()
+            LogTool.info(f"Daemon listening on {socketPath}")
+            while True:
+                conn, address = server.accept()
+                threading.Thread(target=DaemonServer.handleClient, args=(conn,), name="daemonJob", daemon=True).start()
+        except KeyboardInterrupt:
+            LogTool.info("Daemon stopped.")
+        finally:
+            server.close()
+            if os.path.exists(socketPath):
+                os.remove(socketPath)
+
+    @staticmethod
+    def handleClient(conn):
+        """
+        处理一个客户端连接: 读取一行请求，识别过程中逐条回传结果
+        """
+        from core.StreamProcessor import StreamProcessor
+        from core.AsrService import AsrService
+
+        reader = conn.makefile('r', encoding='utf-8')
+        writer = conn.makefile('w', encoding='utf-8')
+
+        def sendLine(dataDict):
+            writer.write(json.dumps(dataDict, ensure_ascii=False) + "\n")
+            writer.flush()
+
+        try:
+            request = json.loads(reader.readline() or "{}")
+            if request.get("type") == "ping":
+                sendLine({"type": "pong"})
+                return
+            filePath = request.get("file")
+            if request.get("type") != "transcribe" or not filePath or not os.path.exists(filePath):
+                sendLine({"type": "error", "message": f"Invalid request or file not found: {filePath}"})
+                return
+            modelSize = request.get("model")
+            if modelSize and not AsrService.isAllowedModel(modelSize):
+                sendLine({"type": "error", "message": f"Model not allowed: {modelSize}"})
+                return
+
+            # 并发任务数受限，超出的连接排队等待
+            with DaemonServer._jobSemaphore:
+                LogTool.info(f"Daemon job started: {filePath}")
+                # 客户端断开时 sendLine 抛出异常，识别随之中止
+                StreamProcessor.run(
+                    filePath,
+                    lambda data: sendLine({"type": "result", "data": data}),
+                    chunkSize=ConfigTool.get("test.chunkSize", 8000),
+                    silenceThreshold=ConfigTool.get("test.silenceThreshold", 0.005),
+                    modelKey=AsrService.getModelKey(modelSize=modelSize)
+                )
+            sendLine({"type": "done"})
+        except (BrokenPipeError, ConnectionResetError):
+            LogTool.info("Daemon client disconnected")
+        except Exception as e:
+            LogTool.error("Daemon job failed", e)
+            try:
+                sendLine({"type": "error", "message": str(e)})
+            except OSError:
+                pass
+        finally:
+            for stream in (reader, writer, conn):
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+
+    @staticmethod
+    def connect():
+        """
+        连接常驻服务，服务未运行时返回 None
+        """
+        socketPath = DaemonServer.getSocketPath()
+        if not DaemonServer.isSupported() or not os.path.exists(socketPath):
+            return None
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(socketPath)
+            return client
+        except OSError:
+            client.close()
+            return None
+
+    @staticmethod
+    def isRunning():
+        client = DaemonServer.connect()
+        if client is None:
+            return False
+        try:
+            client.sendall(b'{"type": "ping"}\n')
+            return client.makefile('r', encoding='utf-8').readline().strip() != ""
+        except OSError:
+            return False
+        finally:
+            client.close()
+
+    @staticmethod
+    def submit(filePath, onResultCallback, modelSize=None):
+        """
+        客户端: 把文件提交给常驻服务并逐条回调结果，modelSize 为 None 时使用服务端默认模型
+        返回 False 表示服务未运行 (调用方应在本地识别)；服务端报错时记录日志并返回 True
+        """
+        client = DaemonServer.connect()
+        if client is None:
+            return False
+
+        try:
+            request = {"type": "transcribe", "file": os.path.abspath(filePath), "model": modelSize}
+            client.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode('utf-8'))
+            LogTool.info(f"Submitted to daemon: {filePath}")
+            for line in client.makefile('r', encoding='utf-8'):
+                message = json.loads(line)
+                if message["type"] == "result":
+                    onResultCallback(message["data"])
+                elif message["type"] == "done":
+                    return True
+                elif message["type"] == "error":
+                    LogTool.error(f"Daemon job failed: {message['message']}")
+                    return True
+            LogTool.error("Daemon closed the connection before the job finished")
+            return True
+        except OSError as e:
+            LogTool.error("Daemon connection failed", e)
+            return True
+        finally:
+            client.close()
@@ -0,0 +1,91 @@
+import threading
+from collections import deque
+from utils.ConfigTool import ConfigTool
+from utils.MetricTool import MetricTool
+
+class InferScheduler:
+    """
+    推理调度器 (位于 AsrService 模型推理之前，缓存命中的请求不经过调度)
+    - 两个优先级: live (实时会话，StreamServer) / batch (离线文件，BatchProcessor / PackProcessor)
+    - 推理槽位数默认等于模型池容量 (modelPool.instancesPerModel)，槽位空出时优先放行 live
+    - batch 保底份额: 两类都在排队时，每放行 scheduler.batchMinShare 对应数量的 live 后必放行一个 batch，batch 不会被饿死
+    - 同一优先级内先到先得
+    - 指标: 各优先级排队数 (schedQueueLive / schedQueueBatch) 与等待耗时 (waitLive / waitBatch)
+    调度只作用于当前进程内的请求: --server 配置 server.watchDirs 时，目录中的新文件 (batch) 与实时会话 (live) 在同一进程识别
+    """
+    priorityList = ("live", "batch")
+
+    _cond = threading.Condition()
+    _queueMap = {"live": deque(), "batch": deque()}
+    _running = 0
+    # batch 排队期间连续放行的 live 数
+    _liveStreak = 0
+
+    @staticmethod
+    def acquire(priority="live"):
+        """
+        排队等待一个推理槽位，用完必须调用 release
+        """
+        if priority not in InferScheduler.priorityList:
+            raise ValueError(f"Unknown priority: {priority}")
+        metricName = priority.capitalize()
+        ticket = {"priority": priority, "granted": False}
+        startTime = MetricTool.startTimer()
+        with InferScheduler._cond:
+            InferScheduler._queueMap[priority].append(ticket)
+            MetricTool.addGauge(f"schedQueue{metricName}", 1)
+            InferScheduler.dispatch()
+            while not ticket["granted"]:
+                InferScheduler._cond.wait()
+        MetricTool.stopTimer(f"wait{metricName}", startTime)
+
+    @staticmethod
+    def release():
+        with InferScheduler._cond:
+            InferScheduler._running -= 1
+            InferScheduler.dispatch()
+
+    @staticmethod
+    def dispatch():
+        """
+        按优先级把空闲槽位分配给排队的请求 (调用方已持有 _cond)
+        """
+        # 槽位数与 batch 保底份额取自配置快照 (ConfigSnapshot.schedulerSlots / maxLiveStreak)
+        snapshot = ConfigTool.snapshot()
+        granted = False
+        while InferScheduler._running < snapshot.schedulerSlots:
+            priority = InferScheduler.choosePriority(snapshot.maxLiveStreak)
+            if priority is None:
+                break
+            ticket = InferScheduler._queueMap[priority].popleft()
+            ticket["granted"] = True
+            InferScheduler._running += 1
+            MetricTool.addGauge(f"schedQueue{priority.capitalize()}", -1)
+            granted = True
+        if granted:
+            InferScheduler._cond.notify_all()
+
+    @staticmethod
+    def choosePriority(maxStreak):
+        """
+        maxStreak: 两类都在排队时最多连续放行的 live 数，None 表示不限制
+        """
+        liveQueue = InferScheduler._queueMap["live"]
+        batchQueue = InferScheduler._queueMap["batch"]
+        if not batchQueue:
+            InferScheduler._liveStreak = 0
+            return "live" if liveQueue else None
+        if not liveQueue:
+            InferScheduler._liveStreak = 0
+            return "batch"
+
+        if maxStreak is not None and InferScheduler._liveStreak >= maxStreak:
+            InferScheduler._liveStreak = 0
+            return "batch"
+        InferScheduler._liveStreak += 1
+        return "live"
+
+    @staticmethod
+    def getQueueDepth():
+        with InferScheduler._cond:
+            return {priority: len(queue) for priority, queue in InferScheduler._queueMap.items()}
@@ -0,0 +1,170 @@
+import bisect
+import numpy as np
+from datetime import datetime
+from utils.LogTool import LogTool
+from utils.AudioTool import AudioTool
+from utils.ConfigTool import ConfigTool
+from utils.MetricTool import MetricTool
+from utils.VadEngine import VadEngine
+from core.AsrService import AsrService
+
+class PackProcessor:
+    """
+    离线文件的语音区间打包识别 (batch.mode = pack)
+    Whisper 编码器每次固定处理 30 秒，逐段识别 1~3 秒的短句时大部分算力花在补零上，因此:
+    1. 规划: 先流式读一遍整个文件，用帧级 VadEngine 得到全部语音区间 (前后各留 vad.speechPadMs)
+    2. 打包: 相邻区间依次装入不超过 pack.windowSec 的窗口，区间之间插入 pack.gapSec 的静音
+    3. 识别: 再流式读一遍，每凑齐一个窗口识别一次，片段时间映射回原文件的绝对时间
+    输出与 StreamProcessor 相同的结果 dict (均为 final)
+    """
+
+    @staticmethod
+    def run(filePath, onResultCallback, chunkSize=8000, silenceThreshold=0.005, batchSize=1, priority="batch"):
+        """
+        batchSize: 大于 1 时窗口攒够 batchSize 个后批量识别
+        priority: 推理调度优先级，离线文件默认 batch (InferScheduler)
+        """
+        LogTool.info(f"PackProcessor started for: {filePath}")
+        sampleRate = AudioTool.targetRate
+
+        regionList, totalSamples = PackProcessor.planRegions(filePath, chunkSize, silenceThreshold, sampleRate)
+        windowList = PackProcessor.packWindows(
+            regionList,
+            int(ConfigTool.get("pack.windowSec", 29) * sampleRate),
+            int(ConfigTool.get("pack.gapSec", 0.3) * sampleRate)
+        )
+        speechSec = sum(end - start for start, end in regionList) / sampleRate
+        LogTool.info(f"Planned {len(regionList)} speech regions ({speechSec:.1f}s) into {len(windowList)} windows")
+
+        pendingList = []
+        windowIndex = 0
+        windowData = PackProcessor.newWindowData(windowList, windowIndex)
+        position = 0
+        for chunk in AudioTool.readFileGenerator(filePath, chunkSize=chunkSize, targetRate=sampleRate):
+            chunkEnd = position + len(chunk)
+            # 把本块中落在当前窗口各区间内的音频拷入窗口，窗口的最后一个区间读完后即可识别
+            while windowIndex < len(windowList):
+                window = windowList[windowIndex]
+                for srcStart, srcEnd, dstOffset in window["pieces"]:
+                    low = max(srcStart, position)
+                    high = min(srcEnd, chunkEnd)
+                    if low < high:
+                        windowData[dstOffset + low - srcStart:dstOffset + high - srcStart] = chunk[low - position:high - position]
+                if window["end"] > chunkEnd:
+                    break
+                pendingList.append((window, windowData))
+                if len(pendingList) >= batchSize:
+                    PackProcessor.flushWindows(pendingList, onResultCallback, sampleRate, priority)
+                    pendingList = []
+                windowIndex += 1
+                windowData = PackProcessor.newWindowData(windowList, windowIndex)
+            position = chunkEnd
+
+        # 文件实际长度比规划时短 (读取出错) 时，剩余窗口按已读到的内容识别
+        while windowIndex < len(windowList):
+            pendingList.append((windowList[windowIndex], windowData))
+            windowIndex += 1
+            windowData = PackProcessor.newWindowData(windowList, windowIndex)
+        PackProcessor.flushWindows(pendingList, onResultCallback, sampleRate, priority)
+
+        LogTool.info("PackProcessor finished.")
+
+    @staticmethod
+    def planRegions(filePath, chunkSize, silenceThreshold, sampleRate):
+        """
+        第一遍读取: 返回 (语音区间列表 [(起始采样点, 结束采样点), ...], 总采样点数)，区间已加前后余量并合并重叠
+        """
+        vadEngine = VadEngine.create(sampleRate=sampleRate, minRms=silenceThreshold)
+        flagList = []
+        totalSamples = 0
+        for chunk in AudioTool.readFileGenerator(filePath, chunkSize=chunkSize, targetRate=sampleRate):
+            flagList.append(vadEngine.process(chunk))
+            totalSamples += len(chunk)
+        if not flagList:
+            return [], totalSamples
+
+        padSamples = int(ConfigTool.get("vad.speechPadMs", 200) * sampleRate / 1000)
+        regionList = []
+        for start, end in VadEngine.toRegions(np.concatenate(flagList), vadEngine.frameSize):
+            start = max(0, start - padSamples)
+            end = min(totalSamples, end + padSamples)
+            if regionList and start <= regionList[-1][1]:
+                regionList[-1] = (regionList[-1][0], end)
+            else:
+                regionList.append((start, end))
+        return regionList, totalSamples
+
+    @staticmethod
+    def packWindows(regionList, windowSamples, gapSamples):
+        """
+        把语音区间依次装入窗口: [{"pieces": [(源起点, 源终点, 窗口内偏移), ...], "length": 窗口长度, "end": 最后区间的源终点}, ...]
+        超过一个窗口的长区间按窗口长度等分
+        """
+        windowList = []
+        pieceList = []
+        length = 0
+        for start, end in regionList:
+            partCount = -(-(end - start) // windowSamples)
+            partSize = -(-(end - start) // partCount)
+            for partStart in range(start, end, partSize):
+                partEnd = min(end, partStart + partSize)
+                offset = length + gapSamples if pieceList else 0
+                if pieceList and offset + partEnd - partStart > windowSamples:
+                    windowList.append({"pieces": pieceList, "length": length, "end": pieceList[-1][1]})
+                    pieceList = []
+                    offset = 0
+                pieceList.append((partStart, partEnd, offset))
+                length = offset + partEnd - partStart
+        if pieceList:
+            windowList.append({"pieces": pieceList, "length": length, "end": pieceList[-1][1]})
+        return windowList
+
+    @staticmethod
+    def newWindowData(windowList, windowIndex):
+        if windowIndex >= len(windowList):
+            return None
+        return np.zeros(windowList[windowIndex]["length"], dtype=np.float32)
+
+    @staticmethod
+    def flushWindows(pendingList, onResultCallback, sampleRate, priority="batch"):
+        """
+        识别若干个窗口，并把片段时间换算为原文件绝对时间后回调
+        """
+        if not pendingList:
+            return
+        if len(pendingList) > 1:
+            resultList = AsrService.transcribeBatch([windowData for window, windowData in pendingList], priority=priority)
+        else:
+            # 窗口内已去掉静音，关闭模型内置 VAD
+            resultList = [AsrService.transcribe(pendingList[0][1], vadFilter=False, priority=priority)]
+
+        for (window, windowData), segments in zip(pendingList, resultList):
+            for seg in segments:
+                absStart = PackProcessor.mapTime(window["pieces"], seg['start'] * sampleRate, False) / sampleRate
+                absEnd = PackProcessor.mapTime(window["pieces"], seg['end'] * sampleRate, True) / sampleRate
+                outData = {
+                    "timestamp": datetime.now().isoformat(),
+                    "audioTimeStart": round(absStart, 2),
+                    "audioTimeEnd": round(max(absStart, absEnd), 2),
+                    "text": seg['text'],
+                    "type": "final"
+                }
+                startTime = MetricTool.startTimer()
+                onResultCallback(outData)
+                MetricTool.stopTimer("callback", startTime)
+                MetricTool.addCounter("segmentsOut")
+
+    @staticmethod
+    def mapTime(pieceList, windowPosition, isEnd):
+        """
+        窗口内采样点位置 -> 原文件采样点位置
+        落在插入的静音中时: 起点对齐到下一区间开头，终点对齐到上一区间结尾
+        """
+        offsetList = [offset for srcStart, srcEnd, offset in pieceList]
+        slot = max(0, bisect.bisect_right(offsetList, windowPosition) - 1)
+        srcStart, srcEnd, offset = pieceList[slot]
+        if windowPosition <= offset + srcEnd - srcStart:
+            return srcStart + max(0.0, windowPosition - offset)
+        if isEnd or slot + 1 >= len(pieceList):
+            return srcEnd
+        return pieceList[slot + 1][0]
@@ -0,0 +1,111 @@
+import time
+from utils.LogTool import LogTool
+from utils.ConfigTool import ConfigTool
+from utils.MetricTool import MetricTool
+from core.AsrService import AsrService
+
+class QualityLadder:
+    """
+    实时会话的负载自适应识别质量 (每路流一个实例)
+    - 每次识别后记录 实际耗时 / 音频时长 (RTF，含调度排队) 的滑动平均，以及会话积压的音频时长
+    - 跟不上 (RTF > quality.downRtf 或积压 > quality.maxBacklogSec) 时逐级降档:
+      full (配置的 beamSize) -> greedy (beamSize=1) -> shortContext (再把识别窗口缩短为 quality.shortWindowSec 并去掉提示语)
+      -> smallModel (再换 quality.fallbackModel)
+      实时会话的中间结果每次重新识别整个缓冲区，窗口越短单次识别的音频越少
+    - 余量恢复 (RTF < quality.upRtf 且积压不足一半) 时逐级升档
+    - 两次换档至少间隔 quality.minStepSec，换档后 RTF 重新统计
+    """
+    levelList = (
+        {"name": "full", "decodeOptions": None, "shortWindow": False, "smallModel": False},
+        {"name": "greedy", "decodeOptions": {"beamSize": 1}, "shortWindow": False, "smallModel": False},
+        {"name": "shortContext", "decodeOptions": {"beamSize": 1, "initialPrompt": "", "conditionOnPreviousText": False}, "shortWindow": True, "smallModel": False},
+        {"name": "smallModel", "decodeOptions": {"beamSize": 1, "initialPrompt": "", "conditionOnPreviousText": False}, "shortWindow": True, "smallModel": True}
+    )
+
+    def __init__(self, modelKey, downRtf=0.9, upRtf=0.5, maxBacklogSec=2.0, minStepSec=5.0, fallbackModel="tiny", smoothing=0.3, shortWindowSec=10.0):
+        self.baseModelKey = modelKey or AsrService.getModelKey()
+        self.shortWindowSec = shortWindowSec
+        self.downRtf = downRtf
+        self.upRtf = upRtf
+        self.maxBacklogSec = maxBacklogSec
+        self.minStepSec = minStepSec
+        self.smoothing = smoothing
+
+        # 只有备用模型比当前模型小时才启用最后一档
+        modelSize, computeType, device = self.baseModelKey
+        memoryMap = AsrService.modelMemoryMb
+        self.smallModelKey = None
+        if fallbackModel and memoryMap.get(fallbackModel, 0) < memoryMap.get(modelSize, 0):
+            self.smallModelKey = (fallbackModel, computeType, device)
+        self.maxLevel = len(QualityLadder.levelList) - (1 if self.smallModelKey is None else 0) - 1
+
+        self.level = 0
+        self.rtf = None
+        self.lastStepTime = None
+
+    @staticmethod
+    def create(modelKey=None):
+        """
+        按 quality.* 配置创建实例，未启用时返回 None
+        """
+        if not ConfigTool.get("quality.enabled", False):
+            return None
+        return QualityLadder(
+            modelKey,
+            downRtf=ConfigTool.get("quality.downRtf", 0.9),
+            upRtf=ConfigTool.get("quality.upRtf", 0.5),
+            maxBacklogSec=ConfigTool.get("quality.maxBacklogSec", 2.0),
+            minStepSec=ConfigTool.get("quality.minStepSec", 5.0),
+            fallbackModel=ConfigTool.get("quality.fallbackModel", "tiny"),
+            shortWindowSec=ConfigTool.get("quality.shortWindowSec", 10.0)
+        )
+
+    def getLevelName(self):
+        return QualityLadder.levelList[self.level]["name"]
+
+    def getDecodeOptions(self):
+        return QualityLadder.levelList[self.level]["decodeOptions"]
+
+    def getWindowSec(self):
+        """
+        当前档位的识别窗口上限 (秒)，None 表示不缩短 (stream.maxWindowSec)
+        """
+        if QualityLadder.levelList[self.level]["shortWindow"]:
+            return self.shortWindowSec
+        return None
+
+    def getModelKey(self):
+        if QualityLadder.levelList[self.level]["smallModel"]:
+            return self.smallModelKey
+        return self.baseModelKey
+
+    def update(self, audioSec, inferSec, backlogSec=0.0, now=None):
+        """
+        记录一次识别 (音频时长、实际耗时) 与当前积压，需要时换档
+        """
+        if audioSec <= 0:
+            return
+        if now is None:
+            now = time.monotonic()
+        if self.lastStepTime is None:
+            self.lastStepTime = now
+
+        rtf = inferSec / audioSec
+        self.rtf = rtf if self.rtf is None else self.rtf + self.smoothing * (rtf - self.rtf)
+        if now - self.lastStepTime < self.minStepSec:
+            return
+
+        if (self.rtf > self.downRtf or backlogSec > self.maxBacklogSec) and self.level < self.maxLevel:
+            self.step(1, backlogSec, now)
+        elif self.rtf < self.upRtf and backlogSec < self.maxBacklogSec / 2 and self.level > 0:
+            self.step(-1, backlogSec, now)
+
+    def step(self, delta, backlogSec, now):
+        oldName = self.getLevelName()
+        self.level += delta
+        direction = "down" if delta > 0 else "up"
+        LogTool.info(f"Quality step {direction}: {oldName} -> {self.getLevelName()} (rtf={self.rtf:.2f}, backlog={backlogSec:.1f}s)")
+        MetricTool.addCounter("qualityStepDown" if delta > 0 else "qualityStepUp")
+        # 新档位的耗时与之前不可比，重新统计
+        self.rtf = None
+        self.lastStepTime = now
@@ -0,0 +1,133 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.LogTool import LogTool
+from utils.AudioTool import AudioTool
+from utils.ConfigTool import ConfigTool
+from utils.StringTool import StringTool
+from core.StreamSession import StreamSession
+from core.PackProcessor import PackProcessor
+from core.BatchProcessor import BatchProcessor
+
+class SplitProcessor:
+    """
+    单个长文件的并行识别 (main.py -i ... --split)
+    1. 先读一遍文件找出语音区间，每隔约 split.pieceSec 在静音中点切一刀 (长时间无静音时硬切)
+    2. 各片段 (前面多读 split.overlapSec) 交给 Worker 进程池，每个 Worker 用 StreamSession 独立识别
+    3. 按片段顺序合并: 时间换算为绝对时间，接缝处已输出过的片段丢弃，首句去除重叠文字
+    结果按时间顺序回调，与 StreamProcessor 的输出格式相同
+    """
+
+    @staticmethod
+    def run(filePath, onResultCallback, chunkSize=8000, silenceThreshold=0.005):
+        LogTool.info(f"SplitProcessor started for: {filePath}")
+        sampleRate = AudioTool.targetRate
+
+        regionList, totalSamples = PackProcessor.planRegions(filePath, chunkSize, silenceThreshold, sampleRate)
+        cutList = SplitProcessor.planCuts(regionList, totalSamples, int(ConfigTool.get("split.pieceSec", 300) * sampleRate))
+        overlapSamples = int(ConfigTool.get("split.overlapSec", 1.0) * sampleRate)
+        # 片段: (读取起点秒, 读取终点秒)，除第一段外都向前多读一段重叠
+        pieceList = [
+            (max(0, cutList[index] - overlapSamples) / sampleRate, cutList[index + 1] / sampleRate)
+            for index in range(len(cutList) - 1)
+        ]
+        if not pieceList:
+            LogTool.info("SplitProcessor finished: no audio.")
+            return
+
+        workerCount = BatchProcessor.getWorkerCount(len(pieceList))
+        LogTool.info(f"Split {totalSamples / sampleRate:.1f}s audio into {len(pieceList)} pieces, {workerCount} workers")
+
+        pieceArgs = (filePath, chunkSize, silenceThreshold)
+        merger = {"nextIndex": 0, "doneMap": {}, "lastEnd": 0.0, "lastText": ""}
+        if workerCount <= 1:
+            for index, (startSec, endSec) in enumerate(pieceList):
+                merger["doneMap"][index] = SplitProcessor.processPiece(*pieceArgs, startSec, endSec)
+                SplitProcessor.emitReady(merger, pieceList, onResultCallback)
+        else:
+            threadsPerWorker = BatchProcessor.getThreadsPerWorker(workerCount)
+            with ProcessPoolExecutor(
+                max_workers=workerCount,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=BatchProcessor.initWorker,
+                initargs=(ConfigTool._config, threadsPerWorker, LogTool.getWorkerQueue())
+            ) as pool:
+                futureMap = {
+                    pool.submit(SplitProcessor.processPiece, *pieceArgs, startSec, endSec): index
+                    for index, (startSec, endSec) in enumerate(pieceList)
+                }
+                for future in as_completed(futureMap):
+                    index = futureMap[future]
+                    try:
+                        merger["doneMap"][index] = future.result()
+                    except Exception as e:
+                        LogTool.error(f"Worker failed on piece {index} ({pieceList[index][0]:.1f}s)", e)
+                        merger["doneMap"][index] = []
+                    # 前面的片段都完成后才能按顺序输出
+                    SplitProcessor.emitReady(merger, pieceList, onResultCallback)
+
+        LogTool.info("SplitProcessor finished.")
+
+    @staticmethod
+    def planCuts(regionList, totalSamples, pieceSamples):
+        """
+        返回切分点列表 (采样点，含 0 与 totalSamples)
+        片段长度达到 pieceSamples 后在下一个静音的中点切分；超过两倍仍无静音时硬切
+        """
+        cutList = [0]
+        gapList = [((regionList[index][1] + regionList[index + 1][0]) // 2) for index in range(len(regionList) - 1)]
+        for cutPoint in gapList + [totalSamples]:
+            while cutPoint - cutList[-1] > 2 * pieceSamples:
+                cutList.append(cutList[-1] + pieceSamples)
+            if cutPoint - cutList[-1] >= pieceSamples and cutPoint < totalSamples:
+                cutList.append(cutPoint)
+        if totalSamples > cutList[-1]:
+            cutList.append(totalSamples)
+        return cutList
+
+    @staticmethod
+    def processPiece(filePath, chunkSize, silenceThreshold, startSec, endSec):
+        """
+        Worker 中执行: 识别文件的一段，返回绝对时间的结果列表
+        """
+        resultList = []
+        session = StreamSession(
+            resultList.append,
+            chunkSize=chunkSize,
+            silenceThreshold=silenceThreshold,
+            silenceCountTrigger=ConfigTool.get("test.silenceCountTrigger", 3),
+            batchSize=ConfigTool.get("batch.segmentBatchSize", 1),
+            sampleRate=AudioTool.targetRate,
+            priority="batch"
+        )
+        for chunk in AudioTool.readFileGenerator(filePath, chunkSize=chunkSize, targetRate=AudioTool.targetRate, startSec=startSec, endSec=endSec):
+            session.feed(chunk)
+        session.finish()
+
+        for outData in resultList:
+            outData["audioTimeStart"] = round(outData["audioTimeStart"] + startSec, 2)
+            outData["audioTimeEnd"] = round(outData["audioTimeEnd"] + startSec, 2)
+        return resultList
+
+    @staticmethod
+    def emitReady(merger, pieceList, onResultCallback):
+        """
+        按顺序输出已完成的片段，并去除接缝处的重复
+        """
+        doneMap = merger["doneMap"]
+        while merger["nextIndex"] in doneMap:
+            resultList = doneMap.pop(merger["nextIndex"])
+            isFirst = True
+            for outData in resultList:
+                if merger["nextIndex"] > 0 and isFirst:
+                    # 重叠区内已由上一片段输出的句子整句丢弃，跨过接缝的第一句去除重复文字
+                    if outData["audioTimeEnd"] <= merger["lastEnd"]:
+                        continue
+                    isFirst = False
+                    if outData["audioTimeStart"] < merger["lastEnd"]:
+                        outData["text"] = StringTool.dropOverlap(merger["lastText"], outData["text"])
+                        if StringTool.isEmpty(outData["text"]):
+                            continue
+                onResultCallback(outData)
+                merger["lastEnd"] = max(merger["lastEnd"], outData["audioTimeEnd"])
+                merger["lastText"] = outData["text"]
+            merger["nextIndex"] += 1
@@ -1,74 +1,181 @@
-import numpy as np
-from datetime import datetime
+import queue
+import asyncio
+import threading
 from utils.LogTool import LogTool
 from utils.AudioTool import AudioTool
-from core.AsrService import AsrService
+from utils.ConfigTool import ConfigTool
+from core.StreamSession import StreamSession
 
 class StreamProcessor:
+    """
+    文件流式识别
+    - 顺序模式: 读取、切分识别、回调在同一线程依次执行
+    - 流水线模式 (stream.pipelined): 读取线程 (解码/下混/重采样) -> 有界队列 -> 识别线程 (VAD/缓冲/推理) -> 有界队列 -> 调用方线程 (回调)
+      识别期间继续读取后续音频，回调写盘期间识别不中断；任一环节变慢时上游在有界队列上阻塞 (背压)
+    - iterResults / aiterResults: 以生成器 / 异步迭代器的形式逐条取结果，调用方取得慢时识别随之暂停
+    """
+
     @staticmethod
-    def run(filePath, onResultCallback, chunkSize=8000, silenceThreshold=0.005, silenceCountTrigger=3):
+    def run(filePath, onResultCallback, chunkSize=8000, silenceThreshold=0.005, silenceCountTrigger=3, batchSize=1, modelKey=None, priority="live", pipelined=None):
         """
         运行流式识别主循环
+        batchSize: 大于 1 时，切分出的音频段先排队，攒够 batchSize 段后批量识别 (适合离线批处理)
+        modelKey: 使用的模型 (AsrService.getModelKey)，None 为默认模型
+        priority: 推理调度优先级 live / batch (InferScheduler)
+        pipelined: 是否使用流水线模式，None 表示读取 stream.pipelined 配置
         """
+        if pipelined is None:
+            pipelined = ConfigTool.get("stream.pipelined", False)
+        if pipelined:
+            # 读取与识别在后台线程，回调在当前线程执行
+            for outData in StreamProcessor.iterResults(filePath, chunkSize, silenceThreshold, silenceCountTrigger, batchSize, modelKey, priority):
+                onResultCallback(outData)
+            return
+
         LogTool.info(f"StreamProcessor started for: {filePath}")
-        
-        audioBuffer = []
-        silenceCount = 0
-        currentTime = 0.0
-        sampleRate = 16000 # 假设 16k
-        chunkDuration = chunkSize / sampleRate
 
-        def processBuffer(buffer, isFinal=False):
-            """内部函数：处理当前的 audioBuffer"""
-            if len(buffer) == 0:
-                return
+        # 读取时统一重采样到 Whisper 所需的采样率
+        sampleRate = AudioTool.targetRate
+        session = StreamSession(
+            onResultCallback,
+            chunkSize=chunkSize,
+            silenceThreshold=silenceThreshold,
+            silenceCountTrigger=silenceCountTrigger,
+            batchSize=batchSize,
+            sampleRate=sampleRate,
+            modelKey=modelKey,
+            priority=priority
+        )
 
-            fullData = np.concatenate(buffer)
-            bufferLen = len(fullData)
-            bufferDuration = bufferLen / sampleRate
-            
-            # 计算这段 buffer 在整个流中的绝对起始时间
-            bufferStartTime = currentTime - bufferDuration
+        for chunk in AudioTool.readFileGenerator(filePath, chunkSize=chunkSize, targetRate=sampleRate):
+            session.feed(chunk)
 
-            # 只有当 buffer 长度足够长才识别 (例如 0.5s)
-            if bufferDuration > 0.5:
-                segments = AsrService.transcribe(fullData)
-                
-                # 遍历所有识别出的片段 (Whisper 内部 VAD 切分出的句子)
-                for seg in segments:
-                    # 计算该句子的绝对时间
-                    absStart = bufferStartTime + seg['start']
-                    absEnd = bufferStartTime + seg['end']
-                    
-                    outData = {
-                        "timestamp": datetime.now().isoformat(),
-                        "audioTimeStart": round(absStart, 2),
-                        "audioTimeEnd": round(absEnd, 2),
-                        "text": seg['text'],
-                        "type": "final" if isFinal else "interim" 
-                        # 注: 在这种模拟流式中，VAD 切割后的处理通常都可视为这一段的 final
-                        # 真正的 interim 是指 Whisper 的实时流式 partial result，这里暂不涉及
-                    }
-                    onResultCallback(outData)
+        # 处理末尾残留
+        session.finish()
 
-        for chunk in AudioTool.readFileGenerator(filePath, chunkSize=chunkSize):
-            audioBuffer.append(chunk)
-            currentTime += chunkDuration
-            
-            # VAD 检测
-            if AudioTool.isSilent(chunk, threshold=silenceThreshold):
-                silenceCount += 1
-            else:
-                silenceCount = 0
-            
-            # 触发识别
-            if silenceCount >= silenceCountTrigger and len(audioBuffer) > 0:
-                processBuffer(audioBuffer, isFinal=True) # 切割点，视为 Final
-                audioBuffer = []
-                silenceCount = 0
+        LogTool.info("StreamProcessor finished.")
 
-        # 处理末尾残留
-        if audioBuffer:
-            processBuffer(audioBuffer, isFinal=True)
-        
-        LogTool.info("StreamProcessor finished.")
\ No newline at end of file
+    @staticmethod
+    def iterResults(filePath, chunkSize=8000, silenceThreshold=0.005, silenceCountTrigger=3, batchSize=1, modelKey=None, priority="live", stopEvent=None):
+        """
+        流水线模式识别，逐条 yield 结果 dict (参数同 run)
+        提前结束迭代 (break / close) 时通知后台线程退出，并等待正在进行的识别完成
+        stopEvent: 由其他线程 set 时，正在等待下一条结果的迭代直接结束 (aiterResults 取消时使用)
+        """
+        LogTool.info(f"StreamProcessor (pipelined) started for: {filePath}")
+        sampleRate = AudioTool.targetRate
+        queueSize = max(1, ConfigTool.get("stream.pipelineQueueSize", 16))
+        chunkQueue = queue.Queue(maxsize=queueSize)
+        resultQueue = queue.Queue(maxsize=queueSize)
+        if stopEvent is None:
+            stopEvent = threading.Event()
+
+        def produce():
+            try:
+                for chunk in AudioTool.readFileGenerator(filePath, chunkSize=chunkSize, targetRate=sampleRate):
+                    # 读取端可能复用输出缓冲区，入队前拷贝
+                    if not StreamProcessor.putItem(chunkQueue, chunk.copy(), stopEvent):
+                        return
+                StreamProcessor.putItem(chunkQueue, None, stopEvent)
+            except Exception as e:
+                StreamProcessor.putItem(chunkQueue, e, stopEvent)
+
+        def infer():
+            try:
+                session = StreamSession(
+                    lambda outData: StreamProcessor.putItem(resultQueue, outData, stopEvent),
+                    chunkSize=chunkSize,
+                    silenceThreshold=silenceThreshold,
+                    silenceCountTrigger=silenceCountTrigger,
+                    batchSize=batchSize,
+                    sampleRate=sampleRate,
+                    modelKey=modelKey,
+                    priority=priority
+                )
+                while True:
+                    isOk, item = StreamProcessor.getItem(chunkQueue, stopEvent)
+                    if not isOk:
+                        return
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    session.feed(item)
+                session.finish()
+                StreamProcessor.putItem(resultQueue, None, stopEvent)
+            except Exception as e:
+                StreamProcessor.putItem(resultQueue, e, stopEvent)
+
+        threadList = [
+            threading.Thread(target=produce, name="streamRead", daemon=True),
+            threading.Thread(target=infer, name="streamInfer", daemon=True)
+        ]
+        for thread in threadList:
+            thread.start()
+
+        try:
+            while True:
+                isOk, item = StreamProcessor.getItem(resultQueue, stopEvent)
+                if not isOk:
+                    return
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+            LogTool.info("StreamProcessor finished.")
+        finally:
+            stopEvent.set()
+            for thread in threadList:
+                thread.join()
+
+    @staticmethod
+    async def aiterResults(filePath, **kwargs):
+        """
+        iterResults 的异步版本 (参数同 iterResults)，在默认线程池中取下一条结果，不阻塞事件循环
+        调用方取消或提前结束时先通知停止，等线程池中正在进行的 next() 返回后再关闭生成器
+        """
+        loop = asyncio.get_running_loop()
+        stopEvent = threading.Event()
+        iterator = StreamProcessor.iterResults(filePath, stopEvent=stopEvent, **kwargs)
+        pending = None
+        try:
+            while True:
+                pending = loop.run_in_executor(None, next, iterator, None)
+                # shield: 调用方取消时不取消 pending 本身，finally 中仍可等它真正完成
+                outData = await asyncio.shield(pending)
+                pending = None
+                if outData is None:
+                    break
+                yield outData
+        finally:
+            stopEvent.set()
+            if pending is not None:
+                # 取消 await 不会中断线程池中的 next()，必须等它返回，否则 close() 报 generator already executing
+                await asyncio.wait([pending])
+            await loop.run_in_executor(None, iterator.close)
+
+    @staticmethod
+    def putItem(itemQueue, item, stopEvent):
+        """
+        放入有界队列，队列满时等待；已通知停止时放弃并返回 False
+        """
+        while not stopEvent.is_set():
+            try:
+                itemQueue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def getItem(itemQueue, stopEvent):
+        """
+        从队列取出一项，返回 (是否取到, 数据)；已通知停止时返回 (False, None)
+        """
+        while not stopEvent.is_set():
+            try:
+                return True, itemQueue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return False, None
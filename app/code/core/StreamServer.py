@@ -0,0 +1,225 @@
+import os
+import json
+import asyncio
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from utils.LogTool import LogTool
+from utils.ConfigTool import ConfigTool
+from utils.MetricTool import MetricTool
+from core.StreamSession import StreamSession
+from core.AsrService import AsrService
+from core.QualityLadder import QualityLadder
+
+class StreamServer:
+    """
+    WebSocket 实时流式识别服务 (供 Tauri 前端与本地 Agent 推送麦克风 PCM)
+
+    协议 (ws://127.0.0.1:<server.port>/ws/stream[?model=tiny]):
+    - 查询参数 model: 本会话使用的模型规格 (需在 modelPool.allowedSizes 中，否则以 1008 关闭)，缺省为默认模型
+    - 连接数超过 server.maxSessions 时握手后以 1013 关闭
+    - 客户端发送二进制帧: 16kHz 单声道 int16 小端 PCM，长度任意 (可在采样中间断开)
+    - 客户端发送文本帧 {"type": "end"}: 音频结束，服务端处理残留后返回 {"type": "done"} 并关闭；不是 JSON 对象的文本帧以 1007 关闭
+    - 服务端推送文本帧: 与 StreamProcessor onResultCallback 相同的结果 dict；启用 quality.enabled 时附带 qualityLevel (当前识别质量档位)
+
+    GET /metrics: Prometheus 文本格式的性能指标 (MetricTool)
+
+    server.watchDirs 不为空时同时监视录音目录 (WatchProcessor)，新文件在本进程以 batch 优先级识别，
+    与实时会话 (live) 共用已加载的模型，由 InferScheduler 在两者之间调度
+    """
+    _executor = None
+    _activeCount = 0
+
+    @staticmethod
+    def createApp():
+        app = FastAPI(title="ASRBrain Stream Server")
+
+        @app.websocket("/ws/stream")
+        async def streamEndpoint(websocket: WebSocket):
+            await StreamServer.handleSession(websocket)
+
+        @app.get("/metrics", response_class=PlainTextResponse)
+        async def metricsEndpoint():
+            return MetricTool.toPrometheus()
+
+        return app
+
+    @staticmethod
+    def run():
+        """
+        启动服务 (阻塞)，端口读取 server.port
+        """
+        import uvicorn
+
+        host = ConfigTool.get("server.host", "127.0.0.1")
+        port = ConfigTool.get("server.port", 8000)
+        inferWorkers = ConfigTool.get("server.inferWorkers", 2)
+
+        # 推理线程池有界，事件循环只负责收发
+        StreamServer._executor = ThreadPoolExecutor(max_workers=inferWorkers, thread_name_prefix="asrInfer")
+        LogTool.info(f"StreamServer listening on ws://{host}:{port}/ws/stream (inferWorkers={inferWorkers})")
+        watchThread = StreamServer.startWatch(ConfigTool.get("server.watchDirs", []))
+        try:
+            uvicorn.run(StreamServer.createApp(), host=host, port=port, log_level="warning")
+        finally:
+            if watchThread is not None:
+                from core.WatchProcessor import WatchProcessor
+                WatchProcessor.stop()
+                watchThread.join()
+            StreamServer._executor.shutdown(wait=False)
+
+    @staticmethod
+    def startWatch(dirList):
+        """
+        在后台线程中监视录音目录，文件在本进程识别 (单 Worker)，返回线程；dirList 为空时返回 None
+        """
+        if not dirList:
+            return None
+        from core.WatchProcessor import WatchProcessor
+        missingList = [dirPath for dirPath in dirList if not os.path.isdir(dirPath)]
+        if missingList:
+            LogTool.error(f"Watch directory not found, skipped: {', '.join(missingList)}")
+            dirList = [dirPath for dirPath in dirList if dirPath not in missingList]
+            if not dirList:
+                return None
+        thread = threading.Thread(target=WatchProcessor.run, args=(dirList,), kwargs={"workerCount": 1}, name="serverWatch", daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    async def handleSession(websocket):
+        maxSessions = ConfigTool.get("server.maxSessions", 4)
+        # 先完成握手再以 close code 拒绝，否则客户端只能收到 HTTP 403
+        await websocket.accept()
+        if StreamServer._activeCount >= maxSessions:
+            # 1013: Try Again Later
+            LogTool.info(f"Session rejected, active sessions reached limit {maxSessions}")
+            await websocket.close(code=1013)
+            return
+
+        modelSize = websocket.query_params.get("model")
+        if modelSize and not AsrService.isAllowedModel(modelSize):
+            # 1008: Policy Violation
+            LogTool.info(f"Session rejected, model not allowed: {modelSize}")
+            await websocket.close(code=1008)
+            return
+        modelKey = AsrService.getModelKey(modelSize=modelSize)
+
+        # 单线程事件循环内计数，无需加锁
+        StreamServer._activeCount += 1
+        LogTool.info(f"Session opened ({StreamServer._activeCount}/{maxSessions})")
+
+        taskList = []
+        try:
+            # 每路会话的音频队列有界: 推理跟不上时 receiveLoop 停止读取 socket，由 TCP 向客户端施加背压
+            audioQueue = asyncio.Queue(maxsize=ConfigTool.get("server.queueSize", 32))
+            state = {"clientGone": False, "remainder": b""}
+            taskList = [
+                asyncio.create_task(StreamServer.receiveLoop(websocket, audioQueue, state)),
+                asyncio.create_task(StreamServer.inferLoop(websocket, audioQueue, state, modelKey))
+            ]
+            await asyncio.gather(*taskList)
+        except WebSocketDisconnect:
+            LogTool.info("Session disconnected by client")
+        except Exception as e:
+            LogTool.error("Session error", e)
+            # 1011: Internal Error，客户端不必等待超时
+            try:
+                await websocket.close(code=1011)
+            except Exception:
+                pass
+        finally:
+            # 一方出错退出时另一方仍在运行，取消并等待其结束后才释放会话名额
+            for task in taskList:
+                task.cancel()
+            await asyncio.gather(*taskList, return_exceptions=True)
+            StreamServer._activeCount -= 1
+            LogTool.info(f"Session closed ({StreamServer._activeCount}/{maxSessions})")
+
+    @staticmethod
+    async def receiveLoop(websocket, audioQueue, state):
+        """
+        接收客户端帧并放入队列，None 表示音频结束
+        二进制帧可以在采样中间断开，不足一个采样的字节留到下一帧拼接；文本帧不是 JSON 对象时以 1007 关闭
+        """
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                state["clientGone"] = True
+                break
+            if message.get("bytes") is not None:
+                data = state["remainder"] + message["bytes"]
+                cut = len(data) - len(data) % 2
+                state["remainder"] = data[cut:]
+                if cut == 0:
+                    continue
+                pcm = np.frombuffer(data[:cut], dtype="<i2")
+                await audioQueue.put(pcm.astype(np.float32) / 32768.0)
+                MetricTool.addCounter("audioSecondsIn", len(pcm) / 16000)
+                MetricTool.addGauge("queueDepth", 1)
+            elif message.get("text") is not None:
+                try:
+                    command = json.loads(message["text"])
+                except ValueError:
+                    command = None
+                if not isinstance(command, dict):
+                    # 1007: Invalid Frame Payload Data
+                    LogTool.info("Session closed, invalid text frame")
+                    state["clientGone"] = True
+                    await websocket.close(code=1007)
+                    break
+                if command.get("type") == "end":
+                    break
+        # 正常结束 (end 帧或断开) 时通知 inferLoop；出错或被取消时由 handleSession 取消 inferLoop
+        await audioQueue.put(None)
+
+    @staticmethod
+    async def inferLoop(websocket, audioQueue, state, modelKey):
+        """
+        从队列取音频，在推理线程池中执行切分与识别，并把结果推回客户端
+        """
+        loop = asyncio.get_running_loop()
+        resultList = []
+        session = StreamSession(
+            resultList.append,
+            chunkSize=ConfigTool.get("test.chunkSize", 8000),
+            silenceThreshold=ConfigTool.get("test.silenceThreshold", 0.005),
+            silenceCountTrigger=ConfigTool.get("test.silenceCountTrigger", 3),
+            interimIntervalSec=ConfigTool.get("stream.interimIntervalSec", 0),
+            modelKey=modelKey,
+            priority="live",
+            qualityLadder=QualityLadder.create(modelKey)
+        )
+
+        isEnd = False
+        while not isEnd:
+            # 一次取走队列中已积压的全部帧，减少线程切换次数
+            frameList = [await audioQueue.get()]
+            while not audioQueue.empty():
+                frameList.append(audioQueue.get_nowait())
+            if frameList[-1] is None:
+                isEnd = True
+                frameList.pop()
+            MetricTool.addGauge("queueDepth", -len(frameList))
+            if state["clientGone"]:
+                # 客户端已断开，丢弃剩余音频
+                return
+
+            if frameList:
+                audioData = np.concatenate(frameList) if len(frameList) > 1 else frameList[0]
+                # 一次取到的音频即为推理期间积压的音频
+                session.backlogSec = len(audioData) / 16000
+                await loop.run_in_executor(StreamServer._executor, session.feed, audioData)
+            if isEnd:
+                await loop.run_in_executor(StreamServer._executor, session.finish)
+
+            for outData in resultList:
+                await websocket.send_json(outData)
+            resultList.clear()
+
+        if state["clientGone"]:
+            return
+        await websocket.send_json({"type": "done"})
+        await websocket.close()
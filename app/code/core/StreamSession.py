@@ -0,0 +1,376 @@
+import time
+import numpy as np
+from datetime import datetime
+from utils.LogTool import LogTool
+from utils.AudioTool import AudioTool
+from utils.AudioBuffer import AudioBuffer
+from utils.ConfigTool import ConfigTool
+from utils.StringTool import StringTool
+from utils.MetricTool import MetricTool
+from utils.VadEngine import VadEngine
+from core.AsrService import AsrService
+
+class StreamSession:
+    """
+    单路音频流的切分与识别状态 (每路流一个实例)
+    调用方按任意长度推送音频 (feed)，结束时调用 finish
+    内部按 chunkSize 做静音检测，静音或缓冲区写满时触发识别，结果通过 onResultCallback 回调
+
+    静音检测 (vad.engine):
+    - rms: 整块 RMS 低于 silenceThreshold 记为静音块，连续 silenceCountTrigger 块后切分
+    - frame: 帧级 VadEngine，语音结束后静音达到 vad.minSilenceMs 即在语音末尾 (+vad.speechPadMs) 处切分，
+      没有语音的音频不送入模型，模型内置 VAD 同时关闭
+
+    中间结果 (interim): interimIntervalSec > 0 时，每隔该时长重新识别一次正在增长的缓冲区，
+    连续 stream.agreementCount 次识别结果的公共前缀才会被确认 (local agreement)，
+    已确认文本只增不改，该段的 final 结果也以它开头
+
+    自适应质量: 传入 qualityLadder (QualityLadder) 时按会话的 RTF 与积压 (backlogSec，由调用方更新) 升降识别质量，
+    结果中附带 qualityLevel 字段
+    """
+
+    def __init__(self, onResultCallback, chunkSize=8000, silenceThreshold=0.005, silenceCountTrigger=3, batchSize=1, sampleRate=16000, interimIntervalSec=0, modelKey=None, priority="live", qualityLadder=None):
+        self.onResultCallback = onResultCallback
+        self.chunkSize = chunkSize
+        self.silenceThreshold = silenceThreshold
+        self.silenceCountTrigger = silenceCountTrigger
+        self.batchSize = batchSize
+        self.sampleRate = sampleRate
+        # 识别使用的模型 (AsrService.getModelKey)，None 为默认模型
+        self.modelKey = modelKey
+        # 推理调度优先级: live (实时会话) / batch (离线文件)
+        self.priority = priority
+        # 负载自适应质量 (仅实时会话)，以及调用方报告的积压音频时长 (秒)
+        self.qualityLadder = qualityLadder
+        self.qualityLevel = qualityLadder.getLevelName() if qualityLadder is not None else None
+        self.backlogSec = 0.0
+
+        # 定长缓冲区: 最长 stream.maxWindowSec 秒，达到识别窗口 (getWindowSamples) 时在窗口内能量最低处强制切分
+        maxWindowSec = ConfigTool.get("stream.maxWindowSec", 28)
+        self.overlapSamples = int(ConfigTool.get("stream.overlapSec", 0.5) * sampleRate)
+        # 强制切分点在窗口后半，重叠不小于半个窗口时切分后缓冲区不会变短，会反复强制切分
+        if self.overlapSamples * 2 >= int(maxWindowSec * sampleRate):
+            raise ValueError(f"stream.overlapSec must be less than half of stream.maxWindowSec ({maxWindowSec})")
+        self.audioBuffer = AudioBuffer(int(maxWindowSec * sampleRate))
+
+        # 不足一个 chunk 的输入先暂存，凑满后再做静音检测
+        self.chunkData = np.zeros(chunkSize, dtype=np.float32)
+        self.chunkFill = 0
+
+        self.silenceCount = 0
+        # 帧级 VAD: 缓冲区内是否已有语音，以及缓冲区末尾连续静音的采样点数
+        self.vadEngine = None
+        self.modelVadFilter = None
+        if ConfigTool.get("vad.engine", "rms") == "frame":
+            self.vadEngine = VadEngine.create(sampleRate=sampleRate, minRms=silenceThreshold)
+            self.modelVadFilter = False
+        self.minSilenceSamples = int(ConfigTool.get("vad.minSilenceMs", 500) * sampleRate / 1000)
+        self.padSamples = int(ConfigTool.get("vad.speechPadMs", 200) * sampleRate / 1000)
+        self.speechSeen = False
+        self.trailingSilence = 0
+        self.afterSeam = False
+        # 待批量识别的音频段队列: (音频数据, 绝对起始时间, 是否 Final, 是否接在强制切分之后)
+        self.pendingList = []
+        # 强制切分时上一段的末尾文本，用于去除重叠音频造成的重复文字
+        self.lastText = ""
+
+        # 中间结果: 批量模式下不做重复识别
+        self.interimSamples = int(interimIntervalSec * sampleRate) if batchSize <= 1 else 0
+        self.agreementCount = max(1, ConfigTool.get("stream.agreementCount", 2))
+        self.samplesSinceDecode = 0
+        # 最近几次识别的假设文本，以及已确认 (不再改写) 的文本
+        self.hypothesisList = []
+        self.committedText = ""
+        # 最近一次中间结果的识别片段 (时间相对于缓冲区头部)，强制切分时据此截短已确认文本
+        self.interimSegments = []
+
+    def feed(self, audioData):
+        """
+        推送一段 float32 单声道音频 (长度任意)
+        """
+        position = 0
+        while position < len(audioData):
+            count = min(self.chunkSize - self.chunkFill, len(audioData) - position)
+            self.chunkData[self.chunkFill:self.chunkFill + count] = audioData[position:position + count]
+            self.chunkFill += count
+            position += count
+            if self.chunkFill == self.chunkSize:
+                self.processChunk(self.chunkData)
+                self.chunkFill = 0
+
+    def finish(self):
+        """
+        流结束: 处理末尾残留并清空批量队列
+        """
+        if self.chunkFill > 0:
+            self.processChunk(self.chunkData[:self.chunkFill])
+            self.chunkFill = 0
+        if self.audioBuffer.size > 0 and (self.vadEngine is None or self.speechSeen):
+            self.processBuffer(self.audioBuffer.size, isFinal=True)
+            self.audioBuffer.clear()
+        self.flushPending()
+
+    def getWatermark(self):
+        """
+        之后回调的结果起始时间都不早于该时间 (秒)，用于多路结果按时间归并
+        """
+        watermark = self.audioBuffer.startSample / self.sampleRate
+        if self.pendingList:
+            watermark = min(watermark, self.pendingList[0][1])
+        return watermark
+
+    def getWindowSamples(self):
+        """
+        当前识别窗口上限 (采样点数): stream.maxWindowSec，自适应质量降到短窗口档位时为 quality.shortWindowSec
+        """
+        windowSamples = self.audioBuffer.maxSamples
+        if self.qualityLadder is not None and self.qualityLadder.getWindowSec() is not None:
+            windowSamples = min(windowSamples, max(2 * self.overlapSamples + 1, int(self.qualityLadder.getWindowSec() * self.sampleRate)))
+        return windowSamples
+
+    def processChunk(self, chunk):
+        startTime = MetricTool.startTimer()
+        written = 0
+        windowSamples = self.getWindowSamples()
+        while written < len(chunk):
+            if self.audioBuffer.size >= windowSamples:
+                # 缓冲区写满 (连续语音/等待音乐/噪声): 在后半窗口能量最低处切分，保留少量重叠
+                cutIndex = AudioTool.findQuietPoint(self.audioBuffer.view(), searchStart=self.audioBuffer.size // 2)
+                self.trimCommitted(cutIndex)
+                self.processBuffer(cutIndex, isFinal=True)
+                self.audioBuffer.consume(cutIndex, keepCount=self.overlapSamples)
+                self.resetInterim()
+                self.afterSeam = True
+                LogTool.info(f"Buffer full, forced flush at {self.audioBuffer.startSample / self.sampleRate:.2f}s")
+                startTime = MetricTool.startTimer()
+            written += self.audioBuffer.append(chunk[written:written + windowSamples - self.audioBuffer.size])
+        MetricTool.stopTimer("buffer", startTime)
+
+        # VAD 检测，得到切分点 (None 表示不切分)
+        startTime = MetricTool.startTimer()
+        if self.vadEngine is not None:
+            cutIndex = self.detectSpeechEnd(chunk)
+        else:
+            if AudioTool.isSilent(chunk, threshold=self.silenceThreshold):
+                self.silenceCount += 1
+            else:
+                self.silenceCount = 0
+            cutIndex = self.audioBuffer.size if self.silenceCount >= self.silenceCountTrigger else None
+        MetricTool.stopTimer("vad", startTime)
+
+        # 触发识别
+        if cutIndex is not None and self.audioBuffer.size > 0:
+            self.processBuffer(cutIndex, isFinal=True) # 切割点，视为 Final
+            # 切分点之后只有静音，保留末尾一小段作为下一段语音的起始
+            self.audioBuffer.consume(self.audioBuffer.size, keepCount=min(self.audioBuffer.size - cutIndex, self.padSamples))
+            self.speechSeen = False
+            self.resetInterim()
+            self.afterSeam = False
+            self.silenceCount = 0
+        elif self.interimSamples > 0:
+            self.samplesSinceDecode += len(chunk)
+            # 只在仍有语音输入时重新识别，静音期间文本不会变化
+            if self.samplesSinceDecode >= self.interimSamples and self.silenceCount == 0:
+                self.processInterim()
+                self.samplesSinceDecode = 0
+
+    def detectSpeechEnd(self, chunk):
+        """
+        帧级 VAD: 更新缓冲区末尾的连续静音长度，语音结束足够久时返回切分点
+        """
+        speechFlags = self.vadEngine.process(chunk)
+        frameSize = self.vadEngine.frameSize
+        if speechFlags.any():
+            if not self.speechSeen:
+                # 语音开始: 丢弃其前面的静音，只保留 speechPadMs
+                firstIndex = int(np.argmax(speechFlags))
+                self.audioBuffer.consume(self.audioBuffer.size, keepCount=(len(speechFlags) - firstIndex) * frameSize + self.padSamples)
+                self.speechSeen = True
+            self.silenceCount = 0
+            lastIndex = len(speechFlags) - 1 - int(np.argmax(speechFlags[::-1]))
+            self.trailingSilence = (len(speechFlags) - 1 - lastIndex) * frameSize
+        else:
+            self.silenceCount += 1
+            self.trailingSilence += len(speechFlags) * frameSize
+
+        if not self.speechSeen:
+            # 还没有语音: 静音不送入模型，只保留末尾一小段
+            self.audioBuffer.consume(self.audioBuffer.size, keepCount=self.padSamples)
+            return None
+        if self.trailingSilence >= self.minSilenceSamples:
+            return min(self.audioBuffer.size, max(0, self.audioBuffer.size - self.trailingSilence + self.padSamples))
+        return None
+
+    def processInterim(self):
+        """
+        重新识别当前缓冲区，更新已确认前缀并回调 interim 结果
+        """
+        if self.audioBuffer.size / self.sampleRate <= 0.5:
+            return
+
+        segments = self.transcribe(self.audioBuffer.view())
+        hypothesis = "".join(seg['text'] for seg in segments)
+        self.interimSegments = segments
+
+        self.hypothesisList.append(hypothesis)
+        if len(self.hypothesisList) > self.agreementCount:
+            self.hypothesisList.pop(0)
+
+        # 连续多次识别都一致的前缀才确认，且已确认文本只能追加
+        if len(self.hypothesisList) == self.agreementCount:
+            stableText = StringTool.commonPrefix(self.hypothesisList)
+            if len(stableText) > len(self.committedText) and stableText.startswith(self.committedText):
+                self.committedText = stableText
+
+        if hypothesis.startswith(self.committedText):
+            text = hypothesis
+        else:
+            text = self.committedText + hypothesis[len(self.committedText):]
+
+        bufferStartTime = self.audioBuffer.startSample / self.sampleRate
+        outData = {
+            "timestamp": datetime.now().isoformat(),
+            "audioTimeStart": round(bufferStartTime, 2),
+            "audioTimeEnd": round(bufferStartTime + self.audioBuffer.size / self.sampleRate, 2),
+            "text": text,
+            "stableText": self.committedText,
+            "type": "interim"
+        }
+        if self.qualityLevel is not None:
+            outData["qualityLevel"] = self.qualityLevel
+        startTime = MetricTool.startTimer()
+        self.onResultCallback(outData)
+        MetricTool.stopTimer("callback", startTime)
+
+    def transcribe(self, audioData):
+        """
+        识别一段音频；启用自适应质量时按当前档位选择模型与解码参数，并把本次耗时反馈给 qualityLadder
+        """
+        if self.qualityLadder is None:
+            return AsrService.transcribe(audioData, vadFilter=self.modelVadFilter, modelKey=self.modelKey, priority=self.priority)
+
+        # 记录本次实际使用的档位，结果按它标注
+        self.qualityLevel = self.qualityLadder.getLevelName()
+        startTime = time.perf_counter()
+        segments = AsrService.transcribe(
+            audioData,
+            vadFilter=self.modelVadFilter,
+            modelKey=self.qualityLadder.getModelKey(),
+            priority=self.priority,
+            decodeOptions=self.qualityLadder.getDecodeOptions()
+        )
+        self.qualityLadder.update(len(audioData) / self.sampleRate, time.perf_counter() - startTime, self.backlogSec)
+        return segments
+
+    def resetInterim(self):
+        """
+        缓冲区切分后，中间结果状态从新的一段重新开始
+        """
+        self.hypothesisList = []
+        self.committedText = ""
+        self.interimSegments = []
+        self.samplesSinceDecode = 0
+
+    def trimCommitted(self, cutIndex):
+        """
+        强制切分只识别 [0, cutIndex)，已确认文本来自整个缓冲区的中间结果，
+        只保留结束时间不晚于切分点的片段所覆盖的部分，切分点之后的文字留给下一段
+        """
+        if not self.committedText:
+            return
+        cutSec = cutIndex / self.sampleRate
+        cutText = "".join(seg['text'] for seg in self.interimSegments if seg['end'] <= cutSec)
+        self.committedText = StringTool.commonPrefix([self.committedText, cutText])
+
+    def alignToCommitted(self, segments):
+        """
+        保证 final 结果以已确认文本开头: 若重新识别改写了已确认部分，按字符位置还原
+        """
+        committedText = self.committedText
+        finalText = "".join(seg['text'] for seg in segments)
+        if not committedText or finalText.startswith(committedText) or not segments:
+            return segments
+
+        fixedText = committedText + finalText[len(committedText):]
+        alignedList = []
+        position = 0
+        for index, seg in enumerate(segments):
+            if index == len(segments) - 1:
+                text = fixedText[position:]
+            else:
+                text = fixedText[position:position + len(seg['text'])]
+            position += len(seg['text'])
+            alignedList.append(dict(seg, text=text))
+        return alignedList
+
+    def processBuffer(self, endIndex, isFinal=False):
+        """
+        处理缓冲区中 [0, endIndex) 的音频
+        """
+        if endIndex == 0:
+            return
+
+        fullData = self.audioBuffer.view(endIndex)
+        bufferDuration = endIndex / self.sampleRate
+
+        # 计算这段 buffer 在整个流中的绝对起始时间
+        bufferStartTime = self.audioBuffer.startSample / self.sampleRate
+
+        # 只有当 buffer 长度足够长才识别 (例如 0.5s)
+        if bufferDuration > 0.5:
+            if self.batchSize > 1:
+                # 缓冲区会被复用，排队的数据需要拷贝
+                self.pendingList.append((fullData.copy(), bufferStartTime, isFinal, self.afterSeam))
+                if len(self.pendingList) >= self.batchSize:
+                    self.flushPending()
+            else:
+                segments = self.transcribe(fullData)
+                if self.interimSamples > 0:
+                    segments = self.alignToCommitted(segments)
+                self.emitSegments(segments, bufferStartTime, isFinal, self.afterSeam)
+
+    def flushPending(self):
+        """
+        批量识别队列中的所有音频段
+        """
+        if not self.pendingList:
+            return
+        resultList = AsrService.transcribeBatch([item[0] for item in self.pendingList], modelKey=self.modelKey, priority=self.priority)
+        for (fullData, bufferStartTime, isFinal, afterSeam), segments in zip(self.pendingList, resultList):
+            self.emitSegments(segments, bufferStartTime, isFinal, afterSeam)
+        self.pendingList = []
+
+    def emitSegments(self, segments, bufferStartTime, isFinal, afterSeam):
+        """
+        把识别片段换算为绝对时间并回调
+        """
+        lastText = ""
+        # 遍历所有识别出的片段 (Whisper 内部 VAD 切分出的句子)
+        for index, seg in enumerate(segments):
+            text = seg['text']
+            if index == 0 and afterSeam:
+                text = StringTool.dropOverlap(self.lastText, text)
+                if StringTool.isEmpty(text):
+                    continue
+
+            # 计算该句子的绝对时间
+            absStart = bufferStartTime + seg['start']
+            absEnd = bufferStartTime + seg['end']
+
+            outData = {
+                "timestamp": datetime.now().isoformat(),
+                "audioTimeStart": round(absStart, 2),
+                "audioTimeEnd": round(absEnd, 2),
+                "text": text,
+                "type": "final" if isFinal else "interim"
+                # 注: 静音/窗口切割后的识别都视为这一段的 final
+                # 真正的 interim (边说边出字) 由 processInterim 重复识别增长中的缓冲区产生
+            }
+            if self.qualityLevel is not None:
+                outData["qualityLevel"] = self.qualityLevel
+            startTime = MetricTool.startTimer()
+            self.onResultCallback(outData)
+            MetricTool.stopTimer("callback", startTime)
+            MetricTool.addCounter("segmentsOut")
+            lastText = text
+        self.lastText = lastText
@@ -0,0 +1,302 @@
+import os
+import sys
+import csv
+import json
+import time
+import threading
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, CancelledError, BrokenExecutor, wait, FIRST_COMPLETED
+from utils.LogTool import LogTool
+from utils.FileTool import FileTool
+from utils.ConfigTool import ConfigTool
+from utils.AudioTool import AudioTool
+from core.BatchProcessor import BatchProcessor
+
+class WatchProcessor:
+    """
+    目录监视模式 (main.py --watch): 常驻运行，持续识别录音设备新写入的文件
+    1. 每 watch.pollIntervalSec 秒用 os.scandir 递归扫描各目录树，已处理过的路径只查集合，不再 stat
+    2. 新文件的大小与修改时间连续 watch.stableSec 秒不变才认为写完，之后放入识别队列
+    3. 识别沿用 BatchProcessor.processFile (单进程时在一个后台线程中，多 Worker 时在常驻进程池中)，扫描不会被识别阻塞
+    4. 处理完成的路径追加到 seen.jsonl (持久化的已处理集合)，重启后不会重复识别
+    5. 识别失败的文件延迟 watch.retryDelaySec 秒后重试，最多 watch.maxRetries 次；
+       被取消、中断或 Worker 进程崩溃不算文件的结果，不写入 seen.jsonl，下次启动时重新识别
+    输出目录 watch.outputDir: details/ (按输入目录的相对路径分子目录)、summary.csv、seen.jsonl
+    汇总行与识别结果库以相对路径 (getFileKey) 标识文件
+    """
+    _stopEvent = threading.Event()
+
+    @staticmethod
+    def run(dirList, outputDir=None, workerCount=None):
+        """
+        监视 dirList 下的目录树 (阻塞，stop 后返回)
+        workerCount: 识别 Worker 数，None 表示读取 batch.workerCount；1 时在本进程识别 (StreamServer 同时监视目录时使用)
+        """
+        outputDir = outputDir or ConfigTool.get("watch.outputDir", "app/out/watch")
+        pollSec = ConfigTool.get("watch.pollIntervalSec", 2.0)
+        stableSec = ConfigTool.get("watch.stableSec", 3.0)
+        maxRetries = max(1, ConfigTool.get("watch.maxRetries", 3))
+        retryDelaySec = ConfigTool.get("watch.retryDelaySec", 30.0)
+        rootList = [os.path.abspath(dirPath) for dirPath in dirList]
+        detailsOutDir = os.path.join(outputDir, "details")
+        seenFile = os.path.join(outputDir, "seen.jsonl")
+        csvFile = os.path.join(outputDir, "summary.csv")
+        FileTool.ensureDir(os.path.join(detailsOutDir, "placeholder"))
+
+        # 已处理集合，以及上次运行中识别失败、尚未用完重试次数的文件 {路径: 已尝试次数}
+        seenSet, attemptMap = WatchProcessor.loadSeen(seenFile, maxRetries)
+        formatSet = AudioTool.getFormatSet()
+        # 路径 -> (大小, 修改时间, 首次观察到该状态的时刻)
+        pendingMap = {}
+        readyList = []
+        futureMap = {}
+        # 失败后等待重试的文件 {路径: 可重试时刻}；本次运行不再尝试的文件 (Worker 进程反复崩溃，下次启动时重试)
+        retryMap = {}
+        skipSet = set()
+
+        # 监视模式的文件数不限，Worker 数只由配置决定
+        if workerCount is None:
+            workerCount = BatchProcessor.getWorkerCount(sys.maxsize)
+        # 已提交但未完成的文件数上限，其余留在 readyList 中，便于退出时不丢失排队信息
+        maxInFlight = workerCount * max(1, ConfigTool.get("watch.maxPendingPerWorker", 2))
+        executor = WatchProcessor.createExecutor(workerCount)
+        WatchProcessor._stopEvent.clear()
+        LogTool.info(f"WatchProcessor started: {', '.join(rootList)} ({len(seenSet)} files already seen, {workerCount} workers)")
+
+        csvExists = os.path.exists(csvFile)
+        with open(csvFile, 'a', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=BatchProcessor.fieldNames)
+            if not csvExists:
+                writer.writeheader()
+                f.flush()
+
+            def onFileDone(future, isStopping=False):
+                """
+                记录一个文件的结果，返回进程池是否已损坏 (需要重建)
+                """
+                filePath = futureMap.pop(future)
+                summaryRow, isPoolBroken = WatchProcessor.getResult(future, filePath, WatchProcessor.getFileKey(rootList, filePath))
+                if summaryRow is None:
+                    # 被取消、中断或 Worker 进程崩溃: 与文件本身无关，不记入 seen.jsonl
+                    if isPoolBroken and not isStopping:
+                        attemptMap[filePath] = attemptMap.get(filePath, 0) + 1
+                        if attemptMap[filePath] >= maxRetries:
+                            LogTool.error(f"Worker crashed {attemptMap[filePath]} times on {filePath}, skipped until next start")
+                            skipSet.add(filePath)
+                        else:
+                            retryMap[filePath] = time.monotonic() + retryDelaySec
+                    return isPoolBroken
+
+                attempt = attemptMap.get(filePath, 0) + 1
+                isFinal = summaryRow["status"] == "success" or attempt >= maxRetries
+                WatchProcessor.recordSeen(seenFile, filePath, summaryRow, attempt, isFinal)
+                writer.writerow(summaryRow)
+                f.flush()
+                if isFinal:
+                    seenSet.add(filePath)
+                    attemptMap.pop(filePath, None)
+                else:
+                    # 识别失败 (如文件仍在写入导致解码错误): 延迟后重新等待大小稳定再识别
+                    attemptMap[filePath] = attempt
+                    retryMap[filePath] = time.monotonic() + retryDelaySec
+                    LogTool.info(f"Will retry {filePath} in {retryDelaySec}s (attempt {attempt}/{maxRetries})")
+                return False
+
+            try:
+                nextScanTime = 0.0
+                while not WatchProcessor._stopEvent.is_set():
+                    now = time.monotonic()
+                    if now >= nextScanTime:
+                        nextScanTime = now + pollSec
+                        for filePath in [filePath for filePath, retryTime in retryMap.items() if retryTime <= now]:
+                            del retryMap[filePath]
+                        busySet = set(futureMap.values()) | set(readyList) | retryMap.keys() | skipSet
+                        fileList = [item for item in WatchProcessor.scanTree(rootList, formatSet, seenSet) if item[0] not in busySet]
+                        for filePath, size, mtime in fileList:
+                            if WatchProcessor.checkStable(pendingMap, filePath, size, mtime, now, stableSec):
+                                readyList.append(filePath)
+                        # 写完前被删除或改名的文件移出待定表
+                        for filePath in pendingMap.keys() - {item[0] for item in fileList}:
+                            del pendingMap[filePath]
+
+                    while readyList and len(futureMap) < maxInFlight:
+                        filePath = readyList.pop(0)
+                        fileKey = WatchProcessor.getFileKey(rootList, filePath)
+                        fileDetailsDir = WatchProcessor.getDetailsDir(detailsOutDir, fileKey)
+                        futureMap[executor.submit(BatchProcessor.processFile, filePath, fileDetailsDir, fileKey)] = filePath
+
+                    # 等待识别完成或下一次扫描，识别完成时立即记录
+                    timeout = max(0.0, nextScanTime - time.monotonic())
+                    if futureMap:
+                        doneSet, _ = wait(list(futureMap), timeout=timeout, return_when=FIRST_COMPLETED)
+                    else:
+                        WatchProcessor._stopEvent.wait(timeout)
+                        doneSet = set()
+                    isPoolBroken = False
+                    for future in doneSet:
+                        isPoolBroken = onFileDone(future) or isPoolBroken
+                    if isPoolBroken:
+                        # 进程池中有 Worker 崩溃后整个池不可用，其余提交的文件同样以失败返回，重建进程池后重试
+                        LogTool.error("Watch worker pool broken, restarting workers")
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        executor = WatchProcessor.createExecutor(workerCount)
+            except KeyboardInterrupt:
+                LogTool.info("WatchProcessor interrupted.")
+            finally:
+                # 正在识别的文件等待完成并记录；排队中的取消，不记入 seen.jsonl，下次启动时重新识别
+                executor.shutdown(wait=True, cancel_futures=True)
+                for future in list(futureMap):
+                    onFileDone(future, isStopping=True)
+        LogTool.info(f"WatchProcessor stopped. {len(readyList) + len(retryMap) + len(skipSet)} files left for next start.")
+
+    @staticmethod
+    def stop():
+        WatchProcessor._stopEvent.set()
+
+    @staticmethod
+    def createExecutor(workerCount):
+        """
+        单 Worker 时在本进程的后台线程中识别 (使用主进程已加载的模型)，否则与批量模式相同的 spawn 进程池
+        """
+        if workerCount <= 1:
+            return ThreadPoolExecutor(max_workers=1, thread_name_prefix="watchWorker")
+        threadsPerWorker = BatchProcessor.getThreadsPerWorker(workerCount)
+        LogTool.info(f"Watch worker pool: {workerCount} workers x {threadsPerWorker} threads")
+        return ProcessPoolExecutor(
+            max_workers=workerCount,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=BatchProcessor.initWorker,
+            initargs=(ConfigTool._config, threadsPerWorker, LogTool.getWorkerQueue())
+        )
+
+    @staticmethod
+    def scanTree(rootList, formatSet, seenSet):
+        """
+        递归扫描目录树，返回未处理过的音频文件 [(路径, 大小, 修改时间), ...]
+        隐藏文件与目录 (以 . 开头，常见于写入中的临时文件) 跳过，不跟随目录符号链接
+        """
+        fileList = []
+        dirStack = list(rootList)
+        while dirStack:
+            dirPath = dirStack.pop()
+            try:
+                with os.scandir(dirPath) as entryIterator:
+                    for entry in entryIterator:
+                        if entry.name.startswith('.'):
+                            continue
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                dirStack.append(entry.path)
+                                continue
+                            if entry.path in seenSet or os.path.splitext(entry.name)[1].lstrip('.').lower() not in formatSet:
+                                continue
+                            if not entry.is_file():
+                                continue
+                            stat = entry.stat()
+                        except OSError:
+                            # 扫描期间被删除或移动
+                            continue
+                        fileList.append((entry.path, stat.st_size, stat.st_mtime))
+            except OSError as e:
+                LogTool.error(f"Failed to scan directory: {dirPath}", e)
+        return fileList
+
+    @staticmethod
+    def checkStable(pendingMap, filePath, size, mtime, now, stableSec):
+        """
+        大小与修改时间自首次观察起 stableSec 秒内不变 (且非空) 时返回 True 并移出待定表
+        """
+        state = pendingMap.get(filePath)
+        if state is None or state[0] != size or state[1] != mtime:
+            pendingMap[filePath] = (size, mtime, now)
+            return False
+        if size > 0 and now - state[2] >= stableSec:
+            del pendingMap[filePath]
+            return True
+        return False
+
+    @staticmethod
+    def getFileKey(rootList, filePath):
+        """
+        文件标识: 相对于所在监视目录的路径 (分隔符统一为 /)，监视多个目录时加上目录序号前缀
+        用于汇总行与识别结果库，不同子目录下的同名文件互不覆盖
+        """
+        for index, rootPath in enumerate(rootList):
+            if filePath.startswith(rootPath + os.sep):
+                relPath = os.path.relpath(filePath, rootPath).replace(os.sep, "/")
+                return f"{index}/{relPath}" if len(rootList) > 1 else relPath
+        return os.path.basename(filePath)
+
+    @staticmethod
+    def getDetailsDir(detailsOutDir, fileKey):
+        """
+        详情按文件标识中的目录部分存放
+        """
+        relDir = os.path.dirname(fileKey)
+        outDir = os.path.join(detailsOutDir, *relDir.split("/")) if relDir else detailsOutDir
+        FileTool.ensureDir(os.path.join(outDir, "placeholder"))
+        return outDir
+
+    @staticmethod
+    def getResult(future, filePath, fileKey):
+        """
+        返回 (汇总行, 进程池是否损坏)；被取消、中断或进程池损坏时汇总行为 None (不是文件本身的结果)
+        """
+        try:
+            return future.result(), False
+        except CancelledError:
+            return None, False
+        except BrokenExecutor as e:
+            LogTool.error(f"Worker pool failed on {filePath}", e)
+            return None, True
+        except (KeyboardInterrupt, SystemExit):
+            LogTool.info(f"Interrupted while processing {filePath}")
+            return None, False
+        except Exception as e:
+            # processFile 之外的异常 (如结果无法传回主进程)，按该文件识别失败处理
+            LogTool.error(f"Worker failed on {filePath}", e)
+            return {
+                "filename": fileKey,
+                "full_text": f"Error: {str(e)}",
+                "status": "error"
+            }, False
+
+    @staticmethod
+    def recordSeen(seenFile, filePath, summaryRow, attempt, isFinal):
+        """
+        追加一条处理记录: 成功或失败次数用完 (final) 的文件此后不再识别，其余失败记录只用于重启后累计重试次数
+        """
+        record = {"path": filePath, "status": summaryRow["status"], "attempt": attempt, "final": isFinal, "finishTime": datetime.now().isoformat()}
+        try:
+            stat = os.stat(filePath)
+            record.update({"size": stat.st_size, "mtime": stat.st_mtime})
+        except OSError:
+            pass
+        if not FileTool.appendJsonLine(seenFile, record):
+            raise IOError(f"Failed to write seen list: {seenFile}")
+
+    @staticmethod
+    def loadSeen(seenFile, maxRetries):
+        """
+        读取 seen.jsonl，返回 (已处理路径集合, {未用完重试次数的失败路径: 已尝试次数})
+        """
+        seenSet = set()
+        attemptMap = {}
+        if not os.path.exists(seenFile):
+            return seenSet, attemptMap
+        BatchProcessor.trimPartialLine(seenFile)
+        with open(seenFile, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    filePath = record["path"]
+                except (ValueError, KeyError):
+                    continue
+                # 旧记录没有 final 字段，视为已处理
+                if record.get("final", True) or record.get("attempt", 0) >= maxRetries:
+                    seenSet.add(filePath)
+                    attemptMap.pop(filePath, None)
+                else:
+                    attemptMap[filePath] = record.get("attempt", 1)
+        return seenSet, attemptMap
@@ -0,0 +1,148 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from utils.LogTool import LogTool
+from utils.ConfigTool import ConfigTool
+
+class TranscriptCacheDao:
+    """
+    识别结果缓存 (内容寻址)
+    - key = hash(音频内容 + 影响输出的识别参数)
+    - 两级存储: 内存 LRU (cache.memoryItems 条) + 磁盘 JSON 文件 (cache.maxDiskMb，按最近使用时间淘汰)
+    """
+    _memoryCache = OrderedDict()
+    # 磁盘索引: key -> 文件大小，按最近使用顺序排列 (首次访问时扫描目录建立)
+    _diskIndex = None
+    _diskBytes = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def makeKey(audioData, settingDict):
+        """
+        根据音频内容与识别参数生成缓存 key
+        """
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(audioData.tobytes())
+        hasher.update(json.dumps(settingDict, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        return hasher.hexdigest()
+
+    @staticmethod
+    def getPath(key):
+        cacheDir = ConfigTool.get("cache.dir", "app/data/cache")
+        return os.path.join(cacheDir, key[:2], f"{key}.json")
+
+    @staticmethod
+    def get(key):
+        """
+        读取缓存，未命中返回 None
+        """
+        with TranscriptCacheDao._lock:
+            memoryCache = TranscriptCacheDao._memoryCache
+            if key in memoryCache:
+                memoryCache.move_to_end(key)
+                return memoryCache[key]
+
+            diskIndex = TranscriptCacheDao.loadIndex()
+            if key not in diskIndex:
+                return None
+
+            filePath = TranscriptCacheDao.getPath(key)
+            f = None
+            try:
+                f = open(filePath, 'r', encoding='utf-8')
+                segments = json.load(f)
+            except FileNotFoundError:
+                # 文件被其他进程淘汰
+                TranscriptCacheDao._diskBytes -= diskIndex.pop(key)
+                return None
+            except Exception as e:
+                LogTool.error(f"Failed to read cache file: {filePath}", e)
+                raise e
+            finally:
+                if f is not None:
+                    f.close()
+
+            # 更新修改时间，重启后重建索引时仍能保持 LRU 顺序
+            os.utime(filePath)
+            diskIndex.move_to_end(key)
+            TranscriptCacheDao.putMemory(key, segments)
+            return segments
+
+    @staticmethod
+    def save(key, segments):
+        """
+        写入缓存 (内存 + 磁盘)，超出磁盘上限时淘汰最久未使用的条目
+        """
+        with TranscriptCacheDao._lock:
+            TranscriptCacheDao.putMemory(key, segments)
+
+            diskIndex = TranscriptCacheDao.loadIndex()
+            filePath = TranscriptCacheDao.getPath(key)
+            tempPath = f"{filePath}.{os.getpid()}.tmp"
+            f = None
+            try:
+                os.makedirs(os.path.dirname(filePath), exist_ok=True)
+                f = open(tempPath, 'w', encoding='utf-8')
+                json.dump(segments, f, ensure_ascii=False)
+                f.close()
+                f = None
+                # 先写临时文件再替换，多进程同时读写时不会读到半个文件
+                os.replace(tempPath, filePath)
+            except Exception as e:
+                LogTool.error(f"Failed to write cache file: {filePath}", e)
+                raise e
+            finally:
+                if f is not None:
+                    f.close()
+
+            TranscriptCacheDao._diskBytes -= diskIndex.pop(key, 0)
+            diskIndex[key] = os.path.getsize(filePath)
+            TranscriptCacheDao._diskBytes += diskIndex[key]
+            TranscriptCacheDao.evictDisk()
+
+    @staticmethod
+    def putMemory(key, segments):
+        memoryCache = TranscriptCacheDao._memoryCache
+        memoryCache[key] = segments
+        memoryCache.move_to_end(key)
+        maxItems = ConfigTool.get("cache.memoryItems", 256)
+        while len(memoryCache) > maxItems:
+            memoryCache.popitem(last=False)
+
+    @staticmethod
+    def loadIndex():
+        """
+        扫描缓存目录建立磁盘索引 (按修改时间从旧到新)
+        """
+        if TranscriptCacheDao._diskIndex is not None:
+            return TranscriptCacheDao._diskIndex
+
+        entryList = []
+        cacheDir = ConfigTool.get("cache.dir", "app/data/cache")
+        if os.path.isdir(cacheDir):
+            for subDir in os.scandir(cacheDir):
+                if not subDir.is_dir():
+                    continue
+                for entry in os.scandir(subDir.path):
+                    if entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        entryList.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+
+        entryList.sort()
+        TranscriptCacheDao._diskIndex = OrderedDict((key, size) for mtime, key, size in entryList)
+        TranscriptCacheDao._diskBytes = sum(size for mtime, key, size in entryList)
+        return TranscriptCacheDao._diskIndex
+
+    @staticmethod
+    def evictDisk():
+        maxBytes = ConfigTool.get("cache.maxDiskMb", 512) * 1024 * 1024
+        diskIndex = TranscriptCacheDao._diskIndex
+        while TranscriptCacheDao._diskBytes > maxBytes and diskIndex:
+            key, size = diskIndex.popitem(last=False)
+            TranscriptCacheDao._diskBytes -= size
+            try:
+                os.remove(TranscriptCacheDao.getPath(key))
+            except FileNotFoundError:
+                pass
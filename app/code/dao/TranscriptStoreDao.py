@@ -0,0 +1,193 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from utils.LogTool import LogTool
+from utils.ConfigTool import ConfigTool
+
+class TranscriptStoreDao:
+    """
+    识别结果库 (SQLite，store.dbPath)
+    - segment 表: 每条 final 结果一行，(file, startSec) 索引支持按文件取时间段
+    - segment_fts 表 (FTS5): 中文按相邻两字切分 (bigram)，英文/数字按整词，短语检索转换为词序列的 phrase 查询
+      查询中含孤立汉字 (如 "A股" 中的 "股") 时该字不在索引中，改为 LIKE 扫描原文
+    - file 为调用方给出的文件标识 (批量模式为文件名，监视模式为相对路径，单文件模式为绝对路径)
+    - 一个文件的全部结果在一个事务中写入，重新识别同一文件时先删除旧结果
+    - 每个线程一个连接，WAL 模式，批量 Worker 进程可同时写入
+    """
+    _local = threading.local()
+
+    @staticmethod
+    def getConnection():
+        dbPath = ConfigTool.get("store.dbPath", "app/data/transcripts.db")
+        conn = getattr(TranscriptStoreDao._local, "conn", None)
+        if conn is not None and TranscriptStoreDao._local.dbPath == dbPath:
+            return conn
+        if conn is not None:
+            # store.dbPath 已变化
+            conn.close()
+
+        conn = None
+        try:
+            dbDir = os.path.dirname(dbPath)
+            if dbDir and not os.path.exists(dbDir):
+                os.makedirs(dbDir, exist_ok=True)
+            conn = sqlite3.connect(dbPath, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS segment (
+                    id INTEGER PRIMARY KEY,
+                    file TEXT NOT NULL,
+                    channel INTEGER,
+                    startSec REAL NOT NULL,
+                    endSec REAL NOT NULL,
+                    text TEXT NOT NULL,
+                    createdAt TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_segment_file_time ON segment (file, startSec);
+                CREATE VIRTUAL TABLE IF NOT EXISTS segment_fts USING fts5 (tokens);
+            """)
+        except Exception as e:
+            LogTool.error(f"Failed to open transcript store: {dbPath}", e)
+            if conn is not None:
+                conn.close()
+            raise e
+        TranscriptStoreDao._local.conn = conn
+        TranscriptStoreDao._local.dbPath = dbPath
+        return conn
+
+    @staticmethod
+    def close():
+        conn = getattr(TranscriptStoreDao._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            TranscriptStoreDao._local.conn = None
+
+    @staticmethod
+    def toTokens(text):
+        """
+        切分索引/查询用的词: 连续的中日韩文字按相邻两字切分 (单字保留单字)，其他字母数字按整词并转小写
+        """
+        tokenList = []
+        run = []
+        runIsCjk = False
+
+        def flush():
+            if not run:
+                return
+            if runIsCjk:
+                if len(run) == 1:
+                    tokenList.append(run[0])
+                else:
+                    tokenList.extend(run[index] + run[index + 1] for index in range(len(run) - 1))
+            else:
+                tokenList.append("".join(run).lower())
+            run.clear()
+
+        for char in text:
+            isCjk = TranscriptStoreDao.isCjk(char)
+            if not (isCjk or char.isalnum()):
+                flush()
+                continue
+            if run and isCjk != runIsCjk:
+                flush()
+            runIsCjk = isCjk
+            run.append(char)
+        flush()
+        return tokenList
+
+    @staticmethod
+    def isCjk(char):
+        code = ord(char)
+        return 0x3400 <= code <= 0x9FFF or 0xF900 <= code <= 0xFAFF or 0x3040 <= code <= 0x30FF or 0xAC00 <= code <= 0xD7AF or 0x20000 <= code <= 0x2FFFF
+
+    @staticmethod
+    def ingest(fileKey, resultList):
+        """
+        写入一个文件的识别结果 (只取 final)，同一文件的旧结果先删除，整体为一个事务；返回写入条数
+        """
+        rowList = [
+            (fileKey, outData.get("channel"), outData["audioTimeStart"], outData["audioTimeEnd"], outData["text"])
+            for outData in resultList
+            if outData.get("type", "final") == "final" and outData.get("text", "").strip()
+        ]
+        conn = TranscriptStoreDao.getConnection()
+        createdAt = datetime.now().isoformat()
+        cursor = None
+        try:
+            with conn:
+                cursor = conn.cursor()
+                TranscriptStoreDao.deleteFile(cursor, fileKey)
+                for row in rowList:
+                    cursor.execute(
+                        "INSERT INTO segment (file, channel, startSec, endSec, text, createdAt) VALUES (?, ?, ?, ?, ?, ?)",
+                        row + (createdAt,)
+                    )
+                    cursor.execute("INSERT INTO segment_fts (rowid, tokens) VALUES (?, ?)", (cursor.lastrowid, " ".join(TranscriptStoreDao.toTokens(row[4]))))
+        except Exception as e:
+            LogTool.error(f"Failed to ingest transcript: {fileKey}", e)
+            raise e
+        finally:
+            if cursor is not None:
+                cursor.close()
+        return len(rowList)
+
+    @staticmethod
+    def deleteFile(cursor, fileKey):
+        cursor.execute("DELETE FROM segment_fts WHERE rowid IN (SELECT id FROM segment WHERE file = ?)", (fileKey,))
+        cursor.execute("DELETE FROM segment WHERE file = ?", (fileKey,))
+
+    @staticmethod
+    def search(phrase, limit=100):
+        """
+        短语检索: 返回包含该短语的结果 [{"file", "channel", "audioTimeStart", "audioTimeEnd", "text"}, ...]，按文件与时间排序
+        """
+        tokenList = TranscriptStoreDao.toTokens(phrase)
+        if not tokenList:
+            return []
+        columns = "s.file, s.channel, s.startSec, s.endSec, s.text"
+        # 孤立的汉字 (前后不是汉字) 只有单字，不在 bigram 索引中，退回扫描原文
+        if any(len(token) == 1 and TranscriptStoreDao.isCjk(token) for token in tokenList):
+            likePattern = "%" + phrase.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            sql = f"SELECT {columns} FROM segment s WHERE s.text LIKE ? ESCAPE '\\' ORDER BY s.file, s.startSec LIMIT ?"
+            params = (likePattern, limit)
+        else:
+            sql = f"SELECT {columns} FROM segment_fts f JOIN segment s ON s.id = f.rowid WHERE segment_fts MATCH ? ORDER BY s.file, s.startSec LIMIT ?"
+            params = (TranscriptStoreDao.toPhraseQuery(tokenList), limit)
+        return TranscriptStoreDao.query(sql, params)
+
+    @staticmethod
+    def toPhraseQuery(tokenList):
+        return '"' + " ".join(token.replace('"', '""') for token in tokenList) + '"'
+
+    @staticmethod
+    def fetchRange(fileKey, startSec, endSec):
+        """
+        取一个文件中与 [startSec, endSec) 有重叠的结果，按时间排序
+        """
+        return TranscriptStoreDao.query(
+            "SELECT file, channel, startSec, endSec, text FROM segment WHERE file = ? AND startSec < ? AND endSec > ? ORDER BY startSec",
+            (fileKey, endSec, startSec)
+        )
+
+    @staticmethod
+    def query(sql, params):
+        conn = TranscriptStoreDao.getConnection()
+        cursor = None
+        try:
+            cursor = conn.execute(sql, params)
+            return [TranscriptStoreDao.toDict(row) for row in cursor]
+        except Exception as e:
+            LogTool.error("Failed to query transcript store", e)
+            raise e
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    @staticmethod
+    def toDict(row):
+        outData = {"file": row[0], "audioTimeStart": row[2], "audioTimeEnd": row[3], "text": row[4]}
+        if row[1] is not None:
+            outData["channel"] = row[1]
+        return outData
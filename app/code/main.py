@@ -12,10 +12,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from utils.LogTool import LogTool
 from utils.ConfigTool import ConfigTool
-from utils.FileTool import FileTool
+from utils.WriterTool import WriterTool
+from utils.MetricTool import MetricTool
 from core.AsrService import AsrService
-from core.StreamProcessor import StreamProcessor
-from core.BatchProcessor import BatchProcessor
+from core.DaemonServer import DaemonServer
+# 各模式的处理器在分支内按需导入，减少启动耗时
 
 def main():
     parser = argparse.ArgumentParser(description="ASRBrain CLI - Offline Speech Recognition")
@@ -23,33 +24,101 @@ def main():
     # 互斥组：单文件模式 vs 批量模式
     group = parser.add_mutually_exclusive_group()
     group.add_argument("-i", "--input", help="Single input audio file path")
-    group.add_argument("--batch", help="Batch input directory path (processes all .wav files)")
+    group.add_argument("--batch", help="Batch input directory path (processes all wav/flac/ogg files)")
+    group.add_argument("--watch", nargs="+", metavar="DIR", help="Keep running and transcribe new audio files in the given directory trees once they stop growing (watch.*)")
+    group.add_argument("--server", action="store_true", help="Start WebSocket streaming server on server.port")
+    group.add_argument("--daemon", action="store_true", help="Keep the model loaded and serve -i jobs over a local Unix socket (daemon.socketPath)")
+    group.add_argument("--search", help="Phrase search in the transcript store (store.dbPath), no model is loaded")
+    group.add_argument("--fetch", nargs=3, metavar=("FILE", "START", "END"), help="Print stored results of FILE (as shown by --search) overlapping [START, END) seconds, no model is loaded")
     
     parser.add_argument("-o", "--output", help="Output JSONL file path (only for single file mode)")
+    parser.add_argument("--split", action="store_true", help="Split a long input file at silences and transcribe the pieces in parallel worker processes (single file mode)")
+    parser.add_argument("--channels", action="store_true", help="Transcribe each channel of a multichannel file separately and merge the results by time with a channel field (single file mode)")
+    parser.add_argument("--model", help="Model size for single file mode, e.g. tiny / small (must be in modelPool.allowedSizes unless it is the default)")
+    parser.add_argument("--resume", help="Resume an existing batch output directory (batch mode only)")
+    parser.add_argument("--env", default="dev", choices=["dev", "prod"], help="Config environment (loads appDev.yaml / appProd.yaml)")
     
     args = parser.parse_args()
 
     LogTool.info("=== ASRBrain CLI Start ===")
     
     # 1. 加载配置
-    ConfigTool.load("appDev.yaml")
+    ConfigTool.load(f"app{args.env.capitalize()}.yaml")
     ConfigTool.load("models.yaml")
+    if ConfigTool.get("log.queued", False):
+        LogTool.enableQueue(ConfigTool.get("log.queueSize", 10000), ConfigTool.get("log.rateLimit", {}))
+    MetricTool.setup()
 
-    # 2. 初始化模型
-    if not AsrService.initModel():
+    # 识别结果库查询，不需要模型
+    if args.search or args.fetch:
+        from dao.TranscriptStoreDao import TranscriptStoreDao
+        if args.search:
+            resultList = TranscriptStoreDao.search(args.search)
+        else:
+            resultList = TranscriptStoreDao.fetchRange(args.fetch[0], float(args.fetch[1]), float(args.fetch[2]))
+        for data in resultList:
+            channelText = f" ch{data['channel']}" if "channel" in data else ""
+            print(f"{data['file']}{channelText} [{data['audioTimeStart']:.2f}s - {data['audioTimeEnd']:.2f}s]: {data['text']}")
+        LogTool.info(f"Transcript store query returned {len(resultList)} results.")
+        return
+
+    # 2. 初始化模型 (单文件模式且常驻服务在运行时，作为客户端提交任务，不加载模型；
+    #    批量 / 监视 / --split 使用多进程 Worker 时由各 Worker 加载，主进程不加载，文件太少退回单进程时再按需加载)
+    if args.model and not AsrService.isAllowedModel(args.model):
+        LogTool.error(f"Model not allowed: {args.model}. Add it to modelPool.allowedSizes in models.yaml.")
+        return
+    isSingleFile = not (args.server or args.daemon or args.batch or args.watch)
+    modelKey = AsrService.getModelKey(modelSize=args.model if isSingleFile else None)
+    useDaemon = isSingleFile and not args.split and not args.channels and DaemonServer.isRunning()
+    useWorkerPool = False
+    if args.batch or args.watch or (isSingleFile and args.split):
+        from core.BatchProcessor import BatchProcessor
+        useWorkerPool = BatchProcessor.usesWorkerPool()
+    if useWorkerPool:
+        LogTool.info("Using worker processes, model is loaded by each worker.")
+    elif not useDaemon and not AsrService.initModel(modelKey=modelKey):
         LogTool.error("Model init failed. Check models.yaml and app/models directory.")
         return
 
+    # 常驻进程监视配置文件: 解码参数改动从下一段生效，默认模型改动在后台加载后切换 (Worker 进程模式下主进程没有模型，不监视)
+    if (args.server or args.daemon or (args.watch and not useWorkerPool)) and ConfigTool.get("configWatch.enabled", False):
+        ConfigTool.addListener(AsrService.onConfigChange)
+        ConfigTool.startWatcher(ConfigTool.get("configWatch.intervalSec", 2.0))
+
     # 3. 执行逻辑分支
-    if args.batch:
+    if args.daemon:
+        # --- 常驻服务模式 ---
+        DaemonServer.run()
+
+    elif args.server:
+        # --- 服务模式 (WebSocket 实时流) ---
+        from core.StreamServer import StreamServer
+        StreamServer.run()
+
+    elif args.batch:
         # --- 批量模式 ---
         inputDir = args.batch
         if not os.path.exists(inputDir):
             LogTool.error(f"Batch input directory not found: {inputDir}")
             return
         
+        if args.resume and not os.path.isdir(args.resume):
+            LogTool.error(f"Resume directory not found: {args.resume}")
+            return
+
         LogTool.info(f"Entering Batch Mode: {inputDir}")
-        BatchProcessor.run(inputDir)
+        BatchProcessor.run(inputDir, resumeDir=args.resume)
+
+    elif args.watch:
+        # --- 目录监视模式 (常驻，Ctrl+C 退出) ---
+        missingList = [dirPath for dirPath in args.watch if not os.path.isdir(dirPath)]
+        if missingList:
+            LogTool.error(f"Watch directory not found: {', '.join(missingList)}")
+            return
+
+        LogTool.info(f"Entering Watch Mode: {', '.join(args.watch)}")
+        from core.WatchProcessor import WatchProcessor
+        WatchProcessor.run(args.watch)
 
     else:
         # --- 单文件模式 (默认) ---
@@ -73,17 +142,50 @@ def main():
             outputFile = os.path.join("app/out", f"session_{sessionTime}.jsonl")
         
         # 定义回调
+        storeEnabled = ConfigTool.get("store.enabled", False)
+        storeList = []
         def onResult(data):
             print(f"\n[Result {data['audioTimeEnd']}s]: {data['text']}")
-            FileTool.appendJsonLine(outputFile, data)
+            WriterTool.appendJsonLine(outputFile, data)
+            if storeEnabled and data['type'] == 'final':
+                storeList.append(data)
 
         # 运行识别
         chunkSize = ConfigTool.get("test.chunkSize", 8000)
         silenceThreshold = ConfigTool.get("test.silenceThreshold", 0.005)
         
         LogTool.info(f"Starting single file recognition: {inputFile}")
-        StreamProcessor.run(inputFile, onResult, chunkSize=chunkSize, silenceThreshold=silenceThreshold)
-        LogTool.info(f"Recognition finished. Saved to: {outputFile}")
+        if useDaemon and DaemonServer.submit(inputFile, onResult, modelSize=args.model):
+            LogTool.info("Recognized by daemon.")
+        elif args.split:
+            # 长文件: 在静音处切成多段，由 Worker 进程池并行识别后按时间顺序合并
+            from core.SplitProcessor import SplitProcessor
+            SplitProcessor.run(inputFile, onResult, chunkSize=chunkSize, silenceThreshold=silenceThreshold)
+        elif args.channels:
+            # 多声道: 各声道并发识别，结果带 channel 字段按时间归并
+            from core.ChannelProcessor import ChannelProcessor
+            ChannelProcessor.run(inputFile, onResult, chunkSize=chunkSize, silenceThreshold=silenceThreshold, modelKey=modelKey, priority="live")
+        else:
+            # 常驻服务在提交前退出时回退到本地识别
+            if not AsrService.initModel(modelKey=modelKey):
+                LogTool.error("Model init failed. Check models.yaml and app/models directory.")
+                return
+            from core.StreamProcessor import StreamProcessor
+            StreamProcessor.run(inputFile, onResult, chunkSize=chunkSize, silenceThreshold=silenceThreshold, modelKey=modelKey)
+        if WriterTool.closeFile(outputFile):
+            LogTool.info(f"Recognition finished. Saved to: {outputFile}")
+        else:
+            LogTool.error(f"Recognition finished, but some results could not be written to: {outputFile}")
+        if storeEnabled:
+            from dao.TranscriptStoreDao import TranscriptStoreDao
+            try:
+                # 单文件模式以绝对路径标识文件，不同目录下的同名文件互不覆盖
+                count = TranscriptStoreDao.ingest(os.path.abspath(inputFile).replace(os.sep, "/"), storeList)
+                LogTool.info(f"Stored {count} segments in transcript store.")
+            except Exception as e:
+                LogTool.error(f"Failed to store results: {inputFile}", e)
+        if MetricTool.enabled:
+            LogTool.info(MetricTool.getSummary())
 
     LogTool.info("=== ASRBrain CLI Finished ===")
 
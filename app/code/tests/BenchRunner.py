@@ -0,0 +1,311 @@
+import sys
+import os
+import json
+import time
+import shutil
+import argparse
+import platform
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import soundfile as sf
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.LogTool import LogTool
+from utils.ConfigTool import ConfigTool
+
+class BenchRunner:
+    """
+    性能基准测试 (不依赖外部音频，本地生成确定性合成音频)
+
+    指标:
+    - rtf: 实时率 = 处理耗时 / 音频时长 (越小越好，< 1 表示快于实时)
+    - latencyP50/P95/P99: 流式场景下每条结果从对应音频送入到结果回调的延迟 (秒)
+    - segmentsPerSec: 每秒输出的识别片段数
+    - peakRssMb: 进程内存峰值 (每个参数组合在独立子进程中运行，互不影响)
+
+    用法:
+    python app/code/tests/BenchRunner.py --models tiny,small --computeTypes int8 --chunkSizes 4000,8000 --threads 2,4
+    python app/code/tests/BenchRunner.py --compare app/out/bench_old.json app/out/bench_new.json
+    """
+    sampleRate = 16000
+    dataDir = "app/data/bench"
+
+    @staticmethod
+    def makeAudio(kind="speech", burstList=(2.0, 3.5, 1.2, 5.0), silenceList=(0.8, 1.5, 0.4), repeat=4, seed=7):
+        """
+        生成确定性合成音频: 语音段 (burst) 与静音段交替
+        kind: tone (单频正弦) / speech (带基频抖动与音节包络的谐波，近似语音)
+        返回: (float32 数组, 语音段位置列表 [(起始采样点, 结束采样点), ...])
+        """
+        rng = np.random.default_rng(seed)
+        partList = []
+        segmentList = []
+        position = 0
+        for index in range(len(burstList) * repeat):
+            burstSec = burstList[index % len(burstList)]
+            t = np.arange(int(burstSec * BenchRunner.sampleRate)) / BenchRunner.sampleRate
+            if kind == "tone":
+                burst = 0.3 * np.sin(2 * np.pi * 440 * t)
+            else:
+                # 基频 120-220Hz 缓慢变化，叠加 5 个谐波，4Hz 音节包络
+                pitch = 170 + 50 * np.sin(2 * np.pi * 0.7 * t + rng.uniform(0, np.pi))
+                phase = 2 * np.pi * np.cumsum(pitch) / BenchRunner.sampleRate
+                burst = sum(np.sin(k * phase) / k for k in range(1, 6))
+                envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t - np.pi / 2)
+                burst = 0.15 * burst * envelope + 0.005 * rng.standard_normal(len(t))
+            partList.append(burst)
+            segmentList.append((position, position + len(burst)))
+            silence = 0.001 * rng.standard_normal(int(silenceList[index % len(silenceList)] * BenchRunner.sampleRate))
+            partList.append(silence)
+            position += len(burst) + len(silence)
+        return np.concatenate(partList).astype(np.float32), segmentList
+
+    @staticmethod
+    def writeAudio(fileName, audioData):
+        filePath = os.path.join(BenchRunner.dataDir, fileName)
+        os.makedirs(os.path.dirname(filePath), exist_ok=True)
+        sf.write(filePath, audioData, BenchRunner.sampleRate, subtype='PCM_16')
+        return filePath
+
+    @staticmethod
+    def getPeakRssMb():
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # Linux 单位为 KB，macOS 为字节
+            return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+        except ImportError:
+            return None
+
+    @staticmethod
+    def getPercentile(valueList, percent):
+        if not valueList:
+            return None
+        return round(float(np.percentile(valueList, percent)), 3)
+
+    @staticmethod
+    def benchTranscribe(audioData, segmentList):
+        """
+        AsrService.transcribe: 逐段识别
+        """
+        from core.AsrService import AsrService
+
+        startTime = time.monotonic()
+        segmentCount = 0
+        for start, end in segmentList:
+            segmentCount += len(AsrService.transcribe(audioData[start:end]))
+        wallSec = time.monotonic() - startTime
+        audioSec = sum(end - start for start, end in segmentList) / BenchRunner.sampleRate
+        return {"audioSec": round(audioSec, 2), "wallSec": round(wallSec, 3), "segmentCount": segmentCount}
+
+    @staticmethod
+    def benchStream(audioData, chunkSize, realTime=False):
+        """
+        StreamSession (StreamProcessor 的核心): 按 chunk 送入音频，记录每条结果的端到端延迟
+        realTime: 按实时速度送入 (模拟麦克风)，否则尽快送入
+        """
+        from core.StreamSession import StreamSession
+
+        feedTimeList = []
+        latencyList = []
+
+        def onResult(data):
+            # 结果对应音频的结束位置所在 chunk 被送入的时刻
+            chunkIndex = min(len(feedTimeList) - 1, int(data["audioTimeEnd"] * BenchRunner.sampleRate) // chunkSize)
+            if data["type"] == "final":
+                latencyList.append(time.monotonic() - feedTimeList[chunkIndex])
+
+        session = StreamSession(onResult, chunkSize=chunkSize)
+        startTime = time.monotonic()
+        for position in range(0, len(audioData), chunkSize):
+            if realTime:
+                waitSec = startTime + position / BenchRunner.sampleRate - time.monotonic()
+                if waitSec > 0:
+                    time.sleep(waitSec)
+            feedTimeList.append(time.monotonic())
+            session.feed(audioData[position:position + chunkSize])
+        session.finish()
+        wallSec = time.monotonic() - startTime
+
+        return {
+            "audioSec": round(len(audioData) / BenchRunner.sampleRate, 2),
+            "wallSec": round(wallSec, 3),
+            "segmentCount": len(latencyList),
+            "latencyP50": BenchRunner.getPercentile(latencyList, 50),
+            "latencyP95": BenchRunner.getPercentile(latencyList, 95),
+            "latencyP99": BenchRunner.getPercentile(latencyList, 99)
+        }
+
+    @staticmethod
+    def benchBatch(filePathList):
+        """
+        BatchProcessor.run: 整个目录批处理
+        """
+        from core.BatchProcessor import BatchProcessor
+
+        inputDir = os.path.dirname(filePathList[0])
+        outDir = os.path.join(BenchRunner.dataDir, "out")
+        startTime = time.monotonic()
+        batchOutDir = BatchProcessor.run(inputDir, outputBaseDir=outDir)
+        wallSec = time.monotonic() - startTime
+
+        segmentCount = 0
+        if batchOutDir:
+            detailsDir = os.path.join(batchOutDir, "details")
+            for fileName in os.listdir(detailsDir):
+                with open(os.path.join(detailsDir, fileName), 'r', encoding='utf-8') as f:
+                    segmentCount += sum(1 for line in f)
+        shutil.rmtree(outDir, ignore_errors=True)
+
+        audioSec = sum(sf.info(filePath).duration for filePath in filePathList)
+        return {"audioSec": round(audioSec, 2), "wallSec": round(wallSec, 3), "segmentCount": segmentCount}
+
+    @staticmethod
+    def runCase(configData, caseDict, chunkSizeList, scenarioList, realTime):
+        """
+        在独立子进程中运行一组 (模型, 精度, 线程数) 的全部场景
+        """
+        from core.AsrService import AsrService
+
+        ConfigTool._config.update(configData)
+        ConfigTool._config["modelConfig"] = dict(ConfigTool._config.get("modelConfig", {}), **{
+            "modelSize": caseDict["modelSize"],
+            "computeType": caseDict["computeType"],
+            "cpuThreads": caseDict["threads"]
+        })
+        # 基准测试必须真实推理: 关闭结果缓存与批处理多进程；合成音频的识别结果不写入识别结果库
+        ConfigTool._config["cache"] = dict(ConfigTool._config.get("cache", {}), enabled=False)
+        ConfigTool._config["store"] = dict(ConfigTool._config.get("store", {}), enabled=False)
+        ConfigTool._config["batch"] = dict(ConfigTool._config.get("batch", {}), workerCount=1)
+        ConfigTool.refresh()
+
+        loadStart = time.monotonic()
+        if not AsrService.initModel():
+            return [dict(caseDict, error="model init failed")]
+        loadSec = round(time.monotonic() - loadStart, 3)
+
+        audioData, segmentList = BenchRunner.makeAudio("speech")
+
+        resultList = []
+        if "transcribe" in scenarioList:
+            resultList.append(dict(caseDict, scenario="transcribe", **BenchRunner.benchTranscribe(audioData, segmentList)))
+        if "stream" in scenarioList:
+            for chunkSize in chunkSizeList:
+                metricDict = BenchRunner.benchStream(audioData, chunkSize, realTime)
+                resultList.append(dict(caseDict, scenario="stream", chunkSize=chunkSize, **metricDict))
+        if "batch" in scenarioList:
+            fileList = [
+                BenchRunner.writeAudio(f"batch/speech_{index}.wav", BenchRunner.makeAudio("speech", seed=index)[0])
+                for index in range(3)
+            ] + [BenchRunner.writeAudio("batch/tone.wav", BenchRunner.makeAudio("tone", repeat=2)[0])]
+            resultList.append(dict(caseDict, scenario="batch", **BenchRunner.benchBatch(fileList)))
+
+        peakRssMb = BenchRunner.getPeakRssMb()
+        for result in resultList:
+            result["loadSec"] = loadSec
+            result["rtf"] = round(result["wallSec"] / result["audioSec"], 4) if result["audioSec"] else None
+            result["segmentsPerSec"] = round(result["segmentCount"] / result["wallSec"], 2) if result["wallSec"] else None
+            result["peakRssMb"] = peakRssMb
+        return resultList
+
+    @staticmethod
+    def run(modelList, computeTypeList, threadList, chunkSizeList, scenarioList, outFile, realTime=False):
+        caseList = [
+            {"modelSize": modelSize, "computeType": computeType, "threads": threads}
+            for modelSize in modelList for computeType in computeTypeList for threads in threadList
+        ]
+
+        resultList = []
+        for caseDict in caseList:
+            LogTool.info(f"Bench case: {caseDict}")
+            # 每组参数使用新的 spawn 子进程，保证模型冷启动与内存峰值互不干扰
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                future = pool.submit(BenchRunner.runCase, ConfigTool._config, caseDict, chunkSizeList, scenarioList, realTime)
+                try:
+                    resultList.extend(future.result())
+                except Exception as e:
+                    LogTool.error(f"Bench case failed: {caseDict}", e)
+                    resultList.append(dict(caseDict, error=str(e)))
+
+        report = {
+            "createTime": datetime.now().isoformat(),
+            "host": {
+                "platform": platform.platform(),
+                "python": platform.python_version(),
+                "cpuCount": os.cpu_count()
+            },
+            "realTime": realTime,
+            "results": resultList
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(outFile)), exist_ok=True)
+        with open(outFile, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        LogTool.info(f"Bench report saved: {outFile}")
+        return report
+
+    @staticmethod
+    def getCaseKey(result):
+        return (result.get("scenario"), result.get("modelSize"), result.get("computeType"), result.get("threads"), result.get("chunkSize"))
+
+    @staticmethod
+    def compare(oldFile, newFile, maxRegress=0.1):
+        """
+        对比两次报告的 RTF 与 P95 延迟，任一指标变慢超过 maxRegress (比例) 视为性能回退
+        返回: 是否存在回退
+        """
+        with open(oldFile, 'r', encoding='utf-8') as f:
+            oldMap = {BenchRunner.getCaseKey(result): result for result in json.load(f)["results"]}
+        with open(newFile, 'r', encoding='utf-8') as f:
+            newList = json.load(f)["results"]
+
+        hasRegress = False
+        for result in newList:
+            oldResult = oldMap.get(BenchRunner.getCaseKey(result))
+            if oldResult is None:
+                continue
+            for metric in ("rtf", "latencyP95"):
+                oldValue, newValue = oldResult.get(metric), result.get(metric)
+                if not oldValue or newValue is None:
+                    continue
+                change = (newValue - oldValue) / oldValue
+                flag = "REGRESS" if change > maxRegress else "ok"
+                hasRegress = hasRegress or change > maxRegress
+                print(f"[{flag}] {BenchRunner.getCaseKey(result)} {metric}: {oldValue} -> {newValue} ({change:+.1%})")
+        return hasRegress
+
+def main():
+    parser = argparse.ArgumentParser(description="ASRBrain Benchmark - RTF / Latency / Throughput")
+    parser.add_argument("--models", default="small", help="Model sizes, comma separated")
+    parser.add_argument("--computeTypes", default="int8", help="Compute types, comma separated")
+    parser.add_argument("--threads", default="4", help="cpu_threads values, comma separated")
+    parser.add_argument("--chunkSizes", default="8000", help="Stream chunk sizes (samples), comma separated")
+    parser.add_argument("--scenarios", default="transcribe,stream,batch", help="transcribe,stream,batch")
+    parser.add_argument("--realTime", action="store_true", help="Feed stream audio at real-time speed")
+    parser.add_argument("--out", default=None, help="Output JSON report path")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two reports and exit 1 on regression")
+    parser.add_argument("--maxRegress", type=float, default=0.1, help="Allowed slowdown ratio for --compare")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if BenchRunner.compare(args.compare[0], args.compare[1], args.maxRegress) else 0)
+
+    ConfigTool.load("appDev.yaml")
+    ConfigTool.load("models.yaml")
+
+    outFile = args.out or os.path.join("app/out", f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    BenchRunner.run(
+        args.models.split(","),
+        args.computeTypes.split(","),
+        [int(value) for value in args.threads.split(",")],
+        [int(value) for value in args.chunkSizes.split(",")],
+        args.scenarios.split(","),
+        outFile,
+        realTime=args.realTime
+    )
+
+if __name__ == "__main__":
+    main()
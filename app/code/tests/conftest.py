@@ -0,0 +1,10 @@
+import sys
+import os
+
+# 将 app/code 加入 sys.path，确保能导入 utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.LogTool import LogTool
+
+# 测试运行的日志写入 app/out，不写入正式的 app/logs
+LogTool.logDir = "app/out/test_logs"
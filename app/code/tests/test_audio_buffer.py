@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.AudioBuffer import AudioBuffer
+from utils.AudioTool import AudioTool
+from utils.StringTool import StringTool
+
+class TestAudioBuffer(unittest.TestCase):
+    def test_append_and_consume(self):
+        """
+        单元测试: 缓冲区容量固定，消费后保留重叠并更新绝对位置
+        """
+        audioBuffer = AudioBuffer(10)
+        self.assertEqual(audioBuffer.append(np.arange(6, dtype=np.float32)), 6)
+        # 空间不足时只写入一部分
+        self.assertEqual(audioBuffer.append(np.arange(6, 12, dtype=np.float32)), 4)
+        self.assertEqual(audioBuffer.freeSize(), 0)
+
+        audioBuffer.consume(8, keepCount=2)
+        self.assertEqual(audioBuffer.startSample, 6)
+        self.assertEqual(audioBuffer.view().tolist(), [6, 7, 8, 9])
+
+        audioBuffer.clear()
+        self.assertEqual(audioBuffer.size, 0)
+        self.assertEqual(audioBuffer.startSample, 10)
+
+    def test_find_quiet_point(self):
+        """
+        单元测试: 强制切分点落在能量最低的帧
+        """
+        data = np.full(3200, 0.5, dtype=np.float32)
+        data[2240:2560] = 0.0
+        self.assertEqual(AudioTool.findQuietPoint(data, searchStart=1600), 2400)
+
+    def test_drop_overlap(self):
+        """
+        单元测试: 接缝去重
+        """
+        self.assertEqual(StringTool.dropOverlap("今天天气很好", "天气很好我们出去"), "我们出去")
+        self.assertEqual(StringTool.dropOverlap("你好", "世界"), "世界")
+        self.assertEqual(StringTool.dropOverlap("", "世界"), "世界")
+
+if __name__ == '__main__':
+    unittest.main()
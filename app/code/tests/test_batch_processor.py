@@ -0,0 +1,111 @@
+import unittest
+import sys
+import os
+import shutil
+from concurrent.futures import Future
+from unittest import mock
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from core.BatchProcessor import BatchProcessor
+import core.BatchProcessor as batchModule
+
+class FakeExecutor:
+    """
+    模拟进程池: 在当前进程中按提交顺序同步执行，记录提交的文件
+    """
+    def __init__(self, submitList, **kwargs):
+        self.submitList = submitList
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def submit(self, fn, filePath, detailsOutDir):
+        self.submitList.append(os.path.basename(filePath))
+        future = Future()
+        future.set_result({"filename": os.path.basename(filePath), "full_text": "", "status": "success"})
+        return future
+
+class TestBatchProcessor(unittest.TestCase):
+    def setUp(self):
+        self.testDir = "app/out/test_batch_processor"
+        self.inputDir = os.path.join(self.testDir, "input")
+        os.makedirs(self.inputDir, exist_ok=True)
+        self.savedBatch = ConfigTool._config.get("batch")
+
+    def tearDown(self):
+        if self.savedBatch is None:
+            ConfigTool._config.pop("batch", None)
+        else:
+            ConfigTool._config["batch"] = self.savedBatch
+        ConfigTool.refresh()
+        shutil.rmtree(self.testDir, ignore_errors=True)
+
+    def setBatch(self, **batchConfig):
+        ConfigTool._config["batch"] = batchConfig
+        ConfigTool.refresh()
+
+    def writeFile(self, fileName, size):
+        filePath = os.path.join(self.inputDir, fileName)
+        with open(filePath, 'wb') as f:
+            f.write(b"\0" * size)
+        return filePath
+
+    def test_worker_count(self):
+        """
+        单元测试: Worker 数不超过文件数；0 表示按 CPU 核数 (及每 Worker 线程数) 自动计算；线程数按 Worker 平均分配
+        """
+        self.setBatch(workerCount=4)
+        self.assertEqual(BatchProcessor.getWorkerCount(2), 2)
+        self.assertEqual(BatchProcessor.getWorkerCount(10), 4)
+        self.assertTrue(BatchProcessor.usesWorkerPool())
+
+        with mock.patch.object(os, "cpu_count", return_value=8):
+            self.setBatch(workerCount=0, threadsPerWorker=2)
+            self.assertEqual(BatchProcessor.getWorkerCount(100), 4)
+            self.setBatch(workerCount=0, threadsPerWorker=0)
+            self.assertEqual(BatchProcessor.getWorkerCount(100), 8)
+            self.assertEqual(BatchProcessor.getThreadsPerWorker(4), 2)
+
+        self.setBatch(workerCount=1)
+        self.assertEqual(BatchProcessor.getWorkerCount(10), 1)
+        self.assertFalse(BatchProcessor.usesWorkerPool())
+
+    def test_single_file_fallback(self):
+        """
+        单元测试: 文件数不足两个时不启动进程池，在本进程顺序处理
+        """
+        self.setBatch(workerCount=4)
+        self.writeFile("a.wav", 100)
+        summaryRow = {"filename": "a.wav", "full_text": "", "status": "success"}
+        with mock.patch.object(BatchProcessor, "runPool") as poolMock, \
+                mock.patch.object(BatchProcessor, "processFile", return_value=summaryRow) as processMock:
+            self.assertIsNotNone(BatchProcessor.run(self.inputDir, outputBaseDir=self.testDir))
+            poolMock.assert_not_called()
+            processMock.assert_called_once()
+
+            self.writeFile("b.wav", 100)
+            self.writeFile("c.wav", 100)
+            BatchProcessor.run(self.inputDir, outputBaseDir=os.path.join(self.testDir, "second"))
+            self.assertEqual(poolMock.call_args[0][2], 3)
+
+    def test_largest_first(self):
+        """
+        单元测试: 进程池按文件大小从大到小提交，每个文件完成后回调
+        """
+        fileList = [self.writeFile("small.wav", 10), self.writeFile("large.wav", 1000), self.writeFile("medium.wav", 100)]
+        submitList = []
+        doneList = []
+        with mock.patch.object(batchModule, "ProcessPoolExecutor", side_effect=lambda **kwargs: FakeExecutor(submitList, **kwargs)), \
+                mock.patch.object(batchModule.LogTool, "getWorkerQueue", return_value=None):
+            BatchProcessor.runPool(fileList, self.testDir, 2, lambda filePath, summaryRow: doneList.append(summaryRow["filename"]))
+        self.assertEqual(submitList, ["large.wav", "medium.wav", "small.wav"])
+        self.assertEqual(sorted(doneList), ["large.wav", "medium.wav", "small.wav"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import shutil
+import numpy as np
+import soundfile as sf
+from unittest import mock
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.AudioTool import AudioTool
+from utils.ConfigTool import ConfigTool
+from core.AsrService import AsrService
+from core.ChannelProcessor import ChannelProcessor
+
+class TestChannelProcessor(unittest.TestCase):
+    def setUp(self):
+        self.outDir = "app/out/test_channel"
+        os.makedirs(self.outDir, exist_ok=True)
+        # 帧级 VAD 只把语音段送去识别 (默认的 rms 引擎会把静音块也送去识别)
+        self.savedVad = ConfigTool._config.get("vad")
+        ConfigTool._config["vad"] = {"engine": "frame", "frameMs": 20, "enterDb": 9.0, "exitDb": 5.0, "hangoverMs": 200, "minSilenceMs": 500, "speechPadMs": 200}
+        ConfigTool.refresh()
+
+    def tearDown(self):
+        if self.savedVad is None:
+            ConfigTool._config.pop("vad", None)
+        else:
+            ConfigTool._config["vad"] = self.savedVad
+        ConfigTool.refresh()
+        shutil.rmtree(self.outDir, ignore_errors=True)
+
+    def test_per_channel_merge(self):
+        """
+        单元测试: 各声道分别识别，结果带 channel 字段并按起始时间归并
+        """
+        sampleRate = 16000
+        audioData = np.zeros((sampleRate * 12, 2), dtype=np.float32)
+        noise = np.random.default_rng(0).uniform(-0.2, 0.2, sampleRate)
+        # 声道 0 在 1s、7s 说话，声道 1 在 4s 说话
+        for channel, start in ((0, 1), (1, 4), (0, 7)):
+            audioData[sampleRate * start:sampleRate * (start + 1), channel] = noise
+        filePath = os.path.join(self.outDir, "call.wav")
+        sf.write(filePath, audioData, sampleRate, subtype="PCM_16")
+
+        def fakeTranscribe(audioData, vadFilter=None, modelKey=None, priority="live", decodeOptions=None):
+            return [{"text": "话", "start": 0.0, "end": len(audioData) / sampleRate}]
+
+        resultList = []
+        with mock.patch.object(AsrService, "transcribe", side_effect=fakeTranscribe):
+            ChannelProcessor.run(filePath, resultList.append)
+
+        self.assertEqual([outData["channel"] for outData in resultList], [0, 1, 0])
+        startList = [outData["audioTimeStart"] for outData in resultList]
+        self.assertEqual(startList, sorted(startList))
+        self.assertLessEqual(abs(startList[1] - 4.0), 0.5)
+
+    def test_read_channels(self):
+        """
+        单元测试: mixDown=False 时按声道输出，重采样后声道数不变
+        """
+        audioData = np.random.default_rng(1).uniform(-0.5, 0.5, (8000 * 2, 2))
+        filePath = os.path.join(self.outDir, "stereo8k.wav")
+        sf.write(filePath, audioData, 8000, subtype="PCM_16")
+        chunkList = [chunk.copy() for chunk in AudioTool.readFileGenerator(filePath, chunkSize=4000, mixDown=False)]
+        fullData = np.concatenate(chunkList)
+        self.assertEqual(fullData.shape, (16000 * 2, 2))
+        mixData = np.concatenate([chunk.copy() for chunk in AudioTool.readFileGenerator(filePath, chunkSize=4000)])
+        np.testing.assert_allclose(fullData.mean(axis=1), mixData, atol=1e-5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import sys
+import os
+import time
+import shutil
+import threading
+from unittest import mock
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from core.AsrService import AsrService
+
+class TestConfigTool(unittest.TestCase):
+    def setUp(self):
+        self.configDir = "app/out/test_config"
+        os.makedirs(self.configDir, exist_ok=True)
+        self.savedState = (ConfigTool.configDir, ConfigTool._config, ConfigTool._fileList, ConfigTool._listenerList)
+        ConfigTool.configDir = self.configDir
+        ConfigTool._config = {}
+        ConfigTool._fileList = []
+        ConfigTool._listenerList = []
+        ConfigTool.refresh()
+        self.writeConfig("app.yaml", "server:\n  port: 8000\n")
+        self.writeConfig("models.yaml", 'modelConfig:\n  modelSize: "small"\nasrParams:\n  beamSize: 5\n')
+
+    def tearDown(self):
+        ConfigTool.configDir, ConfigTool._config, ConfigTool._fileList, ConfigTool._listenerList = self.savedState
+        ConfigTool.refresh()
+        AsrService._activeModelKey = None
+        AsrService._targetModelKey = None
+        shutil.rmtree(self.configDir, ignore_errors=True)
+
+    def writeConfig(self, fileName, text):
+        with open(os.path.join(self.configDir, fileName), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_snapshot_and_reload(self):
+        """
+        单元测试: 快照为不可变的类型化对象，重新加载后整体替换并通知监听者；解析失败时保留原配置
+        """
+        ConfigTool.load("app.yaml")
+        ConfigTool.load("models.yaml")
+        snapshot = ConfigTool.snapshot()
+        self.assertEqual((snapshot.modelSize, snapshot.beamSize, snapshot.language), ("small", 5, "zh"))
+        self.assertIs(ConfigTool.snapshot(), snapshot)
+        with self.assertRaises(Exception):
+            snapshot.beamSize = 1
+
+        changeList = []
+        ConfigTool.addListener(lambda oldSnapshot, newSnapshot: changeList.append((oldSnapshot, newSnapshot)))
+        self.writeConfig("models.yaml", 'modelConfig:\n  modelSize: "small"\nasrParams:\n  beamSize: 1\n')
+        self.assertTrue(ConfigTool.reload())
+        self.assertEqual(ConfigTool.snapshot().beamSize, 1)
+        self.assertEqual(ConfigTool.get("server.port"), 8000)
+        self.assertEqual(changeList, [(snapshot, ConfigTool.snapshot())])
+
+        self.writeConfig("models.yaml", "asrParams: [unclosed\n")
+        self.assertFalse(ConfigTool.reload())
+        self.assertEqual(ConfigTool.snapshot().beamSize, 1)
+
+    def test_model_switch_after_load(self):
+        """
+        单元测试: 默认模型变化时，新模型加载完成前仍使用原模型，完成后切换
+        """
+        ConfigTool.load("models.yaml")
+        oldSnapshot = ConfigTool.snapshot()
+        loadStarted = threading.Event()
+        loadRelease = threading.Event()
+
+        def fakeInit(modelKey=None, cpuThreads=None):
+            loadStarted.set()
+            loadRelease.wait(5)
+            return True
+
+        with mock.patch.object(AsrService, "initModel", side_effect=fakeInit):
+            self.writeConfig("models.yaml", 'modelConfig:\n  modelSize: "tiny"\n')
+            ConfigTool.addListener(AsrService.onConfigChange)
+            ConfigTool.reload()
+            self.assertTrue(loadStarted.wait(5))
+            self.assertEqual(AsrService.getModelKey()[0], "small")
+            loadRelease.set()
+            for _ in range(100):
+                if AsrService._activeModelKey is None:
+                    break
+                time.sleep(0.01)
+        self.assertEqual(AsrService.getModelKey()[0], "tiny")
+        self.assertNotEqual(oldSnapshot, ConfigTool.snapshot())
+
+    def test_model_switch_before_publish(self):
+        """
+        单元测试: 监听者在新快照发布前调用；新模型先于快照发布加载完成时，发布前后都使用新模型，发布后回到跟随配置
+        """
+        ConfigTool.load("models.yaml")
+        publishList = []
+
+        def checkPinned(oldSnapshot, newSnapshot):
+            # 新快照尚未发布，但请求已固定在原模型
+            publishList.append((ConfigTool.snapshot() is oldSnapshot, AsrService.getModelKey()[0]))
+
+        with mock.patch.object(AsrService, "initModel", return_value=True):
+            with mock.patch.object(AsrService, "switchModel") as switchMock:
+                ConfigTool.addListener(AsrService.onConfigChange)
+                ConfigTool.addListener(checkPinned)
+                self.writeConfig("models.yaml", 'modelConfig:\n  modelSize: "tiny"\n')
+                ConfigTool.reload()
+            self.assertEqual(publishList, [(True, "small")])
+            self.assertEqual(AsrService.getModelKey()[0], "small")
+
+            # 加载完成时新快照尚未发布 (回退到旧快照模拟该窗口)
+            newSnapshot = ConfigTool._snapshot
+            ConfigTool._snapshot = type(newSnapshot)(modelSize="small")
+            modelKey = switchMock.call_args[0][0]
+            thread = threading.Thread(target=AsrService.switchModel, args=(modelKey,), daemon=True)
+            thread.start()
+            time.sleep(0.1)
+            self.assertTrue(thread.is_alive())
+            self.assertEqual(AsrService.getModelKey()[0], "tiny")
+            ConfigTool._snapshot = newSnapshot
+            thread.join(5)
+        self.assertIsNone(AsrService._activeModelKey)
+        self.assertEqual(AsrService.getModelKey()[0], "tiny")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+import threading
+from unittest import mock
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from core.DaemonServer import DaemonServer
+from core.StreamProcessor import StreamProcessor
+
+@unittest.skipUnless(DaemonServer.isSupported(), "Unix domain sockets not supported")
+class TestDaemonServer(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        ConfigTool._config["daemon"] = {"socketPath": os.path.join(self.tempDir, "asr.sock"), "maxJobs": 1}
+
+    def tearDown(self):
+        ConfigTool._config.pop("daemon", None)
+
+    def test_submit_streams_results(self):
+        """
+        单元测试: 客户端提交任务后按顺序收到服务端回传的结果；服务未运行时 submit 返回 False
+        """
+        self.assertFalse(DaemonServer.submit(__file__, print))
+
+        def fakeRun(filePath, onResultCallback, **kwargs):
+            for index in range(3):
+                onResultCallback({"text": f"第{index}句", "audioTimeEnd": index})
+
+        with mock.patch.object(StreamProcessor, "run", side_effect=fakeRun):
+            threading.Thread(target=DaemonServer.run, daemon=True).start()
+            for _ in range(50):
+                if DaemonServer.isRunning():
+                    break
+                time.sleep(0.05)
+
+            resultList = []
+            self.assertTrue(DaemonServer.submit(__file__, resultList.append))
+        self.assertEqual([data["text"] for data in resultList], ["第0句", "第1句", "第2句"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -39,5 +39,23 @@ class TestDatasetBatch(unittest.TestCase):
         else:
             LogTool.info("Test Finished: No files to process in dataset dir.")
 
+    def test_resume_batch(self):
+        """
+        集成测试: 续跑已完成的批处理目录时跳过所有文件，CSV 由清单重建
+        """
+        resultDir = BatchProcessor.run(self.datasetDir)
+        if not resultDir:
+            LogTool.info("Test Finished: No files to process in dataset dir.")
+            return
+
+        manifestFile = os.path.join(resultDir, "manifest.jsonl")
+        with open(manifestFile, 'r', encoding='utf-8') as f:
+            lineCount = len(f.readlines())
+
+        self.assertEqual(BatchProcessor.run(self.datasetDir, resumeDir=resultDir), resultDir)
+        with open(manifestFile, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), lineCount)
+        self.assertTrue(os.path.exists(os.path.join(resultDir, "summary.csv")))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import time
+import threading
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from core.InferScheduler import InferScheduler
+
+class TestInferScheduler(unittest.TestCase):
+    def setUp(self):
+        self.savedScheduler = ConfigTool._config.get("scheduler")
+
+    def tearDown(self):
+        if self.savedScheduler is None:
+            ConfigTool._config.pop("scheduler", None)
+        else:
+            ConfigTool._config["scheduler"] = self.savedScheduler
+        ConfigTool.refresh()
+
+    def waitQueued(self, count):
+        for _ in range(200):
+            depth = InferScheduler.getQueueDepth()
+            if depth["live"] + depth["batch"] >= count:
+                return
+            time.sleep(0.01)
+        self.fail("Requests were not queued")
+
+    def test_live_first_with_batch_share(self):
+        """
+        单元测试: 槽位空出时 live 优先，batch 按保底份额穿插，同一优先级先到先得
+        """
+        ConfigTool._config["scheduler"] = {"slots": 1, "batchMinShare": 0.25}
+        ConfigTool.refresh()
+        grantList = []
+        lock = threading.Lock()
+
+        def worker(name, priority):
+            InferScheduler.acquire(priority)
+            with lock:
+                grantList.append(name)
+            InferScheduler.release()
+
+        # 先占住唯一的槽位，让后续请求全部排队
+        InferScheduler.acquire("batch")
+        threadList = []
+        nameList = [("b0", "batch"), ("b1", "batch")] + [(f"l{index}", "live") for index in range(4)]
+        for index, (name, priority) in enumerate(nameList):
+            thread = threading.Thread(target=worker, args=(name, priority))
+            thread.start()
+            threadList.append(thread)
+            # 保证入队顺序
+            self.waitQueued(index + 1)
+        InferScheduler.release()
+        for thread in threadList:
+            thread.join(timeout=5)
+
+        # batchMinShare = 0.25: 每连续放行 3 个 live 后放行 1 个 batch
+        self.assertEqual(grantList, ["l0", "l1", "l2", "b0", "l3", "b1"])
+        self.assertEqual(InferScheduler.getQueueDepth(), {"live": 0, "batch": 0})
+        self.assertEqual(InferScheduler._running, 0)
+
+if __name__ == '__main__':
+    unittest.main()
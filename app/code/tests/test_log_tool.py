@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+import queue
+import logging
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.LogTool import LogTool, LogQueueHandler
+
+class TestLogTool(unittest.TestCase):
+    def makeRecord(self, level=logging.INFO):
+        return logging.makeLogRecord({"name": "ASRBrain", "levelno": level, "levelname": logging.getLevelName(level), "msg": "test"})
+
+    def test_queue_full_and_rate_limit(self):
+        """
+        单元测试: 队列满时丢弃并计数、超过级别限速时丢弃并计数，其他级别不受限速影响
+        """
+        handler = LogQueueHandler(queue.Queue(maxsize=3))
+        handler.setRate(logging.INFO, 2)
+        for _ in range(5):
+            handler.handle(self.makeRecord())
+        self.assertEqual(handler.limitedCount, 3)
+        self.assertEqual(handler.queue.qsize(), 2)
+
+        # 先补一条汇总告警，队列随即写满，两条 ERROR 都被丢弃
+        handler.handle(self.makeRecord(logging.ERROR))
+        handler.handle(self.makeRecord(logging.ERROR))
+        self.assertEqual(handler.droppedCount, 2)
+        self.assertIn("rateLimited=3", handler.queue.queue[2].getMessage())
+
+    def test_enable_and_disable(self):
+        """
+        单元测试: 队列模式下记录由后台线程写出，停止后恢复原有 handler
+        """
+        logger = LogTool._get_logger()
+        handlerList = list(logger.handlers)
+        capture = []
+
+        class CaptureHandler(logging.Handler):
+            def emit(self, record):
+                capture.append(record.getMessage())
+
+        captureHandler = CaptureHandler()
+        logger.addHandler(captureHandler)
+        try:
+            LogTool.enableQueue(queueSize=100)
+            self.assertEqual(len(logger.handlers), 1)
+            LogTool.info("queued message")
+            LogTool.disableQueue()
+            self.assertIn("queued message", capture)
+            self.assertEqual(logger.handlers, handlerList + [captureHandler])
+        finally:
+            LogTool.disableQueue()
+            logger.removeHandler(captureHandler)
+
+    def test_worker_queue(self):
+        """
+        单元测试: Worker 进程不创建文件 handler，记录经跨进程队列由主进程的 handler 写出
+        """
+        logger = LogTool._get_logger()
+        savedState = (list(logger.handlers), LogTool._queueHandler)
+        capture = []
+
+        class CaptureHandler(logging.Handler):
+            def emit(self, record):
+                capture.append(record.getMessage())
+
+        captureHandler = CaptureHandler()
+        logger.addHandler(captureHandler)
+        LogTool.stopWorkerQueue()
+        try:
+            workerQueue = LogTool.getWorkerQueue()
+            # 模拟 Worker 进程: 只保留放入队列的 handler
+            LogTool.enableWorker(workerQueue)
+            self.assertEqual(logger.handlers, [LogTool._queueHandler])
+            LogTool.info("worker message")
+            LogTool.stopWorkerQueue()
+            self.assertIn("worker message", capture)
+        finally:
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+            for handler in savedState[0]:
+                logger.addHandler(handler)
+            LogTool._queueHandler = savedState[1]
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import sys
+import os
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.MetricTool import MetricTool
+
+class TestMetricTool(unittest.TestCase):
+    def tearDown(self):
+        MetricTool.enabled = True
+
+    def test_prometheus_export(self):
+        """
+        单元测试: 直方图分桶累计、计数器与仪表都出现在 Prometheus 文本中
+        """
+        counterMap, gaugeMap, histMap = MetricTool.snapshot()
+        baseCount = histMap.get("unitTest", {"count": 0})["count"]
+
+        MetricTool.observe("unitTest", 0.002)
+        MetricTool.observe("unitTest", 3.0)
+        MetricTool.addCounter("segmentsOut", 2)
+        MetricTool.addGauge("queueDepth", 1)
+        MetricTool.addGauge("queueDepth", -1)
+
+        text = MetricTool.toPrometheus()
+        self.assertIn(f'asrbrain_stage_seconds_count{{stage="unitTest"}} {baseCount + 2}', text)
+        self.assertIn(f'asrbrain_stage_seconds_bucket{{stage="unitTest",le="+Inf"}} {baseCount + 2}', text)
+        self.assertIn(f"asrbrain_segments_out_total {counterMap['segmentsOut'] + 2}", text)
+        self.assertIn(f"asrbrain_queue_depth {gaugeMap['queueDepth']}", text)
+
+    def test_disabled(self):
+        """
+        单元测试: 关闭后计时与计数不再记录
+        """
+        MetricTool.enabled = False
+        self.assertIsNone(MetricTool.startTimer())
+        before = MetricTool.snapshot()
+        MetricTool.stopTimer("unitTest", MetricTool.startTimer())
+        MetricTool.addCounter("errors")
+        self.assertEqual(MetricTool.snapshot(), before)
+
+if __name__ == '__main__':
+    unittest.main()
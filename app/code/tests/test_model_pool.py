@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import threading
+from unittest import mock
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from core.AsrService import AsrService
+
+class TestModelPool(unittest.TestCase):
+    def setUp(self):
+        self.loadList = []
+
+        def fakeLoad(modelKey):
+            self.loadList.append(modelKey)
+            return {"model": object(), "pipeline": None}
+
+        self.patcher = mock.patch.object(AsrService, "loadInstance", side_effect=fakeLoad)
+        self.patcher.start()
+        self.savedMap = AsrService._modelMap
+        AsrService._modelMap = type(self.savedMap)()
+        self.savedPool = ConfigTool._config.get("modelPool")
+
+    def tearDown(self):
+        self.patcher.stop()
+        AsrService._modelMap = self.savedMap
+        if self.savedPool is None:
+            ConfigTool._config.pop("modelPool", None)
+        else:
+            ConfigTool._config["modelPool"] = self.savedPool
+        ConfigTool.refresh()
+
+    def test_lru_eviction(self):
+        """
+        单元测试: 超出内存预算时淘汰最久未使用的空闲模型，同一模型只加载一次
+        """
+        # tiny 75MB + base 150MB + small 500MB
+        ConfigTool._config["modelPool"] = {"memoryBudgetMb": 700, "instancesPerModel": 1}
+        ConfigTool.refresh()
+        tinyKey = ("tiny", "int8", "cpu")
+        baseKey = ("base", "int8", "cpu")
+        smallKey = ("small", "int8", "cpu")
+
+        for modelKey in (tinyKey, baseKey, tinyKey):
+            self.assertTrue(AsrService.initModel(modelKey=modelKey))
+        self.assertEqual(self.loadList, [tinyKey, baseKey])
+
+        # base 最久未使用，被淘汰
+        self.assertTrue(AsrService.initModel(modelKey=smallKey))
+        self.assertEqual(list(AsrService._modelMap.keys()), [tinyKey, smallKey])
+
+    def test_instance_pool(self):
+        """
+        单元测试: 并发请求各取一个实例，达到实例上限后排队等待
+        """
+        ConfigTool._config["modelPool"] = {"memoryBudgetMb": 0, "instancesPerModel": 2}
+        ConfigTool.refresh()
+        modelKey = ("tiny", "int8", "cpu")
+        first = AsrService.acquireModel(modelKey)
+        second = AsrService.acquireModel(modelKey)
+        self.assertIsNot(first, second)
+
+        holder = {}
+        waiter = threading.Thread(target=lambda: holder.setdefault("instance", AsrService.acquireModel(modelKey)))
+        waiter.start()
+        waiter.join(0.2)
+        self.assertTrue(waiter.is_alive())
+
+        AsrService.releaseModel(modelKey, first)
+        waiter.join(1.0)
+        self.assertIs(holder["instance"], first)
+        self.assertEqual(len(self.loadList), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import shutil
+import numpy as np
+import soundfile as sf
+from unittest import mock
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.AsrService import AsrService
+from core.PackProcessor import PackProcessor
+
+class TestPackProcessor(unittest.TestCase):
+    def setUp(self):
+        self.outDir = "app/out/test_pack"
+        os.makedirs(self.outDir, exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.outDir, ignore_errors=True)
+
+    def test_pack_windows(self):
+        """
+        单元测试: 区间按顺序装入窗口，不超过窗口长度，长区间被等分
+        """
+        regionList = [(0, 10), (20, 35), (40, 48), (60, 130)]
+        windowList = PackProcessor.packWindows(regionList, windowSamples=30, gapSamples=2)
+        for window in windowList:
+            self.assertLessEqual(window["length"], 30)
+        self.assertEqual(windowList[0]["pieces"], [(0, 10, 0), (20, 35, 12)])
+        self.assertEqual(windowList[-1]["end"], 130)
+        self.assertEqual(sum(srcEnd - srcStart for window in windowList for srcStart, srcEnd, offset in window["pieces"]), 103)
+
+        # 落在插入静音中的时间: 起点取下一区间开头，终点取上一区间结尾
+        pieceList = windowList[0]["pieces"]
+        self.assertEqual(PackProcessor.mapTime(pieceList, 5, False), 5)
+        self.assertEqual(PackProcessor.mapTime(pieceList, 11, False), 20)
+        self.assertEqual(PackProcessor.mapTime(pieceList, 11, True), 10)
+        self.assertEqual(PackProcessor.mapTime(pieceList, 14, True), 22)
+
+    def test_run_absolute_time(self):
+        """
+        单元测试: 一个窗口只识别一次，结果时间映射回原文件
+        """
+        rng = np.random.default_rng(0)
+        sampleRate = 16000
+        partList = []
+        for index in range(5):
+            partList.append(rng.normal(0, 0.002, sampleRate * 3))
+            partList.append(rng.uniform(-0.2, 0.2, sampleRate))
+        filePath = os.path.join(self.outDir, "pack.wav")
+        sf.write(filePath, np.concatenate(partList).astype(np.float32), sampleRate)
+
+        def fakeTranscribe(audioData, vadFilter=None, modelKey=None, priority="live"):
+            return [{"text": "整段", "start": 0.0, "end": len(audioData) / sampleRate}]
+
+        resultList = []
+        with mock.patch.object(AsrService, "transcribe", side_effect=fakeTranscribe) as transcribeMock:
+            PackProcessor.run(filePath, resultList.append)
+
+        self.assertEqual(transcribeMock.call_count, 1)
+        self.assertEqual(len(resultList), 1)
+        self.assertAlmostEqual(resultList[0]["audioTimeStart"], 2.8, delta=0.1)
+        self.assertAlmostEqual(resultList[0]["audioTimeEnd"], 20.2, delta=0.3)
+
+if __name__ == '__main__':
+    unittest.main()
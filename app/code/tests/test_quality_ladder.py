@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import numpy as np
+from unittest import mock
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from core.AsrService import AsrService
+from core.StreamSession import StreamSession
+from core.QualityLadder import QualityLadder
+
+class TestQualityLadder(unittest.TestCase):
+    def test_step_down_and_up(self):
+        """
+        单元测试: 跟不上时逐级降档 (最后一档换小模型)，余量恢复后逐级升档，换档有最小间隔
+        """
+        ladder = QualityLadder(("small", "int8", "cpu"), downRtf=0.9, upRtf=0.5, maxBacklogSec=2.0, minStepSec=5.0, fallbackModel="tiny")
+        self.assertEqual(ladder.getLevelName(), "full")
+        self.assertIsNone(ladder.getDecodeOptions())
+
+        # 间隔不足时不换档
+        ladder.update(2.0, 3.0, now=0.0)
+        ladder.update(2.0, 3.0, now=1.0)
+        self.assertEqual(ladder.getLevelName(), "full")
+
+        now = 0.0
+        for expectName in ("greedy", "shortContext", "smallModel", "smallModel"):
+            now += 5.0
+            ladder.update(2.0, 3.0, now=now)
+            self.assertEqual(ladder.getLevelName(), expectName)
+        self.assertEqual(ladder.getModelKey(), ("tiny", "int8", "cpu"))
+        self.assertEqual(ladder.getDecodeOptions()["beamSize"], 1)
+
+        # RTF 正常但积压过多同样降档；这里已是最低档，保持不变
+        now += 5.0
+        ladder.update(2.0, 0.2, backlogSec=5.0, now=now)
+        self.assertEqual(ladder.getLevelName(), "smallModel")
+
+        # 滑动平均需要几次低 RTF 才能降到 upRtf 以下
+        for expectName in ("shortContext", "greedy", "full", "full"):
+            now += 5.0
+            for _ in range(4):
+                ladder.update(2.0, 0.2, backlogSec=0.0, now=now)
+            self.assertEqual(ladder.getLevelName(), expectName)
+        self.assertEqual(ladder.getModelKey(), ("small", "int8", "cpu"))
+
+    def test_no_smaller_model(self):
+        """
+        单元测试: 备用模型不比当前模型小时不启用换模型档
+        """
+        ladder = QualityLadder(("tiny", "int8", "cpu"), minStepSec=0.0, fallbackModel="tiny")
+        for index in range(5):
+            ladder.update(1.0, 2.0, now=float(index))
+        self.assertEqual(ladder.getLevelName(), "shortContext")
+        self.assertEqual(ladder.getModelKey(), ("tiny", "int8", "cpu"))
+
+    def test_short_window(self):
+        """
+        单元测试: shortContext 档位缩短识别窗口，连续语音按 quality.shortWindowSec 强制切分，每次识别的音频更短
+        """
+        ladder = QualityLadder(("small", "int8", "cpu"), minStepSec=1000.0, shortWindowSec=3.0)
+        self.assertIsNone(ladder.getWindowSec())
+        ladder.level = 2
+        self.assertEqual(ladder.getWindowSec(), 3.0)
+
+        savedVad = ConfigTool._config.get("vad")
+        ConfigTool._config["vad"] = {"engine": "rms"}
+        ConfigTool.refresh()
+        lengthList = []
+
+        def fakeTranscribe(audioData, vadFilter=None, modelKey=None, priority="live", decodeOptions=None):
+            lengthList.append(len(audioData))
+            return [{"text": "好", "start": 0.0, "end": len(audioData) / 16000}]
+
+        try:
+            with mock.patch.object(AsrService, "transcribe", side_effect=fakeTranscribe):
+                session = StreamSession(lambda result: None, qualityLadder=ladder)
+                session.feed(np.random.default_rng(0).uniform(-0.2, 0.2, 16000 * 10).astype(np.float32))
+                session.finish()
+        finally:
+            if savedVad is None:
+                ConfigTool._config.pop("vad", None)
+            else:
+                ConfigTool._config["vad"] = savedVad
+            ConfigTool.refresh()
+        self.assertGreaterEqual(len(lengthList), 4)
+        self.assertLessEqual(max(lengthList), 16000 * 3)
+
+if __name__ == '__main__':
+    unittest.main()
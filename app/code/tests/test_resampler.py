@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+import numpy as np
+import soundfile as sf
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.Resampler import Resampler
+from utils.AudioTool import AudioTool
+
+class TestResampler(unittest.TestCase):
+    def setUp(self):
+        self.testFile = "app/data/simple/test_resample_8k.flac"
+        if not os.path.exists(os.path.dirname(self.testFile)):
+            os.makedirs(os.path.dirname(self.testFile))
+
+    def tearDown(self):
+        if os.path.exists(self.testFile):
+            os.remove(self.testFile)
+
+    def makeTone(self, sampleRate, seconds=2, freq=440):
+        t = np.arange(int(sampleRate * seconds)) / sampleRate
+        return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+    def test_chunked_equals_whole(self):
+        """
+        单元测试: 分块重采样与整段重采样结果一致，并与理论波形吻合
+        """
+        for inRate in (8000, 44100, 48000):
+            data = self.makeTone(inRate)
+
+            resampler = Resampler(inRate, 16000)
+            whole = np.concatenate([resampler.process(data), resampler.flush()])
+
+            resampler = Resampler(inRate, 16000)
+            partList = [resampler.process(data[i:i + 1234]) for i in range(0, len(data), 1234)]
+            chunked = np.concatenate(partList + [resampler.flush()])
+
+            self.assertEqual(len(whole), 32000)
+            np.testing.assert_allclose(chunked, whole, atol=1e-6)
+            np.testing.assert_allclose(whole[200:-200], self.makeTone(16000)[200:-200], atol=1e-3)
+
+    def test_read_flac_8k(self):
+        """
+        集成测试: 8k FLAC 经 readFileGenerator 输出 16k 音频
+        """
+        sf.write(self.testFile, self.makeTone(8000), 8000)
+        chunkList = list(AudioTool.readFileGenerator(self.testFile, chunkSize=8000))
+        self.assertEqual(sum(len(chunk) for chunk in chunkList), 32000)
+
+if __name__ == '__main__':
+    unittest.main()
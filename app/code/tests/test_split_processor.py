@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import shutil
+import numpy as np
+import soundfile as sf
+from unittest import mock
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from core.AsrService import AsrService
+from core.SplitProcessor import SplitProcessor
+
+class TestSplitProcessor(unittest.TestCase):
+    def setUp(self):
+        self.outDir = "app/out/test_split"
+        os.makedirs(self.outDir, exist_ok=True)
+        # 逐段识别 (走被替换的 transcribe，而不是加载模型的 transcribeBatch)，VAD 与 appDev.yaml 一致
+        self.savedConfig = {key: ConfigTool._config.get(key) for key in ("batch", "vad")}
+        ConfigTool._config["batch"] = dict(self.savedConfig["batch"] or {}, segmentBatchSize=1)
+        ConfigTool._config["vad"] = {"engine": "frame", "frameMs": 20, "enterDb": 9.0, "exitDb": 5.0, "hangoverMs": 200, "minSilenceMs": 500, "speechPadMs": 200}
+        ConfigTool.refresh()
+
+    def tearDown(self):
+        for key, value in self.savedConfig.items():
+            if value is None:
+                ConfigTool._config.pop(key, None)
+            else:
+                ConfigTool._config[key] = value
+        ConfigTool.refresh()
+        shutil.rmtree(self.outDir, ignore_errors=True)
+
+    def test_plan_cuts(self):
+        """
+        单元测试: 达到片段长度后在静音中点切分，长时间无静音时硬切
+        """
+        regionList = [(0, 40), (60, 90), (100, 130), (140, 500)]
+        self.assertEqual(SplitProcessor.planCuts(regionList, 520, 50), [0, 50, 135, 185, 235, 285, 335, 385, 435, 520])
+
+    def test_merge_seam(self):
+        """
+        单元测试: 片段乱序完成时按顺序输出，重叠区内的重复句子与文字被去除
+        """
+        outList = []
+        pieceList = [(0, 10), (9, 20)]
+        merger = {"nextIndex": 0, "doneMap": {}, "lastEnd": 0.0, "lastText": ""}
+        merger["doneMap"][1] = [
+            {"audioTimeStart": 9.0, "audioTimeEnd": 9.8, "text": "今天天气"},
+            {"audioTimeStart": 9.5, "audioTimeEnd": 11.0, "text": "不错我们出去"},
+            {"audioTimeStart": 12.0, "audioTimeEnd": 13.0, "text": "走走"}
+        ]
+        SplitProcessor.emitReady(merger, pieceList, outList.append)
+        self.assertEqual(outList, [])
+
+        merger["doneMap"][0] = [
+            {"audioTimeStart": 8.0, "audioTimeEnd": 9.9, "text": "今天天气不错"}
+        ]
+        SplitProcessor.emitReady(merger, pieceList, outList.append)
+        self.assertEqual([outData["text"] for outData in outList], ["今天天气不错", "我们出去", "走走"])
+
+    def test_piece_absolute_time(self):
+        """
+        单元测试: 片段从文件中间开始读取时，结果换算为文件内的绝对时间
+        """
+        sampleRate = 16000
+        audioData = np.zeros(sampleRate * 10, dtype=np.float32)
+        audioData[sampleRate * 6:sampleRate * 8] = np.random.default_rng(0).uniform(-0.2, 0.2, sampleRate * 2)
+        filePath = os.path.join(self.outDir, "split.wav")
+        sf.write(filePath, audioData, sampleRate)
+
+        def fakeTranscribe(audioData, vadFilter=None, modelKey=None, priority="live", decodeOptions=None):
+            return [{"text": "你好", "start": 0.0, "end": len(audioData) / sampleRate}]
+
+        with mock.patch.object(AsrService, "transcribe", side_effect=fakeTranscribe):
+            resultList = SplitProcessor.processPiece(filePath, 8000, 0.005, 5.0, 10.0)
+        self.assertEqual(len(resultList), 1)
+        self.assertGreaterEqual(resultList[0]["audioTimeStart"], 5.0)
+        self.assertLessEqual(resultList[0]["audioTimeStart"], 6.0)
+        self.assertGreaterEqual(resultList[0]["audioTimeEnd"], 8.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import sys
+import os
+import shutil
+import asyncio
+import threading
+import numpy as np
+import soundfile as sf
+from unittest import mock
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.AsrService import AsrService
+from core.StreamProcessor import StreamProcessor
+
+class TestStreamProcessor(unittest.TestCase):
+    def setUp(self):
+        self.outDir = "app/out/test_stream_processor"
+        os.makedirs(self.outDir, exist_ok=True)
+        sampleRate = 16000
+        # 三段 1 秒语音，之间隔 2 秒静音
+        audioData = np.zeros(sampleRate * 10, dtype=np.float32)
+        noise = np.random.default_rng(0).uniform(-0.2, 0.2, sampleRate)
+        for start in (1, 4, 7):
+            audioData[sampleRate * start:sampleRate * (start + 1)] = noise
+        self.filePath = os.path.join(self.outDir, "pipeline.wav")
+        sf.write(self.filePath, audioData, sampleRate)
+
+        def fakeTranscribe(audioData, vadFilter=None, modelKey=None, priority="live", decodeOptions=None):
+            return [{"text": f"{len(audioData) / sampleRate:.2f}", "start": 0.0, "end": len(audioData) / sampleRate}]
+
+        self.patcher = mock.patch.object(AsrService, "transcribe", side_effect=fakeTranscribe)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.outDir, ignore_errors=True)
+
+    def strip(self, resultList):
+        return [(outData["audioTimeStart"], outData["audioTimeEnd"], outData["text"]) for outData in resultList]
+
+    def test_pipelined_same_results(self):
+        """
+        单元测试: 流水线模式与顺序模式结果一致，回调在调用方线程执行
+        """
+        sequentialList = []
+        StreamProcessor.run(self.filePath, sequentialList.append, pipelined=False)
+        self.assertEqual(len(sequentialList), 3)
+
+        pipelinedList = []
+        threadList = []
+
+        def callback(outData):
+            pipelinedList.append(outData)
+            threadList.append(threading.current_thread())
+
+        StreamProcessor.run(self.filePath, callback, pipelined=True)
+        self.assertEqual(self.strip(pipelinedList), self.strip(sequentialList))
+        self.assertTrue(all(thread is threading.current_thread() for thread in threadList))
+
+    def test_iter_early_close(self):
+        """
+        单元测试: 提前结束迭代时后台线程退出
+        """
+        threadCount = threading.active_count()
+        iterator = StreamProcessor.iterResults(self.filePath)
+        next(iterator)
+        iterator.close()
+        self.assertEqual(threading.active_count(), threadCount)
+
+    def test_async_iter(self):
+        """
+        单元测试: 异步迭代器逐条返回全部结果
+        """
+        async def collect():
+            return [outData async for outData in StreamProcessor.aiterResults(self.filePath)]
+
+        resultList = asyncio.run(collect())
+        self.assertEqual(len(resultList), 3)
+
+    def test_async_cancel(self):
+        """
+        单元测试: 异步迭代在等待下一条结果时被取消，生成器正常关闭，后台线程退出
+        """
+        threadCount = threading.active_count()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slowTranscribe(audioData, vadFilter=None, modelKey=None, priority="live", decodeOptions=None):
+            started.set()
+            release.wait(5)
+            return [{"text": "慢", "start": 0.0, "end": len(audioData) / 16000}]
+
+        async def consume():
+            async for outData in StreamProcessor.aiterResults(self.filePath):
+                pass
+
+        async def cancelWhileWaiting():
+            task = asyncio.create_task(consume())
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            # 识别仍在进行，稍后放行
+            asyncio.get_running_loop().call_later(0.2, release.set)
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with mock.patch.object(AsrService, "transcribe", side_effect=slowTranscribe):
+            asyncio.run(cancelWhileWaiting())
+        self.assertEqual(threading.active_count(), threadCount)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+import numpy as np
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from core.StreamSession import StreamSession
+from core.StreamServer import StreamServer
+from core.WatchProcessor import WatchProcessor
+
+class TestStreamServer(unittest.TestCase):
+    def setUp(self):
+        self.savedServer = ConfigTool._config.get("server")
+        ConfigTool._config["server"] = {"maxSessions": 1, "queueSize": 8}
+        StreamServer._executor = ThreadPoolExecutor(max_workers=1)
+        StreamServer._activeCount = 0
+        self.client = TestClient(StreamServer.createApp())
+
+    def tearDown(self):
+        if self.savedServer is None:
+            ConfigTool._config.pop("server", None)
+        else:
+            ConfigTool._config["server"] = self.savedServer
+        StreamServer._executor.shutdown(wait=True)
+
+    def test_reject_with_close_code(self):
+        """
+        单元测试: 会话数达到上限时握手后以 1013 关闭 (而不是 HTTP 403)
+        """
+        StreamServer._activeCount = 1
+        with self.client.websocket_connect("/ws/stream") as websocket:
+            with self.assertRaises(WebSocketDisconnect) as context:
+                websocket.receive_text()
+        self.assertEqual(context.exception.code, 1013)
+
+    def test_odd_frames_and_invalid_text(self):
+        """
+        单元测试: 在采样中间断开的二进制帧按字节拼接；非法文本帧以 1007 关闭并释放会话名额
+        """
+        receivedList = []
+
+        def fakeFeed(session, audioData):
+            receivedList.append(len(audioData))
+
+        pcm = (np.ones(8001, dtype="<i2") * 1000).tobytes()
+        with mock.patch.object(StreamSession, "feed", autospec=True, side_effect=fakeFeed):
+            with self.client.websocket_connect("/ws/stream") as websocket:
+                websocket.send_bytes(pcm[:1001])
+                websocket.send_bytes(pcm[1001:])
+                websocket.send_text('{"type": "end"}')
+                self.assertEqual(websocket.receive_json(), {"type": "done"})
+            self.assertEqual(sum(receivedList), 8001)
+
+            with self.client.websocket_connect("/ws/stream") as websocket:
+                websocket.send_text("not json")
+                with self.assertRaises(WebSocketDisconnect) as context:
+                    websocket.receive_text()
+            self.assertEqual(context.exception.code, 1007)
+        self.assertEqual(StreamServer._activeCount, 0)
+
+    def test_infer_error_cancels_receive(self):
+        """
+        单元测试: 识别出错时取消仍在等待客户端帧的接收任务，会话结束并释放名额
+        """
+        with mock.patch.object(StreamSession, "feed", autospec=True, side_effect=RuntimeError("infer failed")):
+            with self.client.websocket_connect("/ws/stream") as websocket:
+                websocket.send_bytes(b"\0\0" * 1600)
+                with self.assertRaises(WebSocketDisconnect):
+                    websocket.receive_text()
+        self.assertEqual(StreamServer._activeCount, 0)
+
+    def test_start_watch_in_process(self):
+        """
+        单元测试: 配置 server.watchDirs 时在后台线程监视目录，文件在本进程识别 (单 Worker)；不存在的目录跳过
+        """
+        self.assertIsNone(StreamServer.startWatch([]))
+        with mock.patch.object(WatchProcessor, "run") as runMock:
+            thread = StreamServer.startWatch([os.path.dirname(__file__), "no_such_dir"])
+            thread.join(5)
+            self.assertIsNone(StreamServer.startWatch(["no_such_dir"]))
+        runMock.assert_called_once_with([os.path.dirname(__file__)], workerCount=1)
+
+if __name__ == '__main__':
+    unittest.main()
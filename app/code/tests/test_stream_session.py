@@ -0,0 +1,134 @@
+import unittest
+import sys
+import os
+import numpy as np
+from unittest import mock
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.AsrService import AsrService
+from core.StreamSession import StreamSession
+from utils.ConfigTool import ConfigTool
+
+class TestStreamSession(unittest.TestCase):
+    def setUp(self):
+        self.results = []
+        # 模拟逐步增长的识别结果: 缓冲区越长，识别出的文字越多，最后一个字不稳定
+        self.fullText = "今天我们讨论项目进度"
+
+        def fakeTranscribe(audioData, vadFilter=None, modelKey=None, priority="live"):
+            count = min(len(self.fullText), int(len(audioData) / 8000))
+            text = self.fullText[:count] + ("吗" if count % 2 else "")
+            return [{"text": text, "start": 0.0, "end": len(audioData) / 16000}]
+
+        self.patcher = mock.patch.object(AsrService, "transcribe", side_effect=fakeTranscribe)
+        self.transcribeMock = self.patcher.start()
+        self.savedVad = ConfigTool._config.get("vad")
+
+    def tearDown(self):
+        self.patcher.stop()
+        if self.savedVad is None:
+            ConfigTool._config.pop("vad", None)
+        else:
+            ConfigTool._config["vad"] = self.savedVad
+        ConfigTool.refresh()
+
+    def test_interim_prefix_stable(self):
+        """
+        单元测试: interim 已确认文本只增不改，final 以已确认文本开头
+        """
+        ConfigTool._config["vad"] = {"engine": "rms"}
+        ConfigTool.refresh()
+        session = StreamSession(self.results.append, interimIntervalSec=0.5)
+        speech = np.random.uniform(-0.1, 0.1, 16000 * 4).astype(np.float32)
+        session.feed(speech)
+        session.feed(np.zeros(16000 * 2, dtype=np.float32))
+        session.finish()
+
+        interimList = [r for r in self.results if r["type"] == "interim"]
+        finalList = [r for r in self.results if r["type"] == "final"]
+        self.assertTrue(len(interimList) > 0)
+        self.assertEqual(len(finalList), 1)
+
+        committedText = ""
+        for result in interimList:
+            self.assertTrue(result["stableText"].startswith(committedText))
+            self.assertTrue(result["text"].startswith(result["stableText"]))
+            committedText = result["stableText"]
+        self.assertTrue(finalList[0]["text"].startswith(committedText))
+
+    def test_frame_vad_cut(self):
+        """
+        单元测试: 帧级 VAD 在每段语音结束后切分，切分点贴近语音末尾，且关闭模型内置 VAD
+        """
+        ConfigTool._config["vad"] = {"engine": "frame", "minSilenceMs": 400, "speechPadMs": 200}
+        ConfigTool.refresh()
+        session = StreamSession(self.results.append)
+        rng = np.random.default_rng(0)
+        noise = lambda seconds: rng.normal(0, 0.002, int(16000 * seconds)).astype(np.float32)
+        speech = lambda seconds: rng.uniform(-0.2, 0.2, int(16000 * seconds)).astype(np.float32)
+
+        session.feed(np.concatenate([noise(1.3), speech(1.2), noise(1.0), speech(2.0), noise(1.5)]))
+        session.finish()
+
+        finalList = [r for r in self.results if r["type"] == "final"]
+        self.assertEqual(len(finalList), 2)
+        # 语音区间为 1.3~2.5s 与 3.5~5.5s
+        self.assertAlmostEqual(finalList[0]["audioTimeStart"], 1.1, delta=0.15)
+        self.assertAlmostEqual(finalList[0]["audioTimeEnd"], 2.7, delta=0.3)
+        self.assertAlmostEqual(finalList[1]["audioTimeStart"], 3.3, delta=0.15)
+        for call in self.transcribeMock.call_args_list:
+            self.assertFalse(call.kwargs["vadFilter"])
+
+    def test_forced_flush_trims_committed(self):
+        """
+        单元测试: 强制切分只识别切分点之前的音频，final 不带上切分点之后已确认的文字
+        """
+        savedStream = ConfigTool._config.get("stream")
+        ConfigTool._config["vad"] = {"engine": "rms"}
+        ConfigTool._config["stream"] = {"maxWindowSec": 4, "overlapSec": 0.5}
+        ConfigTool.refresh()
+        charList = "一二三四五六七八九十"
+
+        def fakeTranscribe(audioData, vadFilter=None, modelKey=None, priority="live"):
+            # 每秒一个片段一个字
+            return [{"text": charList[index], "start": float(index), "end": float(index + 1)} for index in range(int(len(audioData) / 16000))]
+
+        speech = np.random.default_rng(0).uniform(-0.2, 0.2, 16000 * 6).astype(np.float32)
+        # 2.5s 处音量较低 (仍高于静音阈值)，强制切分落在这里
+        speech[int(16000 * 2.45):int(16000 * 2.55)] *= 0.1
+        try:
+            with mock.patch.object(AsrService, "transcribe", side_effect=fakeTranscribe):
+                session = StreamSession(self.results.append, interimIntervalSec=0.5)
+                session.feed(speech[:16000 * 4 + 8000])
+                self.assertAlmostEqual(session.audioBuffer.startSample, int(16000 * 2.5) - 8000, delta=400)
+        finally:
+            if savedStream is None:
+                ConfigTool._config.pop("stream", None)
+            else:
+                ConfigTool._config["stream"] = savedStream
+            ConfigTool.refresh()
+
+        finalList = [r for r in self.results if r["type"] == "final"]
+        self.assertEqual([r["text"] for r in finalList], ["一", "二"])
+        self.assertTrue(any(r["stableText"].startswith("一二三") for r in self.results if r["type"] == "interim"))
+
+    def test_overlap_validated(self):
+        """
+        单元测试: 重叠不小于半个窗口时创建会话报错，避免缓冲区反复强制切分而不前进
+        """
+        savedStream = ConfigTool._config.get("stream")
+        ConfigTool._config["stream"] = {"maxWindowSec": 4, "overlapSec": 2}
+        try:
+            with self.assertRaises(ValueError):
+                StreamSession(self.results.append)
+        finally:
+            if savedStream is None:
+                ConfigTool._config.pop("stream", None)
+            else:
+                ConfigTool._config["stream"] = savedStream
+            ConfigTool.refresh()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import numpy as np
+from types import SimpleNamespace
+from unittest import mock
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from core.AsrService import AsrService
+
+class FakePipeline:
+    """
+    模拟 BatchedInferencePipeline: 每个 clip 返回一个片段，结束时间越过 clip 末尾 0.5 秒；第二个 clip 再多一个片段
+    """
+    def __init__(self):
+        self.callList = []
+
+    def transcribe(self, audioData, clip_timestamps=None, **kwargs):
+        self.callList.append((len(audioData), clip_timestamps))
+        segmentList = []
+        for index, clip in enumerate(clip_timestamps):
+            segmentList.append(SimpleNamespace(text=f"c{index}", start=clip["start"] + 0.1, end=clip["end"] + 0.5))
+            if index == 1:
+                segmentList.append(SimpleNamespace(text="c1b", start=clip["start"] + 1.0, end=clip["start"] + 1.5))
+        return iter(segmentList), None
+
+class TestTranscribeBatch(unittest.TestCase):
+    def setUp(self):
+        self.savedCache = ConfigTool._config.get("cache")
+        ConfigTool._config["cache"] = {"enabled": False}
+        ConfigTool.refresh()
+        self.pipeline = FakePipeline()
+        self.instance = {"model": object(), "pipeline": self.pipeline}
+        self.acquirePatcher = mock.patch.object(AsrService, "acquireModel", return_value=self.instance)
+        self.releasePatcher = mock.patch.object(AsrService, "releaseModel")
+        self.acquireMock = self.acquirePatcher.start()
+        self.releasePatcher.start()
+
+    def tearDown(self):
+        self.acquirePatcher.stop()
+        self.releasePatcher.stop()
+        if self.savedCache is None:
+            ConfigTool._config.pop("cache", None)
+        else:
+            ConfigTool._config["cache"] = self.savedCache
+        ConfigTool.refresh()
+
+    def makeAudio(self, seconds):
+        return np.full(int(16000 * seconds), 0.1, dtype=np.float32)
+
+    def test_offsets_and_clip_boundaries(self):
+        """
+        单元测试: 拼接后的片段按 clip 切回原时间线 (相对各自片段)，结束时间不超过 clip 末尾，长度为 0 的片段不送入模型
+        """
+        audioList = [self.makeAudio(1.0), self.makeAudio(2.0), self.makeAudio(0), self.makeAudio(1.5)]
+        resultList = AsrService.transcribeBatch(audioList, modelKey=("tiny", "int8", "cpu"))
+
+        fullLength, clipList = self.pipeline.callList[0]
+        self.assertEqual(fullLength, int(16000 * 4.5))
+        self.assertEqual(clipList, [{"start": 0.0, "end": 1.0}, {"start": 1.0, "end": 3.0}, {"start": 3.0, "end": 4.5}])
+
+        self.assertEqual(len(resultList), 4)
+        self.assertEqual([seg["text"] for seg in resultList[0]], ["c0"])
+        self.assertAlmostEqual(resultList[0][0]["start"], 0.1)
+        self.assertAlmostEqual(resultList[0][0]["end"], 1.0)
+        self.assertEqual([seg["text"] for seg in resultList[1]], ["c1", "c1b"])
+        self.assertAlmostEqual(resultList[1][0]["start"], 0.1)
+        self.assertAlmostEqual(resultList[1][0]["end"], 2.0)
+        self.assertAlmostEqual(resultList[1][1]["start"], 1.0)
+        self.assertAlmostEqual(resultList[1][1]["end"], 1.5)
+        self.assertEqual(resultList[2], [])
+        self.assertAlmostEqual(resultList[3][0]["start"], 0.1)
+        self.assertAlmostEqual(resultList[3][0]["end"], 1.5)
+
+    def test_empty_and_long_input(self):
+        """
+        单元测试: 空输入不加载模型；超过 30 秒的片段回退到单段识别，不放入批量窗口
+        """
+        self.assertEqual(AsrService.transcribeBatch([]), [])
+        self.assertEqual(AsrService.transcribeBatch([self.makeAudio(0)]), [[]])
+        self.acquireMock.assert_not_called()
+
+        longSegments = [{"text": "long", "start": 0.0, "end": 31.0}]
+        with mock.patch.object(AsrService, "transcribe", return_value=longSegments) as transcribeMock:
+            resultList = AsrService.transcribeBatch([self.makeAudio(31.0), self.makeAudio(1.0)], modelKey=("tiny", "int8", "cpu"))
+        transcribeMock.assert_called_once()
+        self.assertEqual(resultList[0], longSegments)
+        self.assertEqual(self.pipeline.callList[0][1], [{"start": 0.0, "end": 1.0}])
+        self.assertEqual([seg["text"] for seg in resultList[1]], ["c0"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import shutil
+import numpy as np
+from collections import OrderedDict
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils, dao
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from dao.TranscriptCacheDao import TranscriptCacheDao
+from core.AsrService import AsrService
+
+class TestTranscriptCacheDao(unittest.TestCase):
+    def setUp(self):
+        self.cacheDir = "app/data/test_cache"
+        ConfigTool._config["cache"] = {"dir": self.cacheDir, "maxDiskMb": 0.001, "memoryItems": 2}
+        TranscriptCacheDao._memoryCache = OrderedDict()
+        TranscriptCacheDao._diskIndex = None
+        TranscriptCacheDao._diskBytes = 0
+
+    def tearDown(self):
+        ConfigTool._config.pop("cache", None)
+        ConfigTool.refresh()
+        TranscriptCacheDao._diskIndex = None
+        shutil.rmtree(self.cacheDir, ignore_errors=True)
+
+    def test_key_depends_on_settings(self):
+        """
+        单元测试: 音频或参数不同，key 不同
+        """
+        audioData = np.zeros(1600, dtype=np.float32)
+        keyA = TranscriptCacheDao.makeKey(audioData, {"beamSize": 5})
+        self.assertEqual(keyA, TranscriptCacheDao.makeKey(audioData.copy(), {"beamSize": 5}))
+        self.assertNotEqual(keyA, TranscriptCacheDao.makeKey(audioData, {"beamSize": 1}))
+        self.assertNotEqual(keyA, TranscriptCacheDao.makeKey(audioData + 0.1, {"beamSize": 5}))
+
+    def test_save_get_and_evict(self):
+        """
+        单元测试: 写入后可读取 (内存与磁盘)，超出磁盘上限时淘汰最旧条目
+        """
+        segments = [{"text": "测试" * 20, "start": 0.0, "end": 1.0}]
+        keyList = [f"{index:02d}" + "a" * 38 for index in range(8)]
+        for key in keyList:
+            TranscriptCacheDao.save(key, segments)
+
+        # 清空内存层，验证从磁盘读取
+        TranscriptCacheDao._memoryCache = OrderedDict()
+        self.assertEqual(TranscriptCacheDao.get(keyList[-1]), segments)
+        self.assertIsNone(TranscriptCacheDao.get(keyList[0]))
+        self.assertLessEqual(TranscriptCacheDao._diskBytes, 0.001 * 1024 * 1024)
+        self.assertLessEqual(len(TranscriptCacheDao._memoryCache), 2)
+
+    def test_cache_only_offline(self):
+        """
+        单元测试: 只有离线文件 (batch) 的识别使用缓存，实时会话 (live) 不计算 key
+        """
+        ConfigTool._config["cache"]["enabled"] = True
+        ConfigTool.refresh()
+        audioData = np.zeros(1600, dtype=np.float32)
+        modelKey = ("base", "int8", "cpu")
+        self.assertIsNone(AsrService.getCacheKey(audioData, "single", "live", modelKey=modelKey))
+        self.assertIsNotNone(AsrService.getCacheKey(audioData, "single", "batch", modelKey=modelKey))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import shutil
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils, dao
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from dao.TranscriptStoreDao import TranscriptStoreDao
+
+class TestTranscriptStoreDao(unittest.TestCase):
+    def setUp(self):
+        self.storeDir = "app/out/test_store"
+        self.savedStore = ConfigTool._config.get("store")
+        ConfigTool._config["store"] = {"enabled": True, "dbPath": os.path.join(self.storeDir, "transcripts.db")}
+        ConfigTool.refresh()
+
+    def tearDown(self):
+        TranscriptStoreDao.close()
+        if self.savedStore is None:
+            ConfigTool._config.pop("store", None)
+        else:
+            ConfigTool._config["store"] = self.savedStore
+        ConfigTool.refresh()
+        shutil.rmtree(self.storeDir, ignore_errors=True)
+
+    def makeResult(self, start, end, text, resultType="final"):
+        return {"type": resultType, "audioTimeStart": start, "audioTimeEnd": end, "text": text}
+
+    def test_tokens(self):
+        """
+        单元测试: 中文按相邻两字切分，单字保留，英文数字按整词转小写
+        """
+        self.assertEqual(TranscriptStoreDao.toTokens("今天天气"), ["今天", "天天", "天气"])
+        self.assertEqual(TranscriptStoreDao.toTokens("好"), ["好"])
+        self.assertEqual(TranscriptStoreDao.toTokens("打开GPU加速, OK"), ["打开", "gpu", "加速", "ok"])
+
+    def test_search_and_fetch_range(self):
+        """
+        单元测试: 只入库 final 结果；短语检索 (多字/单字/英文) 与按时间段取结果
+        """
+        count = TranscriptStoreDao.ingest("a.wav", [
+            self.makeResult(0.0, 2.0, "今天天气很好"),
+            self.makeResult(2.0, 3.0, "今天", "interim"),
+            self.makeResult(3.0, 5.0, "明天开会讨论 GPU 方案"),
+            self.makeResult(6.0, 8.0, "天气预报说会下雨")
+        ])
+        self.assertEqual(count, 3)
+        TranscriptStoreDao.ingest("b.wav", [self.makeResult(1.0, 2.0, "天很蓝")])
+
+        self.assertEqual([(r["file"], r["audioTimeStart"]) for r in TranscriptStoreDao.search("天气")], [("a.wav", 0.0), ("a.wav", 6.0)])
+        # 短语需要连续出现: "天气好" 不在原文中
+        self.assertEqual(TranscriptStoreDao.search("天气好"), [])
+        self.assertEqual(len(TranscriptStoreDao.search("很")), 2)
+        self.assertEqual(TranscriptStoreDao.search("gpu")[0]["text"], "明天开会讨论 GPU 方案")
+
+        # 中英混合: 孤立汉字不在索引中，退回匹配原文；LIKE 通配符按字面匹配
+        TranscriptStoreDao.ingest("c.wav", [self.makeResult(0.0, 1.0, "A股市场上涨"), self.makeResult(1.0, 2.0, "增长100%左右")])
+        self.assertEqual([r["text"] for r in TranscriptStoreDao.search("A股")], ["A股市场上涨"])
+        self.assertEqual([r["text"] for r in TranscriptStoreDao.search("100%左")], ["增长100%左右"])
+        self.assertEqual([r["text"] for r in TranscriptStoreDao.search("长1")], ["增长100%左右"])
+        self.assertEqual(TranscriptStoreDao.search("长_"), [])
+
+        rangeList = TranscriptStoreDao.fetchRange("a.wav", 1.0, 4.0)
+        self.assertEqual([r["audioTimeStart"] for r in rangeList], [0.0, 3.0])
+
+    def test_reingest_replaces(self):
+        """
+        单元测试: 同一文件重新入库时替换旧结果，全文索引同步更新
+        """
+        TranscriptStoreDao.ingest("a.wav", [self.makeResult(0.0, 1.0, "旧的结果")])
+        TranscriptStoreDao.ingest("a.wav", [self.makeResult(0.0, 1.0, "新的结果")])
+        self.assertEqual(TranscriptStoreDao.search("旧的"), [])
+        self.assertEqual([r["text"] for r in TranscriptStoreDao.fetchRange("a.wav", 0.0, 10.0)], ["新的结果"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.VadEngine import VadEngine
+
+class TestVadEngine(unittest.TestCase):
+    def test_regions_with_rising_noise(self):
+        """
+        单元测试: 分块输入得到的语音区间与真实区间一致，噪声底升高后不会把噪声判为语音
+        """
+        rng = np.random.default_rng(1)
+        sampleRate = 16000
+        partList = [
+            rng.normal(0, 0.002, sampleRate * 2),
+            rng.uniform(-0.2, 0.2, sampleRate),
+            # 噪声底抬高 12dB
+            rng.normal(0, 0.008, sampleRate * 6),
+            rng.uniform(-0.3, 0.3, sampleRate),
+            rng.normal(0, 0.008, sampleRate * 2)
+        ]
+        audioData = np.concatenate(partList).astype(np.float32)
+
+        engine = VadEngine(sampleRate=sampleRate, frameMs=20, hangoverMs=100)
+        flagList = [engine.process(audioData[start:start + 7000]) for start in range(0, len(audioData), 7000)]
+        regionList = VadEngine.toRegions(np.concatenate(flagList), engine.frameSize)
+
+        self.assertEqual(len(regionList), 2)
+        expectList = [(2.0, 3.0), (9.0, 10.0)]
+        for (start, end), (expectStart, expectEnd) in zip(regionList, expectList):
+            self.assertAlmostEqual(start / sampleRate, expectStart, delta=0.04)
+            self.assertAlmostEqual(end / sampleRate, expectEnd + 0.1, delta=0.04)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import sys
+import os
+import time
+import shutil
+import threading
+from unittest import mock
+from concurrent.futures.process import BrokenProcessPool
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from core.BatchProcessor import BatchProcessor
+from core.WatchProcessor import WatchProcessor
+
+class TestWatchProcessor(unittest.TestCase):
+    def setUp(self):
+        self.testDir = "app/out/test_watch"
+        self.inputDir = os.path.join(self.testDir, "input")
+        os.makedirs(os.path.join(self.inputDir, "room1"), exist_ok=True)
+        self.savedWatch = ConfigTool._config.get("watch")
+        ConfigTool._config["watch"] = {"pollIntervalSec": 0.05, "stableSec": 0.2, "outputDir": os.path.join(self.testDir, "out")}
+        self.processedList = []
+
+    def tearDown(self):
+        if self.savedWatch is None:
+            ConfigTool._config.pop("watch", None)
+        else:
+            ConfigTool._config["watch"] = self.savedWatch
+        shutil.rmtree(self.testDir, ignore_errors=True)
+
+    def fakeProcessFile(self, filePath, detailsOutDir, fileKey=None):
+        self.processedList.append((fileKey, detailsOutDir))
+        return {"filename": fileKey, "full_text": "ok", "status": "success"}
+
+    def startWatch(self):
+        thread = threading.Thread(target=WatchProcessor.run, args=([self.inputDir],), daemon=True)
+        thread.start()
+        return thread
+
+    def stopWatch(self, thread):
+        WatchProcessor.stop()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+
+    def waitFor(self, predicate, timeoutSec=5.0):
+        deadline = time.monotonic() + timeoutSec
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.02)
+        return False
+
+    def writeFile(self, relPath, size):
+        with open(os.path.join(self.inputDir, relPath), 'ab') as f:
+            f.write(b"\0" * size)
+
+    def test_watch_waits_for_stable_size_and_skips_seen(self):
+        """
+        单元测试: 递归发现新文件，写入中 (大小变化) 的文件等稳定后才处理；已处理的文件重启后不再处理
+        """
+        with mock.patch.object(BatchProcessor, "processFile", side_effect=self.fakeProcessFile):
+            thread = self.startWatch()
+            self.writeFile("room1/a.wav", 100)
+            self.writeFile("notes.txt", 10)
+            # 持续写入期间不应被处理
+            for _ in range(6):
+                time.sleep(0.1)
+                self.writeFile("room1/a.wav", 100)
+            self.assertEqual(self.processedList, [])
+
+            self.assertTrue(self.waitFor(lambda: len(self.processedList) == 1))
+            relPath, detailsOutDir = self.processedList[0]
+            self.assertEqual(relPath, "room1/a.wav")
+            # 详情按相对路径分子目录
+            self.assertTrue(detailsOutDir.endswith(os.path.join("details", "room1")))
+
+            self.writeFile("b.wav", 100)
+            self.assertTrue(self.waitFor(lambda: len(self.processedList) == 2))
+            self.stopWatch(thread)
+
+            # 重启后已处理的文件不再识别，只处理新文件
+            self.writeFile("c.wav", 100)
+            thread = self.startWatch()
+            self.assertTrue(self.waitFor(lambda: len(self.processedList) == 3))
+            time.sleep(0.3)
+            self.stopWatch(thread)
+
+        self.assertEqual([item[0] for item in self.processedList], ["room1/a.wav", "b.wav", "c.wav"])
+        with open(os.path.join(self.testDir, "out", "summary.csv"), 'r', encoding='utf-8-sig') as f:
+            self.assertEqual(len(f.read().strip().splitlines()), 4)
+
+    def test_retry_policy(self):
+        """
+        单元测试: 识别失败的文件延迟后重试，成功后才记为已处理；Worker 进程池损坏不写入 seen.jsonl
+        """
+        ConfigTool._config["watch"].update({"retryDelaySec": 0.1, "maxRetries": 3})
+        outcomeList = ["error", "success"]
+
+        def flakyProcessFile(filePath, detailsOutDir, fileKey=None):
+            self.processedList.append((fileKey, detailsOutDir))
+            return {"filename": fileKey, "full_text": "", "status": outcomeList.pop(0)}
+
+        with mock.patch.object(BatchProcessor, "processFile", side_effect=flakyProcessFile):
+            thread = self.startWatch()
+            self.writeFile("a.wav", 100)
+            self.assertTrue(self.waitFor(lambda: len(self.processedList) == 2))
+            self.stopWatch(thread)
+
+        with mock.patch.object(BatchProcessor, "processFile", side_effect=BrokenProcessPool("worker died")) as brokenMock:
+            self.writeFile("b.wav", 100)
+            thread = self.startWatch()
+            self.assertTrue(self.waitFor(lambda: brokenMock.call_count >= 2))
+            self.stopWatch(thread)
+
+        seenSet, attemptMap = WatchProcessor.loadSeen(os.path.join(self.testDir, "out", "seen.jsonl"), 3)
+        self.assertEqual(seenSet, {os.path.join(os.path.abspath(self.inputDir), "a.wav")})
+        self.assertEqual(attemptMap, {})
+
+    def test_file_key(self):
+        """
+        单元测试: 文件标识为相对路径，监视多个目录时带目录序号，子目录下的同名文件互不冲突
+        """
+        rootA, rootB = os.path.abspath("recA"), os.path.abspath("recB")
+        self.assertEqual(WatchProcessor.getFileKey([rootA], os.path.join(rootA, "room1", "rec.wav")), "room1/rec.wav")
+        keyA = WatchProcessor.getFileKey([rootA, rootB], os.path.join(rootA, "rec.wav"))
+        keyB = WatchProcessor.getFileKey([rootA, rootB], os.path.join(rootB, "rec.wav"))
+        self.assertEqual((keyA, keyB), ("0/rec.wav", "1/rec.wav"))
+        detailsDir = WatchProcessor.getDetailsDir(os.path.join(self.testDir, "details"), "room1/rec.wav")
+        self.assertEqual(detailsDir, os.path.join(self.testDir, "details", "room1"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+import shutil
+import numpy as np
+import soundfile as sf
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from utils.AudioTool import AudioTool
+from utils.WavReader import WavReader
+
+class TestWavReader(unittest.TestCase):
+    def setUp(self):
+        self.outDir = "app/out/test_wav_reader"
+        os.makedirs(self.outDir, exist_ok=True)
+        rng = np.random.default_rng(0)
+        self.stereoData = rng.uniform(-0.5, 0.5, (16000 * 3, 2))
+        self.savedAudio = ConfigTool._config.get("audio")
+
+    def tearDown(self):
+        if self.savedAudio is None:
+            ConfigTool._config.pop("audio", None)
+        else:
+            ConfigTool._config["audio"] = self.savedAudio
+        ConfigTool.refresh()
+        shutil.rmtree(self.outDir, ignore_errors=True)
+
+    def test_matches_soundfile(self):
+        """
+        单元测试: int16 / float32 WAV 的内存映射读取 (含下混) 与 soundfile 解码结果一致
+        """
+        for subtype in ("PCM_16", "PCM_32", "FLOAT"):
+            filePath = os.path.join(self.outDir, f"{subtype}.wav")
+            sf.write(filePath, self.stereoData, 16000, subtype=subtype)
+            expectData = sf.read(filePath, dtype='float32')[0].mean(axis=1)
+
+            reader = WavReader.open(filePath)
+            self.assertIsNotNone(reader, subtype)
+            self.assertEqual((reader.frames, reader.channels, reader.sampleRate), (len(expectData), 2, 16000))
+            np.testing.assert_allclose(reader.readRegion(1000, 5000), expectData[1000:6000], atol=1e-6)
+            reader.close()
+
+    def test_region_and_buffer_reuse(self):
+        """
+        单元测试: 随机区间读取越界时截断，同样大小的读取复用输出缓冲区
+        """
+        filePath = os.path.join(self.outDir, "mono.wav")
+        sf.write(filePath, self.stereoData[:, 0], 16000, subtype="PCM_16")
+        reader = WavReader.open(filePath)
+        first = reader.readRegion(0, 8000)
+        second = reader.readRegion(8000, 8000)
+        self.assertTrue(np.shares_memory(first, second))
+        self.assertEqual(len(reader.readRegion(reader.frames - 100, 8000)), 100)
+        reader.close()
+
+        # AudioTool.readRegion 返回独立拷贝，与按块读取的结果一致
+        regionData = AudioTool.readRegion(filePath, 1.0, 2.0)
+        fullData = np.concatenate([chunk.copy() for chunk in AudioTool.readFileGenerator(filePath, chunkSize=4000)])
+        np.testing.assert_allclose(regionData, fullData[16000:32000], atol=1e-6)
+
+    def test_fallback_to_soundfile(self):
+        """
+        单元测试: 非 PCM WAV 返回 None，readFileGenerator 改用 soundfile；关闭 mmapReader 时结果不变
+        """
+        flacPath = os.path.join(self.outDir, "audio.flac")
+        sf.write(flacPath, self.stereoData, 16000)
+        self.assertIsNone(WavReader.open(flacPath))
+
+        wavPath = os.path.join(self.outDir, "audio.wav")
+        sf.write(wavPath, self.stereoData, 8000, subtype="PCM_16")
+        mmapData = np.concatenate([chunk.copy() for chunk in AudioTool.readFileGenerator(wavPath, chunkSize=8000)])
+        ConfigTool._config["audio"] = {"mmapReader": False}
+        ConfigTool.refresh()
+        fileData = np.concatenate([chunk.copy() for chunk in AudioTool.readFileGenerator(wavPath, chunkSize=8000)])
+        self.assertEqual(len(mmapData), 16000 * 6)
+        np.testing.assert_allclose(mmapData, fileData, atol=1e-5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import threading
+
+# 将 app/code 加入 sys.path，确保能导入 core, utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ConfigTool import ConfigTool
+from utils.WriterTool import WriterTool
+
+class TestWriterTool(unittest.TestCase):
+    def setUp(self):
+        self.outDir = "app/out/test_writer"
+        ConfigTool._config["writer"] = {"maxOpenFiles": 2, "flushKb": 1, "fsync": "none"}
+
+    def tearDown(self):
+        WriterTool.closeAll()
+        ConfigTool._config.pop("writer", None)
+        shutil.rmtree(self.outDir, ignore_errors=True)
+
+    def test_concurrent_append(self):
+        """
+        单元测试: 多线程写多个文件，句柄数受限时所有行都写入且每个文件内顺序不乱
+        """
+        def writeLines(threadId):
+            for index in range(200):
+                filePath = os.path.join(self.outDir, f"t{threadId}_f{index % 5}.jsonl")
+                WriterTool.appendJsonLine(filePath, {"thread": threadId, "index": index, "text": "测试"})
+
+        threadList = [threading.Thread(target=writeLines, args=(threadId,)) for threadId in range(3)]
+        for thread in threadList:
+            thread.start()
+        for thread in threadList:
+            thread.join()
+        WriterTool.closeAll()
+
+        totalCount = 0
+        for fileName in os.listdir(self.outDir):
+            with open(os.path.join(self.outDir, fileName), 'r', encoding='utf-8') as f:
+                indexList = [json.loads(line)["index"] for line in f]
+            self.assertEqual(indexList, sorted(indexList))
+            totalCount += len(indexList)
+        self.assertEqual(totalCount, 600)
+
+    def test_close_file_flushes(self):
+        """
+        单元测试: closeFile 返回后数据已落盘
+        """
+        filePath = os.path.join(self.outDir, "single.jsonl")
+        WriterTool.appendJsonLine(filePath, {"text": "你好"})
+        self.assertTrue(WriterTool.closeFile(filePath))
+        with open(filePath, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.loads(f.readline())["text"], "你好")
+
+    def test_flush_failure_reported_on_close(self):
+        """
+        单元测试: 后台写盘失败的文件，closeFile 返回 False (调用方据此把该文件记为失败)
+        """
+        # 目标路径是目录，打开文件失败
+        filePath = os.path.join(self.outDir, "broken.jsonl")
+        os.makedirs(filePath)
+        WriterTool.appendJsonLine(filePath, {"text": "你好"})
+        WriterTool.flushAll()
+        self.assertFalse(WriterTool.closeFile(filePath))
+
+if __name__ == '__main__':
+    unittest.main()
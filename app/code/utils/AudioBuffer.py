@@ -0,0 +1,53 @@
+import numpy as np
+
+class AudioBuffer:
+    """
+    定长预分配的 float32 音频缓冲区 (每路流一个实例)
+    - 内存在创建时一次性分配，之后不再增长
+    - 追加只做一次拷贝，取数据返回连续视图，无需 np.concatenate
+    - 消费 (consume) 后剩余数据前移到头部，可保留一小段重叠音频
+    """
+
+    def __init__(self, maxSamples):
+        self.maxSamples = int(maxSamples)
+        self.data = np.zeros(self.maxSamples, dtype=np.float32)
+        self.size = 0
+        # 缓冲区头部在整个流中的绝对采样点位置
+        self.startSample = 0
+
+    def freeSize(self):
+        return self.maxSamples - self.size
+
+    def append(self, chunk):
+        """
+        追加音频块，返回实际写入的采样点数 (空间不足时只写入一部分)
+        """
+        count = min(len(chunk), self.freeSize())
+        if count > 0:
+            self.data[self.size:self.size + count] = chunk[:count]
+            self.size += count
+        return count
+
+    def view(self, endIndex=None):
+        """
+        返回缓冲区数据的连续视图 (不拷贝，下次写入前有效)
+        """
+        if endIndex is None:
+            endIndex = self.size
+        return self.data[:endIndex]
+
+    def consume(self, count, keepCount=0):
+        """
+        丢弃头部 count 个采样点，并保留其末尾 keepCount 个采样点作为重叠
+        """
+        count = min(count, self.size)
+        dropCount = max(0, count - keepCount)
+        remain = self.size - dropCount
+        if dropCount > 0 and remain > 0:
+            self.data[:remain] = self.data[dropCount:self.size]
+        self.size = remain
+        self.startSample += dropCount
+
+    def clear(self):
+        self.startSample += self.size
+        self.size = 0
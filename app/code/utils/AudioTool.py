@@ -1,33 +1,151 @@
 import numpy as np
+import os
 import soundfile as sf
 from utils.LogTool import LogTool
+from utils.Resampler import Resampler
+from utils.MetricTool import MetricTool
+from utils.ConfigTool import ConfigTool
+from utils.WavReader import WavReader
 
 class AudioTool:
+    # Whisper 要求的输入采样率
+    targetRate = 16000
+
     @staticmethod
-    def readFileGenerator(filePath, chunkSize=16000):
+    def readFileGenerator(filePath, chunkSize=16000, targetRate=None, startSec=0, endSec=None, mixDown=True):
         """
         生成器：按 Chunk 读取音频文件，模拟流式输入
-        filePath: 文件路径
-        chunkSize: 每次读取的采样点数 (16000 表示 1秒音频)
+        filePath: 文件路径 (WAV/FLAC/OGG 等 soundfile 支持的格式)
+        chunkSize: 每次输出的采样点数 (按 targetRate 计，16000 表示 1秒音频)
+        targetRate: 输出采样率，默认 16k；源文件采样率不同时流式重采样
+        startSec / endSec: 只读取文件中的这一段 (秒)，endSec 为 None 表示读到文件末尾
+        mixDown: 多声道是否下混为单声道；False 时每块为 (采样点数, 声道数) 的二维数组 (单声道文件也是)
+        PCM WAV 在 audio.mmapReader 开启时经 WavReader 内存映射读取，输出块复用同一缓冲区，
+        下一次迭代时会被覆盖，需要保留时由调用方拷贝
         """
+        if targetRate is None:
+            targetRate = AudioTool.targetRate
         try:
+            reader = WavReader.open(filePath) if ConfigTool.get("audio.mmapReader", True) else None
+            if reader is not None:
+                try:
+                    LogTool.info(f"Start reading file: {filePath}, Format: WAV (mmap), SampleRate: {reader.sampleRate}")
+                    yield from AudioTool.readChunks(lambda startFrame, frameCount: reader.readRegion(startFrame, frameCount, mixDown), reader.frames, reader.sampleRate, chunkSize, targetRate, startSec, endSec)
+                finally:
+                    reader.close()
+                return
+
             with sf.SoundFile(filePath) as f:
-                # 获取音频属性
-                sampleRate = f.samplerate
-                LogTool.info(f"Start reading file: {filePath}, SampleRate: {sampleRate}")
-                
-                # 如果不是 16k，Whisper 需要重采样，这里简单起见假设输入是 16k
-                # 生产环境建议在此处加入 resample 逻辑
-                while f.tell() < f.frames:
-                    data = f.read(chunkSize, dtype='float32')
+                LogTool.info(f"Start reading file: {filePath}, Format: {f.format}, SampleRate: {f.samplerate}")
+
+                def readRegion(startFrame, frameCount):
+                    if f.tell() != startFrame:
+                        f.seek(startFrame)
+                    data = f.read(frameCount, dtype='float32', always_2d=not mixDown)
                     # 如果是多声道，转单声道
-                    if len(data.shape) > 1:
+                    if mixDown and len(data.shape) > 1:
                         data = data.mean(axis=1)
-                    yield data
+                    return data
+
+                yield from AudioTool.readChunks(readRegion, f.frames, f.samplerate, chunkSize, targetRate, startSec, endSec)
         except Exception as e:
             LogTool.error(f"Error reading audio file: {filePath}", e)
             return None
 
+    @staticmethod
+    def readChunks(readRegion, frames, sampleRate, chunkSize, targetRate, startSec=0, endSec=None):
+        """
+        按块读取 [startSec, endSec) 并重采样到 targetRate
+        readRegion(起始帧, 帧数): 返回该区间的 float32 音频 (源采样率)，单声道一维或多声道 (帧数, 声道数)
+        """
+        # 采样率不一致时使用多相重采样 (每个声道一个重采样器)，滤波器状态跨块保留
+        resamplerList = None
+        readSize = chunkSize
+        if sampleRate != targetRate:
+            readSize = -(-chunkSize * sampleRate // targetRate)
+
+        endFrame = frames if endSec is None else min(frames, int(endSec * sampleRate))
+        position = min(endFrame, int(startSec * sampleRate))
+        while position < endFrame:
+            # 只统计解码/下混/重采样耗时，不含调用方处理 yield 结果的时间
+            startTime = MetricTool.startTimer()
+            data = readRegion(position, min(readSize, endFrame - position))
+            if len(data) == 0:
+                break
+            position += len(data)
+            if sampleRate != targetRate:
+                if resamplerList is None:
+                    isMono = data.ndim == 1
+                    resamplerList = [Resampler(sampleRate, targetRate) for _ in range(1 if isMono else data.shape[1])]
+                data = AudioTool.resampleChannels(resamplerList, data, isMono)
+            MetricTool.stopTimer("read", startTime)
+            MetricTool.addCounter("audioSecondsIn", len(data) / targetRate)
+            yield data
+
+        if resamplerList is not None:
+            tail = AudioTool.resampleChannels(resamplerList, None, isMono)
+            MetricTool.addCounter("audioSecondsIn", len(tail) / targetRate)
+            if len(tail) > 0:
+                yield tail
+
+    @staticmethod
+    def resampleChannels(resamplerList, data, isMono):
+        """
+        逐声道重采样；data 为 None 时输出各重采样器的剩余部分 (flush)
+        """
+        if data is None:
+            outList = [resampler.flush() for resampler in resamplerList]
+        elif isMono:
+            outList = [resamplerList[0].process(data)]
+        else:
+            outList = [resampler.process(data[:, index]) for index, resampler in enumerate(resamplerList)]
+        if isMono:
+            return outList[0]
+        return np.stack(outList, axis=1)
+
+    @staticmethod
+    def getChannelCount(filePath):
+        try:
+            return sf.info(filePath).channels
+        except Exception as e:
+            LogTool.error(f"Error reading audio info: {filePath}", e)
+            return 0
+
+    @staticmethod
+    def readRegion(filePath, startSec, endSec, targetRate=None):
+        """
+        随机读取文件中 [startSec, endSec) 这一段，返回 targetRate 采样率的单声道 float32 数组 (独立拷贝)
+        PCM WAV 直接从内存映射中取，不需要从头解码
+        """
+        if targetRate is None:
+            targetRate = AudioTool.targetRate
+        chunkList = [chunk.copy() for chunk in AudioTool.readFileGenerator(filePath, chunkSize=max(1, int((endSec - startSec) * targetRate)), targetRate=targetRate, startSec=startSec, endSec=endSec)]
+        if not chunkList:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(chunkList)
+
+    @staticmethod
+    def getFormatSet():
+        """
+        soundfile 可读取的文件扩展名集合 (小写，不含点)
+        """
+        # RAW 没有文件头，无法自动识别采样率与编码，排除
+        return {name.lower() for name in sf.available_formats()} - {"raw"}
+
+    @staticmethod
+    def listAudioFiles(inputDir):
+        """
+        列出目录下 soundfile 可读取的音频文件 (wav/flac/ogg 等，按 libsndfile 实际支持的格式)
+        """
+        formatSet = AudioTool.getFormatSet()
+        fileList = []
+        for fileName in sorted(os.listdir(inputDir)):
+            extName = os.path.splitext(fileName)[1].lstrip('.').lower()
+            filePath = os.path.join(inputDir, fileName)
+            if extName in formatSet and os.path.isfile(filePath):
+                fileList.append(filePath)
+        return fileList
+
     @staticmethod
     def getRms(audioData):
         """
@@ -44,3 +162,20 @@ class AudioTool:
         判断当前音频块是否为静音
         """
         return AudioTool.getRms(audioData) < threshold
+
+    @staticmethod
+    def findQuietPoint(audioData, searchStart=0, frameSize=320):
+        """
+        在 audioData[searchStart:] 中寻找能量最低的帧，返回该帧中心的采样点位置
+        用于缓冲区写满时选择强制切分点 (默认 20ms 帧 @16k)
+        """
+        region = audioData[searchStart:]
+        frameCount = len(region) // frameSize
+        if frameCount == 0:
+            return len(audioData)
+
+        frames = region[:frameCount * frameSize].reshape(frameCount, frameSize)
+        energy = np.einsum('ij,ij->i', frames, frames)
+        quietFrame = int(np.argmin(energy))
+        return searchStart + quietFrame * frameSize + frameSize // 2
+
@@ -1,9 +1,83 @@
 import yaml
 import os
+import math
+import threading
+from dataclasses import dataclass
+from typing import Optional
 from utils.LogTool import LogTool
 
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    识别热路径使用的配置快照 (不可变)，由合并后的配置一次性生成，读取时只是属性访问
+    配置热更新时整体替换为新实例
+    """
+    modelSize: str = "base"
+    computeType: str = "int8"
+    device: str = "cpu"
+    beamSize: int = 5
+    language: str = "zh"
+    initialPrompt: str = ""
+    vadFilter: bool = True
+    vadMinSilenceDurationMs: int = 500
+    batchSize: int = 8
+    cacheEnabled: bool = False
+    instancesPerModel: int = 1
+    # 推理槽位数 (scheduler.slots，未配置时等于 instancesPerModel)
+    schedulerSlots: int = 1
+    # 两类都在排队时最多连续放行的 live 数 (由 scheduler.batchMinShare 换算)，None 表示不限制
+    maxLiveStreak: Optional[int] = 4
+
+    @staticmethod
+    def build(configData):
+        modelConfig = configData.get("modelConfig") or {}
+        asrParams = configData.get("asrParams") or {}
+        cacheConfig = configData.get("cache") or {}
+        poolConfig = configData.get("modelPool") or {}
+        schedulerConfig = configData.get("scheduler") or {}
+        instancesPerModel = max(1, int(poolConfig.get("instancesPerModel", 1)))
+        slots = int(schedulerConfig.get("slots", 0))
+        return ConfigSnapshot(
+            modelSize=str(modelConfig.get("modelSize", "base")),
+            computeType=str(modelConfig.get("computeType", "int8")),
+            device=str(modelConfig.get("device", "cpu")),
+            beamSize=int(asrParams.get("beamSize", 5)),
+            language=asrParams.get("language", "zh"),
+            initialPrompt=asrParams.get("initialPrompt", "") or "",
+            vadFilter=bool(asrParams.get("vadFilter", True)),
+            vadMinSilenceDurationMs=int(asrParams.get("vadMinSilenceDurationMs", 500)),
+            batchSize=int(asrParams.get("batchSize", 8)),
+            cacheEnabled=bool(cacheConfig.get("enabled", False)),
+            instancesPerModel=instancesPerModel,
+            schedulerSlots=max(1, slots) if slots > 0 else instancesPerModel,
+            maxLiveStreak=ConfigSnapshot.toMaxLiveStreak(float(schedulerConfig.get("batchMinShare", 0.2)))
+        )
+
+    @staticmethod
+    def toMaxLiveStreak(share):
+        """
+        batchMinShare 换算为最多连续放行的 live 数: 0.2 时为 4 (即 batch 至少占 1/5)
+        """
+        if share <= 0:
+            return None
+        if share >= 1:
+            return 0
+        return max(0, math.ceil((1 - share) / share - 1e-9))
+
 class ConfigTool:
+    """
+    配置读取: 按加载顺序合并 app/config/ 下的 YAML
+    - get: 点分隔的任意配置项
+    - snapshot: 识别热路径使用的 ConfigSnapshot，配置变化后重新生成
+    - startWatcher: 后台检查已加载文件的修改时间，变化时重新合并全部文件，整体替换配置与快照并通知监听者
+    """
     _config = {}
+    _snapshot = None
+    # 已加载的文件 (按加载顺序)，热更新时按同样顺序重新合并
+    _fileList = []
+    _listenerList = []
+    _watchThread = None
+    configDir = "app/config"
 
     @staticmethod
     def load(fileName):
@@ -11,15 +85,18 @@ class ConfigTool:
         加载配置文件，默认从 app/config/ 目录下读取
         """
         try:
-            configPath = os.path.join("app/config", fileName)
+            configPath = os.path.join(ConfigTool.configDir, fileName)
             if not os.path.exists(configPath):
                 LogTool.error(f"Config file not found: {configPath}")
                 return False
-            
+
             with open(configPath, 'r', encoding='utf-8') as f:
                 data = yaml.safe_load(f)
+                if fileName not in ConfigTool._fileList:
+                    ConfigTool._fileList.append(fileName)
                 if data:
                     ConfigTool._config.update(data)
+                    ConfigTool.refresh()
                     LogTool.info(f"Successfully loaded config: {fileName}")
                     return True
         except Exception as e:
@@ -39,3 +116,89 @@ class ConfigTool:
             return value
         except (KeyError, TypeError):
             return defaultValue
+
+    @staticmethod
+    def snapshot():
+        """
+        当前配置快照 (ConfigSnapshot)
+        """
+        snapshot = ConfigTool._snapshot
+        if snapshot is None:
+            snapshot = ConfigSnapshot.build(ConfigTool._config)
+            ConfigTool._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def refresh():
+        """
+        直接修改 _config 后调用，使快照重新生成
+        """
+        ConfigTool._snapshot = None
+
+    @staticmethod
+    def addListener(listener):
+        """
+        注册配置变化回调 listener(旧快照, 新快照)，在监视线程中、新快照发布前调用
+        """
+        ConfigTool._listenerList.append(listener)
+
+    @staticmethod
+    def startWatcher(intervalSec=2.0):
+        """
+        启动后台线程，每 intervalSec 秒检查一次已加载文件的修改时间
+        """
+        if ConfigTool._watchThread is not None:
+            return
+        ConfigTool._watchThread = threading.Thread(target=ConfigTool.watchLoop, args=(intervalSec,), name="configWatch", daemon=True)
+        ConfigTool._watchThread.start()
+        LogTool.info(f"Watching config files: {', '.join(ConfigTool._fileList)}")
+
+    @staticmethod
+    def watchLoop(intervalSec):
+        stopEvent = threading.Event()
+        mtimeMap = ConfigTool.getMtimeMap()
+        while not stopEvent.wait(intervalSec):
+            newMtimeMap = ConfigTool.getMtimeMap()
+            if newMtimeMap != mtimeMap:
+                mtimeMap = newMtimeMap
+                ConfigTool.reload()
+
+    @staticmethod
+    def getMtimeMap():
+        mtimeMap = {}
+        for fileName in ConfigTool._fileList:
+            try:
+                mtimeMap[fileName] = os.stat(os.path.join(ConfigTool.configDir, fileName)).st_mtime
+            except OSError:
+                mtimeMap[fileName] = None
+        return mtimeMap
+
+    @staticmethod
+    def reload():
+        """
+        按加载顺序重新合并全部配置文件，成功后整体替换配置与快照；任一文件解析失败时保留原配置
+        """
+        newConfig = {}
+        for fileName in ConfigTool._fileList:
+            try:
+                with open(os.path.join(ConfigTool.configDir, fileName), 'r', encoding='utf-8') as f:
+                    data = yaml.safe_load(f)
+            except Exception as e:
+                LogTool.error(f"Config reload failed, keeping current config: {fileName}", e)
+                return False
+            if data:
+                newConfig.update(data)
+
+        oldSnapshot = ConfigTool.snapshot()
+        newSnapshot = ConfigSnapshot.build(newConfig)
+        # 先通知监听者再发布新快照: 例如 AsrService 需在新快照可见前固定原默认模型，否则其间的请求会同步加载新模型
+        for listener in ConfigTool._listenerList:
+            try:
+                listener(oldSnapshot, newSnapshot)
+            except Exception as e:
+                LogTool.error("Config listener failed", e)
+        # 引用赋值是原子的: 读取方要么看到旧配置，要么看到新配置
+        ConfigTool._config = newConfig
+        ConfigTool._snapshot = newSnapshot
+        LogTool.info(f"Config reloaded: {', '.join(ConfigTool._fileList)}")
+        return True
@@ -1,19 +1,39 @@
 import logging
 import os
+import time
+import queue
+import atexit
+import threading
+import multiprocessing
 from datetime import datetime
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 
 class LogTool:
+    """
+    日志工具: app.log (全量，按天切分) / error.log (错误，按天切分) / 控制台
+    默认在调用线程中同步写入；enableQueue 后调用方只把记录放入有界队列，
+    由后台监听线程持有上述三个 handler 负责写盘与输出 (切分日志也在后台线程进行)
+    Worker 进程 (spawn 进程池) 不打开日志文件: enableWorker 后记录经 getWorkerQueue 的跨进程队列交给主进程写出，
+    只有主进程切分 app.log / error.log
+    """
+    logDir = "app/logs"
     _logger = None
+    # 队列模式: 后台监听器、放入队列的 handler，以及原有的文件/控制台 handler
+    _listener = None
+    _queueHandler = None
+    _handlerList = []
+    # 主进程接收 Worker 进程日志的跨进程队列与监听器
+    _workerQueue = None
+    _workerListener = None
 
     @staticmethod
     def _get_logger():
         if LogTool._logger is None:
             # 确保日志目录存在
-            logDir = "app/logs"
+            logDir = LogTool.logDir
             if not os.path.exists(logDir):
                 os.makedirs(logDir)
-            
+
             LogTool._logger = logging.getLogger("ASRBrain")
             LogTool._logger.setLevel(logging.INFO)
 
@@ -50,6 +70,107 @@ class LogTool:
 
         return LogTool._logger
 
+    @staticmethod
+    def enableQueue(queueSize=10000, rateMap=None):
+        """
+        切换为队列模式 (重复调用无效)
+        queueSize: 队列上限，满时新记录直接丢弃并计数，不阻塞调用线程
+        rateMap: 各级别每秒最多放行的记录数，如 {"INFO": 200}，超出的记录丢弃并计数；未列出的级别不限速
+        """
+        logger = LogTool._get_logger()
+        if LogTool._listener is not None:
+            return
+
+        LogTool._handlerList = list(logger.handlers)
+        logQueue = queue.Queue(maxsize=max(1, queueSize))
+        queueHandler = LogQueueHandler(logQueue)
+        for levelName, rate in (rateMap or {}).items():
+            queueHandler.setRate(logging.getLevelName(levelName.upper()), rate)
+
+        # 后台线程按各 handler 自己的级别过滤 (error.log 只收 ERROR)
+        LogTool._listener = QueueListener(logQueue, *LogTool._handlerList, respect_handler_level=True)
+        LogTool._listener.start()
+        for handler in LogTool._handlerList:
+            logger.removeHandler(handler)
+        logger.addHandler(queueHandler)
+        LogTool._queueHandler = queueHandler
+        # 进程退出前写完队列中剩余的记录
+        atexit.register(LogTool.disableQueue)
+
+    @staticmethod
+    def disableQueue():
+        """
+        停止队列模式: 写完队列中的记录后恢复同步写入
+        """
+        if LogTool._listener is None:
+            return
+        logger = LogTool._get_logger()
+        logger.removeHandler(LogTool._queueHandler)
+        LogTool._listener.stop()
+        for handler in LogTool._handlerList:
+            logger.addHandler(handler)
+        stats = LogTool.getDropStats()
+        if stats["dropped"] or stats["rateLimited"]:
+            logger.info(f"Log queue stopped, dropped={stats['dropped']}, rateLimited={stats['rateLimited']}")
+        LogTool._listener = None
+        LogTool._queueHandler = None
+        LogTool._handlerList = []
+
+    @staticmethod
+    def getWorkerQueue():
+        """
+        主进程调用: 返回供 Worker 进程写日志的跨进程队列 (作为进程池 initargs 传入)，
+        首次调用时启动监听线程，用主进程的文件/控制台 handler 写出
+        """
+        if LogTool._workerQueue is None:
+            logger = LogTool._get_logger()
+            handlerList = LogTool._handlerList or list(logger.handlers)
+            LogTool._workerQueue = multiprocessing.get_context("spawn").Queue()
+            LogTool._workerListener = QueueListener(LogTool._workerQueue, *handlerList, respect_handler_level=True)
+            LogTool._workerListener.start()
+            atexit.register(LogTool.stopWorkerQueue)
+        return LogTool._workerQueue
+
+    @staticmethod
+    def stopWorkerQueue():
+        """
+        主进程调用: 写完 Worker 队列中剩余的记录后停止监听 (重复调用无效)
+        """
+        if LogTool._workerListener is None:
+            return
+        LogTool._workerListener.stop()
+        LogTool._workerListener = None
+        LogTool._workerQueue = None
+
+    @staticmethod
+    def enableWorker(workerQueue, rateMap=None):
+        """
+        Worker 进程调用: 记录只放入主进程的队列 (getWorkerQueue)，本进程不创建文件 handler
+        rateMap: 同 enableQueue
+        """
+        if LogTool._queueHandler is not None:
+            return
+        logger = logging.getLogger("ASRBrain")
+        logger.setLevel(logging.INFO)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        queueHandler = LogQueueHandler(workerQueue)
+        for levelName, rate in (rateMap or {}).items():
+            queueHandler.setRate(logging.getLevelName(levelName.upper()), rate)
+        logger.addHandler(queueHandler)
+        LogTool._logger = logger
+        LogTool._queueHandler = queueHandler
+
+    @staticmethod
+    def getDropStats():
+        """
+        队列模式下丢弃的记录数: dropped (队列满) / rateLimited (超过级别限速)
+        """
+        handler = LogTool._queueHandler
+        if handler is None:
+            return {"dropped": 0, "rateLimited": 0}
+        return {"dropped": handler.droppedCount, "rateLimited": handler.limitedCount}
+
     @staticmethod
     def info(message):
         LogTool._get_logger().info(message)
@@ -64,3 +185,60 @@ class LogTool:
     @staticmethod
     def debug(message):
         LogTool._get_logger().debug(message)
+
+class LogQueueHandler(QueueHandler):
+    """
+    放入有界队列的 handler: 按级别令牌桶限速，队列满时丢弃，两者分别计数
+    发生丢弃后，下一条成功入队的记录前补一条汇总告警 (最多每 reportIntervalSec 秒一条)
+    """
+    reportIntervalSec = 10.0
+
+    def __init__(self, logQueue):
+        super().__init__(logQueue)
+        # 级别 -> [每秒速率, 当前令牌数, 上次补充时刻]
+        self.bucketMap = {}
+        self.bucketLock = threading.Lock()
+        self.droppedCount = 0
+        self.limitedCount = 0
+        self.reportedCount = 0
+        self.lastReportTime = 0.0
+
+    def setRate(self, levelNo, rate):
+        self.bucketMap[levelNo] = [float(rate), float(rate), time.monotonic()]
+
+    def allow(self, levelNo):
+        bucket = self.bucketMap.get(levelNo)
+        if bucket is None:
+            return True
+        with self.bucketLock:
+            now = time.monotonic()
+            bucket[1] = min(bucket[0], bucket[1] + (now - bucket[2]) * bucket[0])
+            bucket[2] = now
+            if bucket[1] < 1:
+                self.limitedCount += 1
+                return False
+            bucket[1] -= 1
+            return True
+
+    def enqueue(self, record):
+        self.queue.put_nowait(record)
+
+    def emit(self, record):
+        if not self.allow(record.levelno):
+            return
+        try:
+            lostCount = self.droppedCount + self.limitedCount
+            if lostCount > self.reportedCount and time.monotonic() - self.lastReportTime >= LogQueueHandler.reportIntervalSec:
+                self.enqueue(logging.makeLogRecord({
+                    "name": record.name,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"Log records dropped: queueFull={self.droppedCount}, rateLimited={self.limitedCount}"
+                }))
+                self.reportedCount = lostCount
+                self.lastReportTime = time.monotonic()
+            self.enqueue(self.prepare(record))
+        except queue.Full:
+            self.droppedCount += 1
+        except Exception:
+            self.handleError(record)
@@ -0,0 +1,163 @@
+import time
+import bisect
+import threading
+from utils.LogTool import LogTool
+from utils.ConfigTool import ConfigTool
+
+class MetricTool:
+    """
+    轻量级性能指标 (单调时钟计时 + 固定分桶直方图 + 计数器/仪表)
+    - 分阶段耗时: read (解码/重采样) / vad (静音检测) / buffer (缓冲区拷贝) / infer (模型推理) / callback (结果回调)
+    - 计数器: audioSecondsIn / inferSeconds / segmentsOut / errors；仪表: queueDepth / schedQueueLive / schedQueueBatch
+    - 推理调度等待耗时: waitLive / waitBatch (InferScheduler)
+    - 导出: toPrometheus() 文本快照，或由后台线程按 metrics.logIntervalSec 通过 LogTool 输出汇总行
+    - metrics.enabled 为 false 时所有记录调用直接返回
+    """
+    enabled = True
+    # 直方图分桶上限 (秒)
+    bucketList = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    _lock = threading.Lock()
+    _counterMap = {"audioSecondsIn": 0.0, "inferSeconds": 0.0, "segmentsOut": 0, "errors": 0}
+    _gaugeMap = {"queueDepth": 0, "schedQueueLive": 0, "schedQueueBatch": 0}
+    # 阶段名 -> {"buckets": 各分桶计数 (最后一个为 +Inf), "sum": 总耗时, "count": 次数}
+    _histMap = {}
+    _reportThread = None
+
+    @staticmethod
+    def setup():
+        """
+        读取 metrics 配置，需要时启动定期汇总线程
+        """
+        MetricTool.enabled = ConfigTool.get("metrics.enabled", True)
+        logInterval = ConfigTool.get("metrics.logIntervalSec", 60)
+        if MetricTool.enabled and logInterval > 0 and MetricTool._reportThread is None:
+            MetricTool._reportThread = threading.Thread(target=MetricTool.reportLoop, args=(logInterval,), name="metricReport", daemon=True)
+            MetricTool._reportThread.start()
+
+    @staticmethod
+    def startTimer():
+        """
+        开始计时，返回开始时刻 (关闭时返回 None)
+        """
+        if not MetricTool.enabled:
+            return None
+        return time.perf_counter()
+
+    @staticmethod
+    def stopTimer(stage, startTime):
+        """
+        结束计时并记入该阶段的直方图，返回耗时 (秒)
+        """
+        if startTime is None:
+            return 0.0
+        elapsed = time.perf_counter() - startTime
+        MetricTool.observe(stage, elapsed)
+        return elapsed
+
+    @staticmethod
+    def observe(stage, value):
+        if not MetricTool.enabled:
+            return
+        index = bisect.bisect_left(MetricTool.bucketList, value)
+        with MetricTool._lock:
+            hist = MetricTool._histMap.get(stage)
+            if hist is None:
+                hist = {"buckets": [0] * (len(MetricTool.bucketList) + 1), "sum": 0.0, "count": 0}
+                MetricTool._histMap[stage] = hist
+            hist["buckets"][index] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    @staticmethod
+    def addCounter(name, value=1):
+        if not MetricTool.enabled:
+            return
+        with MetricTool._lock:
+            MetricTool._counterMap[name] = MetricTool._counterMap.get(name, 0) + value
+
+    @staticmethod
+    def addGauge(name, value):
+        if not MetricTool.enabled:
+            return
+        with MetricTool._lock:
+            MetricTool._gaugeMap[name] = MetricTool._gaugeMap.get(name, 0) + value
+
+    @staticmethod
+    def snapshot():
+        """
+        返回当前指标的拷贝: (counterMap, gaugeMap, histMap)
+        """
+        with MetricTool._lock:
+            histMap = {stage: {"buckets": list(hist["buckets"]), "sum": hist["sum"], "count": hist["count"]} for stage, hist in MetricTool._histMap.items()}
+            return dict(MetricTool._counterMap), dict(MetricTool._gaugeMap), histMap
+
+    @staticmethod
+    def toPrometheus():
+        """
+        导出 Prometheus 文本格式快照
+        """
+        counterMap, gaugeMap, histMap = MetricTool.snapshot()
+        lineList = []
+        for name, value in sorted(counterMap.items()):
+            metricName = f"asrbrain_{MetricTool.toSnakeCase(name)}_total"
+            lineList.append(f"# TYPE {metricName} counter")
+            lineList.append(f"{metricName} {value}")
+        # 日志队列模式下丢弃的日志条数
+        for name, value in sorted(LogTool.getDropStats().items()):
+            metricName = f"asrbrain_log_{MetricTool.toSnakeCase(name)}_total"
+            lineList.append(f"# TYPE {metricName} counter")
+            lineList.append(f"{metricName} {value}")
+        for name, value in sorted(gaugeMap.items()):
+            metricName = f"asrbrain_{MetricTool.toSnakeCase(name)}"
+            lineList.append(f"# TYPE {metricName} gauge")
+            lineList.append(f"{metricName} {value}")
+
+        lineList.append("# TYPE asrbrain_stage_seconds histogram")
+        for stage, hist in sorted(histMap.items()):
+            cumulative = 0
+            for bound, count in zip(MetricTool.bucketList, hist["buckets"]):
+                cumulative += count
+                lineList.append(f'asrbrain_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lineList.append(f'asrbrain_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist["count"]}')
+            lineList.append(f'asrbrain_stage_seconds_sum{{stage="{stage}"}} {hist["sum"]:.6f}')
+            lineList.append(f'asrbrain_stage_seconds_count{{stage="{stage}"}} {hist["count"]}')
+        return "\n".join(lineList) + "\n"
+
+    @staticmethod
+    def getSummary(lastSnapshot=None):
+        """
+        生成一行汇总文本；传入上一次 snapshot 时，RTF 与阶段平均耗时按区间增量计算
+        """
+        counterMap, gaugeMap, histMap = MetricTool.snapshot()
+        lastCounterMap, lastGaugeMap, lastHistMap = lastSnapshot or ({}, {}, {})
+
+        audioSec = counterMap["audioSecondsIn"] - lastCounterMap.get("audioSecondsIn", 0)
+        inferSec = counterMap["inferSeconds"] - lastCounterMap.get("inferSeconds", 0)
+        rtfText = f"{inferSec / audioSec:.3f}" if audioSec > 0 else "-"
+
+        stageList = []
+        for stage, hist in sorted(histMap.items()):
+            lastHist = lastHistMap.get(stage, {"sum": 0.0, "count": 0})
+            count = hist["count"] - lastHist["count"]
+            if count > 0:
+                stageList.append(f"{stage}={(hist['sum'] - lastHist['sum']) / count * 1000:.2f}ms")
+
+        return (
+            f"Metrics: audioIn={audioSec:.1f}s infer={inferSec:.1f}s rtf={rtfText} "
+            f"segments={counterMap['segmentsOut'] - lastCounterMap.get('segmentsOut', 0)} "
+            f"errors={counterMap['errors'] - lastCounterMap.get('errors', 0)} "
+            f"queue={gaugeMap.get('queueDepth', 0)} | {' '.join(stageList)}"
+        )
+
+    @staticmethod
+    def reportLoop(logInterval):
+        lastSnapshot = MetricTool.snapshot()
+        while True:
+            time.sleep(logInterval)
+            LogTool.info(MetricTool.getSummary(lastSnapshot))
+            lastSnapshot = MetricTool.snapshot()
+
+    @staticmethod
+    def toSnakeCase(name):
+        return "".join(f"_{char.lower()}" if char.isupper() else char for char in name)
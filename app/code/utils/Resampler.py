@@ -0,0 +1,83 @@
+import numpy as np
+from math import gcd
+
+class Resampler:
+    """
+    流式多相 (polyphase) 重采样器 (每路流一个实例)
+    - 有理数倍率 up/down，Kaiser 窗 sinc 低通滤波
+    - 滤波器历史在块之间保留，分块输出与整段重采样结果一致，内存只与块大小相关
+    - 已补偿滤波器群延迟，输出与输入在时间上对齐
+    """
+
+    def __init__(self, inRate, outRate, halfTaps=16, rollOff=0.94, kaiserBeta=8.6):
+        self.inRate = inRate
+        self.outRate = outRate
+        divisor = gcd(inRate, outRate)
+        self.up = outRate // divisor
+        self.down = inRate // divisor
+
+        # 每个相位的抽头数 (K)，原型滤波器在升采样后的速率上设计
+        # 取奇数长度 K * up - 1 使中心落在整数位置，末尾补一个 0 凑成 K * up
+        self.tapCount = 2 * halfTaps
+        numTaps = self.tapCount * self.up - 1
+        cutoff = 0.5 / max(self.up, self.down) * rollOff
+        position = np.arange(numTaps) - (numTaps - 1) / 2.0
+        prototype = np.sinc(2 * cutoff * position) * np.kaiser(numTaps, kaiserBeta)
+        # 补零升采样会把直流增益降为 1/up，这里补回
+        prototype *= self.up / prototype.sum()
+        prototype = np.append(prototype, 0.0)
+
+        # 多相滤波器组: bank[p, i] = prototype[p + i * up]
+        self.bank = prototype.reshape(self.tapCount, self.up).T.astype(np.float32)
+        self.delay = (numTaps - 1) // 2
+
+        # 上一块末尾的 K-1 个输入采样 (流开始前视为 0)
+        self.history = np.zeros(self.tapCount - 1, dtype=np.float32)
+        self.inCount = 0
+        self.outCount = 0
+        self.tapIndex = np.arange(self.tapCount)
+
+    def process(self, chunk):
+        """
+        输入一块音频，返回本块可以输出的重采样结果 (长度约为 len(chunk) * up / down)
+        """
+        chunk = np.asarray(chunk, dtype=np.float32)
+        data = np.concatenate([self.history, chunk])
+        # data[0] 在整个输入流中的位置
+        baseIndex = self.inCount - len(self.history)
+        self.inCount += len(chunk)
+        self.history = data[len(data) - (self.tapCount - 1):]
+        return self.compute(data, baseIndex, self.inCount)
+
+    def flush(self):
+        """
+        流结束: 补零输出滤波器中剩余的采样，总输出长度为 ceil(输入长度 * up / down)
+        """
+        totalOut = -(-self.inCount * self.up // self.down)
+        if self.outCount >= totalOut:
+            return np.zeros(0, dtype=np.float32)
+
+        padCount = self.delay // self.up + self.tapCount
+        data = np.concatenate([self.history, np.zeros(padCount, dtype=np.float32)])
+        baseIndex = self.inCount - len(self.history)
+        return self.compute(data, baseIndex, self.inCount + padCount, totalOut)
+
+    def compute(self, data, baseIndex, endIndex, outLimit=None):
+        """
+        计算所有所需输入位置 < endIndex 的输出采样
+        输出 n 对应升采样位置 t = n * down + delay，相位 p = t % up，最新输入 j = t // up
+        """
+        lastOut = (endIndex * self.up - 1 - self.delay) // self.down
+        if outLimit is not None:
+            lastOut = min(lastOut, outLimit - 1)
+        if lastOut < self.outCount:
+            return np.zeros(0, dtype=np.float32)
+
+        outIndex = np.arange(self.outCount, lastOut + 1)
+        self.outCount = lastOut + 1
+
+        position = outIndex * self.down + self.delay
+        phase = position % self.up
+        newest = position // self.up - baseIndex
+        gatherIndex = newest[:, None] - self.tapIndex[None, :]
+        return np.einsum('ij,ij->i', self.bank[phase], data[gatherIndex]).astype(np.float32)
@@ -0,0 +1,35 @@
+class StringTool:
+    @staticmethod
+    def isEmpty(text):
+        return text is None or len(text.strip()) == 0
+
+    @staticmethod
+    def commonPrefix(textList):
+        """
+        返回多个字符串的最长公共前缀
+        """
+        if not textList:
+            return ""
+        shortest = min(textList, key=len)
+        for index, char in enumerate(shortest):
+            for text in textList:
+                if text[index] != char:
+                    return shortest[:index]
+        return shortest
+
+    @staticmethod
+    def dropOverlap(prevText, nextText, minOverlap=2):
+        """
+        去除 nextText 开头与 prevText 结尾重复的部分 (用于重叠音频的接缝去重)
+        例: dropOverlap("今天天气很好", "天气很好我们出去") -> "我们出去"
+        """
+        if StringTool.isEmpty(prevText) or StringTool.isEmpty(nextText):
+            return nextText
+
+        prev = prevText.strip()
+        head = nextText.lstrip()
+        maxLen = min(len(prev), len(head))
+        for length in range(maxLen, minOverlap - 1, -1):
+            if prev.endswith(head[:length]):
+                return head[length:]
+        return nextText
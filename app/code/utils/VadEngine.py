@@ -0,0 +1,108 @@
+import numpy as np
+from utils.ConfigTool import ConfigTool
+
+class VadEngine:
+    """
+    帧级语音活动检测 (每路流一个实例，状态跨块保留)
+    - 10~30ms 一帧，每次 process 对整块音频做一次向量化计算
+    - 自适应噪声底: 非语音帧能量的中位数，噪声下降时立即跟随，上升时按 floorAdaptSec 缓慢跟随 (整块都是语音时再慢 10 倍)
+    - 双门限 (hysteresis): 能量高于 噪声底+enterDb 进入语音，低于 噪声底+exitDb 才退出
+    - 拖尾 (hangover): 语音结束后再保持 hangoverMs，避免字间短停顿被切断
+    - minRms 为绝对下限，低于它的帧 (数字静音) 一律视为非语音
+    """
+
+    def __init__(self, sampleRate=16000, frameMs=20, minRms=0.005, enterDb=9.0, exitDb=5.0, hangoverMs=200, floorAdaptSec=3.0):
+        self.sampleRate = sampleRate
+        self.frameSize = int(sampleRate * frameMs / 1000)
+        self.minEnergy = minRms ** 2
+        self.enterRatio = 10 ** (enterDb / 10)
+        self.exitRatio = 10 ** (exitDb / 10)
+        self.hangFrames = int(round(hangoverMs / frameMs))
+        self.floorAdaptSec = floorAdaptSec
+
+        self.noiseFloor = None
+        # 上一块最后一帧的门限状态，以及距最近一个语音帧的帧数 (用于拖尾)
+        self.lastState = 0
+        self.framesSinceSpeech = self.hangFrames + 1
+        # 不足一帧的输入留到下次
+        self.remainder = np.zeros(0, dtype=np.float32)
+        # 已处理的总帧数 (换算绝对时间用)
+        self.frameCount = 0
+
+    @staticmethod
+    def create(sampleRate=16000, minRms=0.005):
+        """
+        按 vad.* 配置创建实例
+        """
+        return VadEngine(
+            sampleRate=sampleRate,
+            frameMs=ConfigTool.get("vad.frameMs", 20),
+            minRms=minRms,
+            enterDb=ConfigTool.get("vad.enterDb", 9.0),
+            exitDb=ConfigTool.get("vad.exitDb", 5.0),
+            hangoverMs=ConfigTool.get("vad.hangoverMs", 200),
+            floorAdaptSec=ConfigTool.get("vad.floorAdaptSec", 3.0)
+        )
+
+    def process(self, audioData):
+        """
+        处理一段音频，返回本次凑满的每一帧是否为语音 (bool 数组)
+        第一帧的绝对帧号为 self.frameCount - len(返回值)
+        """
+        if len(self.remainder) > 0:
+            audioData = np.concatenate((self.remainder, audioData))
+        frameCount = len(audioData) // self.frameSize
+        self.remainder = audioData[frameCount * self.frameSize:].copy()
+        if frameCount == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = audioData[:frameCount * self.frameSize].reshape(frameCount, self.frameSize)
+        energy = np.einsum('ij,ij->i', frames, frames) / self.frameSize
+        if self.noiseFloor is None:
+            self.noiseFloor = max(float(np.percentile(energy, 10)), 1e-10)
+
+        enterLevel = max(self.noiseFloor * self.enterRatio, self.minEnergy)
+        exitLevel = max(self.noiseFloor * self.exitRatio, self.minEnergy)
+
+        # 双门限: 高于 enter 记 1，低于 exit 记 0，介于两者之间沿用前一帧状态 (前向填充)
+        positions = np.arange(frameCount)
+        markList = np.where(energy > enterLevel, 1, np.where(energy < exitLevel, 0, -1))
+        decidedIndex = np.maximum.accumulate(np.where(markList >= 0, positions, -1))
+        rawSpeech = np.where(decidedIndex >= 0, markList[decidedIndex], self.lastState).astype(bool)
+
+        # 拖尾: 距最近一个语音帧不超过 hangFrames 的帧都算语音
+        lastSpeechIndex = np.maximum.accumulate(np.where(rawSpeech, positions, -1 - self.framesSinceSpeech))
+        speechFlags = positions - lastSpeechIndex <= self.hangFrames
+
+        self.lastState = int(rawSpeech[-1])
+        self.framesSinceSpeech = min(int(frameCount - 1 - lastSpeechIndex[-1]), self.hangFrames + 1)
+        self.frameCount += frameCount
+        self.updateFloor(energy, speechFlags, frameCount)
+        return speechFlags
+
+    def updateFloor(self, energy, speechFlags, frameCount):
+        noiseEnergy = energy[~speechFlags]
+        adaptSec = self.floorAdaptSec
+        if len(noiseEnergy) > 0:
+            candidate = float(np.median(noiseEnergy))
+        else:
+            # 整块都判为语音: 用低分位数以 10 倍时间常数缓慢跟随，
+            # 既能适应持续变大的噪声，又不会把几秒的连续语音当成噪声
+            candidate = float(np.percentile(energy, 10))
+            adaptSec *= 10
+
+        if candidate < self.noiseFloor:
+            self.noiseFloor = max(candidate, 1e-10)
+        else:
+            alpha = min(1.0, frameCount * self.frameSize / self.sampleRate / adaptSec)
+            self.noiseFloor += alpha * (candidate - self.noiseFloor)
+
+    @staticmethod
+    def toRegions(speechFlags, frameSize, startFrame=0):
+        """
+        把帧标记转换为语音区间列表 [(起始采样点, 结束采样点), ...]
+        """
+        edges = np.diff(np.concatenate(([0], speechFlags.astype(np.int8), [0])))
+        startList = np.flatnonzero(edges == 1)
+        endList = np.flatnonzero(edges == -1)
+        return [((startFrame + start) * frameSize, (startFrame + end) * frameSize) for start, end in zip(startList, endList)]
@@ -0,0 +1,117 @@
+import os
+import struct
+import numpy as np
+
+class WavReader:
+    """
+    内存映射的 PCM WAV 读取器 (每个文件一个实例)
+    - 解析 RIFF 头后用 np.memmap 映射 data 块，读取时直接取映射视图，不经过逐块 read 系统调用与临时数组
+    - int16 -> float32 转换与多声道下混写入预分配的输出缓冲区，同样大小的读取反复复用同一块内存
+    - mixDown=False 时不下混，按 (帧数, 声道数) 返回各声道 (分声道识别)
+    - readRegion 支持任意位置的随机读取，无需 seek
+    - 仅支持小端 RIFF 的 int16 / int32 PCM 与 float32；其他格式 (24bit、RF64、压缩编码等) open 返回 None，由调用方改用 soundfile
+    """
+    # (格式码, 位深) -> (numpy 类型, 转换到 [-1, 1) 的系数)
+    formatMap = {
+        (1, 16): (np.dtype('<i2'), 1.0 / 32768),
+        (1, 32): (np.dtype('<i4'), 1.0 / 2147483648),
+        (3, 32): (np.dtype('<f4'), 1.0)
+    }
+
+    def __init__(self, filePath, dtype, scale, channels, sampleRate, dataOffset, frames):
+        self.filePath = filePath
+        self.channels = channels
+        self.sampleRate = sampleRate
+        self.frames = frames
+        self.scale = np.float32(scale)
+        self.data = np.memmap(filePath, dtype=dtype, mode='r', offset=dataOffset, shape=(frames, channels)) if frames > 0 else np.zeros((0, channels), dtype=dtype)
+        self.outBuffer = np.zeros(0, dtype=np.float32)
+        self.channelBuffer = np.zeros((0, channels), dtype=np.float32)
+
+    @staticmethod
+    def open(filePath):
+        """
+        打开 WAV 文件，格式不支持或不是 WAV 时返回 None
+        """
+        header = WavReader.parseHeader(filePath)
+        if header is None:
+            return None
+        formatTag, channels, sampleRate, bitsPerSample, dataOffset, dataSize = header
+        dtypeInfo = WavReader.formatMap.get((formatTag, bitsPerSample))
+        if dtypeInfo is None or channels <= 0:
+            return None
+        dtype, scale = dtypeInfo
+        # 边录边写的文件 data 块大小可能未回填，按实际文件长度截断
+        dataSize = min(dataSize, os.path.getsize(filePath) - dataOffset)
+        frames = max(0, dataSize) // (dtype.itemsize * channels)
+        return WavReader(filePath, dtype, scale, channels, sampleRate, dataOffset, frames)
+
+    @staticmethod
+    def parseHeader(filePath):
+        """
+        返回 (格式码, 声道数, 采样率, 位深, data 块偏移, data 块大小)，解析失败返回 None
+        """
+        try:
+            with open(filePath, 'rb') as f:
+                riffHeader = f.read(12)
+                if len(riffHeader) < 12 or riffHeader[:4] != b'RIFF' or riffHeader[8:12] != b'WAVE':
+                    return None
+                fmtInfo = None
+                while True:
+                    chunkHeader = f.read(8)
+                    if len(chunkHeader) < 8:
+                        return None
+                    chunkId, chunkSize = struct.unpack('<4sI', chunkHeader)
+                    if chunkId == b'fmt ':
+                        fmtData = f.read(chunkSize)
+                        if len(fmtData) < 16:
+                            return None
+                        formatTag, channels, sampleRate, byteRate, blockAlign, bitsPerSample = struct.unpack('<HHIIHH', fmtData[:16])
+                        # WAVE_FORMAT_EXTENSIBLE: 实际格式码在 SubFormat GUID 的前两个字节
+                        if formatTag == 0xFFFE and len(fmtData) >= 26:
+                            formatTag = struct.unpack('<H', fmtData[24:26])[0]
+                        fmtInfo = (formatTag, channels, sampleRate, bitsPerSample)
+                        if chunkSize % 2:
+                            f.seek(1, os.SEEK_CUR)
+                    elif chunkId == b'data':
+                        if fmtInfo is None:
+                            return None
+                        return fmtInfo + (f.tell(), chunkSize)
+                    else:
+                        # 其他块 (LIST 等) 跳过，块大小为奇数时有 1 字节填充
+                        f.seek(chunkSize + chunkSize % 2, os.SEEK_CUR)
+        except OSError:
+            return None
+
+    def readRegion(self, startFrame, frameCount, mixDown=True):
+        """
+        读取 [startFrame, startFrame + frameCount) 的 float32 音频: 下混后的单声道，或 mixDown=False 时的 (帧数, 声道数)
+        返回值是内部缓冲区的视图，下一次调用时会被覆盖，需要保留时由调用方拷贝
+        """
+        startFrame = min(max(0, startFrame), self.frames)
+        endFrame = min(self.frames, startFrame + max(0, frameCount))
+        count = endFrame - startFrame
+        if not mixDown:
+            if len(self.channelBuffer) < count:
+                self.channelBuffer = np.empty((count, self.channels), dtype=np.float32)
+            outData = self.channelBuffer[:count]
+            np.multiply(self.data[startFrame:endFrame], self.scale, out=outData, dtype=np.float32)
+            return outData
+
+        if len(self.outBuffer) < count:
+            self.outBuffer = np.empty(count, dtype=np.float32)
+        outData = self.outBuffer[:count]
+
+        rawData = self.data[startFrame:endFrame]
+        if self.channels == 1:
+            np.multiply(rawData[:, 0], self.scale, out=outData, dtype=np.float32)
+        else:
+            np.add.reduce(rawData, axis=1, dtype=np.float32, out=outData)
+            outData *= self.scale / self.channels
+        return outData
+
+    def close(self):
+        # 映射在最后一个视图释放后由 numpy 关闭
+        self.data = None
+        self.outBuffer = np.zeros(0, dtype=np.float32)
+        self.channelBuffer = np.zeros((0, self.channels), dtype=np.float32)
@@ -0,0 +1,172 @@
+import os
+import json
+import atexit
+import threading
+from collections import OrderedDict
+from utils.LogTool import LogTool
+from utils.ConfigTool import ConfigTool
+from utils.FileTool import FileTool
+
+class WriterTool:
+    """
+    缓冲式结果写入 (替代逐行 open/close 的 FileTool.appendJsonLine)
+    - 调用方只把行放入内存缓冲区，文件句柄长期保持打开
+    - 后台线程按时间 (writer.flushIntervalSec) 或数据量 (writer.flushKb) 批量写盘
+    - fsync 策略 writer.fsync: none (不调用) / flush (每次写盘后) / close (关闭文件时)
+    - 同时打开的文件数上限 writer.maxOpenFiles，超出时关闭最久未写入的句柄 (下次追加时重新打开)
+    - 后台写盘失败时该文件记为失败 (已取出的行无法确定写入了多少，不重试以免重复)，closeFile 返回 False
+    """
+    # 文件路径 -> {"file": 文件句柄或 None, "lines": 待写入行列表, "failed": 是否发生过写盘失败}
+    _fileMap = OrderedDict()
+    _pendingBytes = 0
+    # _lock 保护 _fileMap 与缓冲区；_ioLock 保证写盘顺序，两者同时需要时先取 _ioLock
+    _lock = threading.Lock()
+    _ioLock = threading.Lock()
+    _wakeEvent = threading.Event()
+    _thread = None
+
+    @staticmethod
+    def appendJsonLine(filePath, dataDict):
+        """
+        追加一行 JSON 数据 (JSONL 格式) 到写入缓冲区
+        """
+        try:
+            jsonLine = json.dumps(dataDict, ensure_ascii=False) + "\n"
+        except Exception as e:
+            LogTool.error(f"Failed to serialize line for: {filePath}", e)
+            return False
+
+        WriterTool.startThread()
+        with WriterTool._lock:
+            entry = WriterTool._fileMap.get(filePath)
+            if entry is None:
+                FileTool.ensureDir(filePath)
+                entry = {"file": None, "lines": [], "failed": False}
+                WriterTool._fileMap[filePath] = entry
+            entry["lines"].append(jsonLine)
+            WriterTool._pendingBytes += len(jsonLine)
+            isFull = WriterTool._pendingBytes >= ConfigTool.get("writer.flushKb", 256) * 1024
+
+        if isFull:
+            WriterTool._wakeEvent.set()
+        return True
+
+    @staticmethod
+    def flushAll():
+        """
+        把所有缓冲区写入磁盘
+        """
+        with WriterTool._ioLock:
+            with WriterTool._lock:
+                taskList = [(filePath, entry, entry["lines"]) for filePath, entry in WriterTool._fileMap.items() if entry["lines"]]
+                for filePath, entry, lines in taskList:
+                    entry["lines"] = []
+                WriterTool._pendingBytes = 0
+
+            doSync = ConfigTool.get("writer.fsync", "close") == "flush"
+            for filePath, entry, lines in taskList:
+                WriterTool.writeLines(filePath, entry, lines, doSync)
+
+    @staticmethod
+    def closeFile(filePath):
+        """
+        写入该文件剩余的缓冲数据并关闭句柄，返回是否成功
+        """
+        with WriterTool._ioLock:
+            with WriterTool._lock:
+                entry = WriterTool._fileMap.pop(filePath, None)
+                if entry is None:
+                    return True
+                lines = entry["lines"]
+                WriterTool._pendingBytes -= sum(len(line) for line in lines)
+
+            isOk = WriterTool.writeLines(filePath, entry, lines, False)
+            if entry["failed"]:
+                LogTool.error(f"Some lines were not written: {filePath}")
+            return WriterTool.closeHandle(filePath, entry) and isOk and not entry["failed"]
+
+    @staticmethod
+    def closeAll():
+        """
+        程序退出时调用: 写入全部缓冲数据并关闭所有文件
+        """
+        for filePath in list(WriterTool._fileMap.keys()):
+            WriterTool.closeFile(filePath)
+
+    @staticmethod
+    def writeLines(filePath, entry, lines, doSync):
+        """
+        写入若干行 (调用方已持有 _ioLock)，失败时标记该文件并关闭句柄 (下次写入时重新打开)
+        """
+        if not lines:
+            return True
+        try:
+            if entry["file"] is None:
+                WriterTool.limitOpenFiles()
+                entry["file"] = open(filePath, 'a', encoding='utf-8')
+            entry["file"].write("".join(lines))
+            entry["file"].flush()
+            if doSync:
+                os.fsync(entry["file"].fileno())
+            with WriterTool._lock:
+                if filePath in WriterTool._fileMap:
+                    WriterTool._fileMap.move_to_end(filePath)
+            return True
+        except Exception as e:
+            LogTool.error(f"Failed to append to file: {filePath}", e)
+            entry["failed"] = True
+            if entry["file"] is not None:
+                try:
+                    entry["file"].close()
+                except Exception:
+                    pass
+                entry["file"] = None
+            return False
+
+    @staticmethod
+    def closeHandle(filePath, entry):
+        if entry["file"] is None:
+            return True
+        try:
+            if ConfigTool.get("writer.fsync", "close") != "none":
+                os.fsync(entry["file"].fileno())
+            return True
+        except Exception as e:
+            LogTool.error(f"Failed to sync file: {filePath}", e)
+            return False
+        finally:
+            entry["file"].close()
+            entry["file"] = None
+
+    @staticmethod
+    def limitOpenFiles():
+        """
+        打开新句柄前，关闭最久未写入的句柄 (调用方已持有 _ioLock)
+        """
+        maxOpenFiles = ConfigTool.get("writer.maxOpenFiles", 64)
+        with WriterTool._lock:
+            openList = [(filePath, entry) for filePath, entry in WriterTool._fileMap.items() if entry["file"] is not None]
+        for filePath, entry in openList[:max(0, len(openList) - maxOpenFiles + 1)]:
+            if not WriterTool.closeHandle(filePath, entry):
+                entry["failed"] = True
+
+    @staticmethod
+    def startThread():
+        if WriterTool._thread is not None:
+            return
+        with WriterTool._lock:
+            if WriterTool._thread is None:
+                WriterTool._thread = threading.Thread(target=WriterTool.flushLoop, name="resultWriter", daemon=True)
+                WriterTool._thread.start()
+                atexit.register(WriterTool.closeAll)
+
+    @staticmethod
+    def flushLoop():
+        interval = ConfigTool.get("writer.flushIntervalSec", 1.0)
+        while True:
+            WriterTool._wakeEvent.wait(interval)
+            WriterTool._wakeEvent.clear()
+            try:
+                WriterTool.flushAll()
+            except Exception as e:
+                LogTool.error("Result writer flush failed", e)